@@ -0,0 +1 @@
+"""Reusable helpers built on top of the example models in this repository."""
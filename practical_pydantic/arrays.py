@@ -0,0 +1,313 @@
+"""Homogeneous batches of models stored column by column.
+
+``parse_obj_as(List[Item], data)`` keeps a full ``Item`` (a ``__dict__``
+and a ``__fields_set__`` each) per row. A ``ModelArray[Item]`` holds the
+same batch as one column per field instead, NumPy arrays for ``int``,
+``float`` and ``bool`` fields and lists for everything else, and only
+builds ``Item`` instances when rows are indexed or iterated::
+
+    >>> items = ModelArray[Item].parse_obj(item_data)
+    >>> items[0]
+    Item(id=1, name='My Item')
+    >>> items[items.column("id") > 100].json()
+    '[...]'
+
+Rows are validated in chunks through
+:func:`~practical_pydantic.columnar.validate_columns`, so a large batch is
+never held as models all at once. Invalid rows raise the same
+:class:`~pydantic.ValidationError` ``parse_obj_as`` would, with locations
+like ``("__root__", 3, "id")``. Only the declared fields of each row are
+kept: extra fields allowed by ``Extra.allow`` and the extra fields of
+subclass instances are dropped.
+
+Requires NumPy.
+"""
+
+import itertools
+from collections import deque
+from collections.abc import Mapping
+from types import GeneratorType
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Type,
+    TypeVar,
+)
+
+from pydantic import BaseModel, ValidationError, parse_obj_as
+from pydantic.error_wrappers import ErrorWrapper
+from pydantic.tools import _get_parsing_type
+from pydantic.utils import ROOT_KEY
+
+from practical_pydantic.columnar import (
+    _DTYPES,
+    Column,
+    _instance,
+    _kind,
+    np,
+    validate_columns,
+)
+from practical_pydantic.serializer import compile_dict
+
+Model = TypeVar("Model", bound=BaseModel)
+
+CHUNK_SIZE = 10_000
+
+_SEQUENCES = (list, tuple, set, frozenset, GeneratorType, deque)
+_arrays: Dict[Type[BaseModel], Type["ModelArray"]] = {}
+
+
+def _take(column: Column, index: Any) -> Column:
+    if isinstance(column, np.ndarray) or isinstance(index, slice):
+        return column[index]
+    if index.dtype == bool:
+        return list(itertools.compress(column, index))
+    return [column[i] for i in index]
+
+
+def _finish(chunks: List[List[Any]], kind: str) -> Column:
+    values = list(itertools.chain.from_iterable(chunks))
+    if kind in _DTYPES and None not in values:
+        try:
+            return np.fromiter(values, dtype=_DTYPES[kind], count=len(values))
+        except (OverflowError, TypeError):
+            pass
+    return values
+
+
+class ModelArray(Generic[Model]):
+    """A batch of ``model`` instances stored as columns; use as
+    ``ModelArray[Item]``."""
+
+    model: Type[BaseModel]
+
+    def __class_getitem__(cls, model: Type[BaseModel]) -> Any:
+        if not isinstance(model, type) or not issubclass(model, BaseModel):
+            return super().__class_getitem__(model)  # type: ignore[misc]
+        try:
+            return _arrays[model]
+        except KeyError:
+            array = _arrays[model] = type(
+                f"ModelArray[{model.__name__}]",
+                (cls,),
+                {"model": model, "__module__": cls.__module__},
+            )
+            return array
+
+    def __init__(
+        self,
+        columns: Mapping[str, Column],
+        set_codes: Optional["np.ndarray"] = None,
+        set_table: Sequence[FrozenSet[str]] = (),
+    ):
+        """Wrap trusted, already validated ``columns``; rows have every field
+        set unless ``set_codes`` index each row's ``__fields_set__`` in
+        ``set_table``."""
+        if np is None:
+            raise ImportError(
+                "numpy is not installed, run `pip install numpy` to use "
+                "ModelArray"
+            )
+        if getattr(self, "model", None) is None:
+            raise TypeError("use ModelArray[Model] to create a model array")
+        if set(columns) != set(self.model.__fields__):
+            raise ValueError(
+                f"expected one column per field of {self.model.__name__}"
+            )
+        self._columns = {name: columns[name] for name in self.model.__fields__}
+        lengths = {len(column) for column in self._columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("all columns must have the same length")
+        self._length = lengths.pop() if lengths else 0
+        if set_codes is None:
+            set_codes = np.zeros(self._length, dtype=np.int32)
+            set_table = [frozenset(self.model.__fields__)]
+        self._set_codes = set_codes
+        self._set_table = list(set_table)
+
+    @classmethod
+    def parse_obj(
+        cls, obj: Iterable[Any], *, chunk_size: int = CHUNK_SIZE
+    ) -> "ModelArray[Model]":
+        """Validate ``obj`` like ``parse_obj_as(List[model], obj)``."""
+        model = cls.model
+        if not isinstance(obj, _SEQUENCES):
+            # raises the same error as parse_obj_as does for a non-list
+            obj = parse_obj_as(List[model], obj)  # type: ignore[valid-type]
+        names = list(model.__fields__)
+        kinds = [_kind(model, field) for field in model.__fields__.values()]
+        chunks: Dict[str, List[List[Any]]] = {name: [] for name in names}
+        codes: List["np.ndarray"] = []
+        table: Dict[FrozenSet[str], int] = {}
+        errors: List[ErrorWrapper] = []
+        rows = iter(obj)
+        offset = 0
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            instances = cls._validate_chunk(chunk, offset, errors)
+            offset += len(chunk)
+            if errors:
+                # keep validating for the complete error, but stop storing
+                continue
+            dicts = [m.__dict__ for m in instances]
+            for name in names:
+                chunks[name].append([d[name] for d in dicts])
+            codes.append(
+                np.fromiter(
+                    (
+                        table.setdefault(
+                            frozenset(m.__fields_set__), len(table)
+                        )
+                        for m in instances
+                    ),
+                    dtype=np.int32,
+                    count=len(instances),
+                )
+            )
+        if errors:
+            errors.sort(key=lambda e: e.loc_tuple()[1])
+            raise ValidationError(
+                errors, _get_parsing_type(List[model])  # type: ignore[valid-type]
+            )
+        columns = {
+            name: _finish(chunks[name], kind)
+            for name, kind in zip(names, kinds)
+        }
+        set_codes = (
+            np.concatenate(codes) if codes else np.zeros(0, dtype=np.int32)
+        )
+        return cls(columns, set_codes, list(table))
+
+    @classmethod
+    def _validate_chunk(
+        cls, chunk: List[Any], offset: int, errors: List[ErrorWrapper]
+    ) -> List[BaseModel]:
+        model = cls.model
+        instances: List[Any] = [None] * len(chunk)
+        mappings = []
+        # a custom root model takes a mapping as its root value
+        by_rows = not model.__custom_root_type__
+        for i, row in enumerate(chunk):
+            if by_rows and isinstance(row, Mapping):
+                mappings.append(i)
+            elif isinstance(row, model):
+                instances[i] = row
+            else:
+                # anything else is up to the model, as in a List[model] field
+                try:
+                    instances[i] = model.validate(row)
+                except (ValueError, TypeError, AssertionError) as exc:
+                    errors.append(
+                        ErrorWrapper(exc, loc=(ROOT_KEY, offset + i))
+                    )
+        if mappings:
+            result = validate_columns(model, [chunk[i] for i in mappings])
+            for i, instance in zip(mappings, result.models):
+                instances[i] = instance
+            for j, error in result.errors.items():
+                errors.append(
+                    ErrorWrapper(error, loc=(ROOT_KEY, offset + mappings[j]))
+                )
+        return instances
+
+    @classmethod
+    def from_columns(
+        cls, columns: Mapping[str, Sequence[Any]], **kwargs: Any
+    ) -> "ModelArray[Model]":
+        """Validate a dict of equal-length column lists, keyed as the rows
+        would be: by field alias, or by field name as well with
+        ``allow_population_by_field_name``."""
+        if len({len(column) for column in columns.values()}) > 1:
+            raise ValueError("all columns must have the same length")
+        keys = list(columns)
+        rows = (dict(zip(keys, row)) for row in zip(*columns.values()))
+        return cls.parse_obj(rows, **kwargs)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def column(self, name: str) -> Column:
+        """The values of field ``name``, one per row."""
+        return self._columns[name]
+
+    def _row(self, i: int, values: Dict[str, Any]) -> BaseModel:
+        return _instance(
+            self.model, values, set(self._set_table[self._set_codes[i]])
+        )
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, (int, np.integer)):
+            if not -self._length <= index < self._length:
+                raise IndexError("ModelArray index out of range")
+            index = int(index) % self._length
+            values = {}
+            for name, column in self._columns.items():
+                value = column[index]
+                values[name] = (
+                    value.item() if isinstance(value, np.generic) else value
+                )
+            return self._row(index, values)
+        if not isinstance(index, slice):
+            index = np.asarray(index)
+            if index.dtype == bool and len(index) != self._length:
+                raise IndexError("boolean index does not match the length")
+        return type(self)(
+            {
+                name: _take(column, index)
+                for name, column in self._columns.items()
+            },
+            self._set_codes[index],
+            self._set_table,
+        )
+
+    def __iter__(self) -> Iterator[BaseModel]:
+        names = list(self._columns)
+        for start in range(0, self._length, CHUNK_SIZE):
+            stop = start + CHUNK_SIZE
+            columns = [
+                column[start:stop].tolist()
+                if isinstance(column, np.ndarray)
+                else column[start:stop]
+                for column in self._columns.values()
+            ]
+            for i, row in enumerate(zip(*columns), start):
+                yield self._row(i, dict(zip(names, row)))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(<{self._length} rows>)"
+
+    def dict(
+        self,
+        *,
+        by_alias: bool = False,
+        include: Any = None,
+        exclude: Any = None,
+    ) -> List[Dict[str, Any]]:
+        """``[m.dict(...) for m in self]``, with a compiled serializer."""
+        dump = compile_dict(
+            self.model, by_alias=by_alias, include=include, exclude=exclude
+        )
+        return [dump(m) for m in self]
+
+    def json(
+        self,
+        *,
+        by_alias: bool = False,
+        include: Any = None,
+        exclude: Any = None,
+    ) -> str:
+        """The batch as a JSON array, encoded as the model encodes."""
+        model = self.model
+        return model.__config__.json_dumps(
+            self.dict(by_alias=by_alias, include=include, exclude=exclude),
+            default=model.__json_encoder__,
+        )
@@ -0,0 +1,424 @@
+"""A registry of JSON libraries for ``.json()`` and ``parse_raw()``.
+
+``export-models/model-json.py`` wires orjson into ``OrjsonUser`` by hand,
+decoding the bytes orjson produces back into a ``str`` (only for callers
+that often encode it again), and ``UjsonUser`` does the same for ujson.
+Here the libraries are registered once, as :class:`JsonBackend` s, and
+the fastest one installed is picked automatically: orjson, then ujson,
+then the standard library::
+
+    >>> get_backend().name
+    'orjson'
+    >>> class User(BackendModel):
+    ...     id: int
+    ...     class Config:
+    ...         json_bytes = True  # .json() returns orjson's bytes as they are
+    >>> backend_model(FooBarModel)  # the same for an existing model
+
+A :class:`BackendModel` encodes with ``Config.json_backend`` (a registered
+name, or ``None`` for the default) and decodes ``parse_raw`` input with it
+without turning bytes into a ``str`` first. ``json_encoders`` and the rest
+of pydantic's encoding are passed as the library's ``default``; for orjson,
+which encodes datetimes, dataclasses and subclasses of builtins itself,
+the matching passthrough options are set when ``json_encoders`` covers
+those types, and models with encoders for types orjson cannot hand over
+(``UUID``, enums, ...) are encoded by the standard library. Values a
+library cannot encode (integers beyond 64 bits, non-string keys) fall
+back to the standard library as well, and so do ``NaN`` and infinities,
+which orjson would write as ``null``. orjson and ujson produce compact
+JSON. orjson reads integers beyond 64 bits as floats and rejects
+``NaN``, so documents holding either are decoded by ``json.loads``: what
+``.json()`` writes, ``parse_raw()`` reads back exactly, whichever
+backend is used.
+
+``.json()`` calls with an ``encoder`` or ``json.dumps`` arguments go to
+pydantic as usual. :func:`pick_backend` times the registered backends on
+a sample instance, to pick one per model shape.
+"""
+
+import dataclasses
+import inspect
+import json
+import timeit
+from datetime import date, time
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel, Protocol, ValidationError
+from pydantic.error_wrappers import ErrorWrapper
+from pydantic.utils import ROOT_KEY
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None
+
+Dumps = Callable[[Any], Union[str, bytes]]
+
+
+@dataclasses.dataclass(frozen=True)
+class JsonBackend:
+    """A JSON library: ``loads`` takes ``str`` or ``bytes``, and
+    ``dumper(model)`` returns the function encoding ``model.dict()``-like data
+    for ``model``, which returns bytes if ``binary``."""
+
+    name: str
+    loads: Callable[[Union[str, bytes]], Any]
+    dumper: Callable[[Type[BaseModel]], Dumps]
+    binary: bool = False
+    priority: int = 0
+
+
+_backends: Dict[str, JsonBackend] = {}
+_default: Optional[str] = None
+_dumpers: Dict[Tuple[str, Type[BaseModel]], Dumps] = {}
+
+
+def register_backend(backend: JsonBackend) -> None:
+    """Add ``backend``, or replace the one with the same name; the default is
+    the backend with the highest ``priority``."""
+    _backends[backend.name] = backend
+    for key in [key for key in _dumpers if key[0] == backend.name]:
+        del _dumpers[key]
+
+
+def available_backends() -> List[JsonBackend]:
+    """The registered backends, highest priority first."""
+    return sorted(_backends.values(), key=lambda b: b.priority, reverse=True)
+
+
+def set_default_backend(name: Optional[str]) -> None:
+    """Use backend ``name`` wherever none is configured; ``None`` goes back to
+    the highest priority one."""
+    if name is not None and name not in _backends:
+        raise KeyError(f"no JSON backend named {name!r}")
+    global _default
+    _default = name
+
+
+def get_backend(name: Optional[str] = None) -> JsonBackend:
+    """Backend ``name``, or the default one."""
+    name = name or _default
+    if name is None:
+        return available_backends()[0]
+    try:
+        return _backends[name]
+    except KeyError:
+        raise KeyError(f"no JSON backend named {name!r}") from None
+
+
+def _compact_dumps(model: Type[BaseModel]) -> Dumps:
+    # what the compact backends fall back to, with the same whitespace
+    return partial(
+        json.dumps,
+        default=model.__json_encoder__,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+
+
+def _json_dumper(model: Type[BaseModel]) -> Dumps:
+    # exactly what BaseModel.json() does with the default json_dumps
+    return partial(json.dumps, default=model.__json_encoder__)
+
+
+def _orjson_option(model: Type[BaseModel]) -> Optional[int]:
+    """orjson options that make it call ``default`` for every type with a
+    ``json_encoders`` entry, or None if it cannot."""
+    option = 0
+    for tp in model.__config__.json_encoders:
+        if not inspect.isclass(tp) or issubclass(tp, BaseModel):
+            # models are always handed to default
+            continue
+        if issubclass(tp, (date, time)):
+            option |= orjson.OPT_PASSTHROUGH_DATETIME
+        elif dataclasses.is_dataclass(tp):
+            option |= orjson.OPT_PASSTHROUGH_DATACLASS
+        elif tp not in (str, int, dict, list) and issubclass(
+            tp, (str, int, dict, list)
+        ):
+            option |= orjson.OPT_PASSTHROUGH_SUBCLASS
+        elif tp.__module__ not in ("builtins", "decimal", "pathlib"):
+            # orjson encodes UUIDs, enums, NumPy arrays, ... itself
+            return None
+        elif tp in (str, int, float, bool, dict, list, tuple, type(None)):
+            return None
+    return option
+
+
+_INT64 = 2**63
+
+
+def _inexact(obj: Any) -> bool:
+    """Whether ``obj`` holds a float orjson does not round-trip: ``NaN``, an
+    infinity, or one beyond the 64-bit integers (as orjson reads such
+    integers)."""
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, float):
+            if not -_INT64 < obj < _INT64:
+                return True
+        elif isinstance(obj, dict):
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+    return False
+
+
+def _orjson_loads(b: Union[str, bytes]) -> Any:
+    try:
+        obj = orjson.loads(b)
+    except orjson.JSONDecodeError:
+        # NaN and infinities, or an error worded as json.loads words it
+        return json.loads(b)
+    return json.loads(b) if _inexact(obj) else obj
+
+
+def _orjson_dumper(model: Type[BaseModel]) -> Dumps:
+    option = _orjson_option(model)
+    fallback = _compact_dumps(model)
+    if option is None:
+        return lambda data: fallback(data).encode()
+    dumps, encoder = orjson.dumps, model.__json_encoder__
+
+    def default(obj: Any) -> Any:
+        value = encoder(obj)
+        if _inexact(value):
+            raise TypeError("not encoded exactly by orjson")
+        return value
+
+    def encode(data: Any) -> bytes:
+        if _inexact(data):
+            return fallback(data).encode()
+        try:
+            return dumps(data, default=default, option=option)
+        except orjson.JSONEncodeError:
+            # big integers, non-string keys, or a TypeError from default
+            return fallback(data).encode()
+
+    return encode
+
+
+def _ujson_dumper(model: Type[BaseModel]) -> Dumps:
+    fallback = _compact_dumps(model)
+    dumps, default = ujson.dumps, model.__json_encoder__
+
+    def encode(data: Any) -> str:
+        try:
+            return dumps(
+                data,
+                default=default,
+                ensure_ascii=False,
+                escape_forward_slashes=False,
+            )
+        except (TypeError, OverflowError):
+            return fallback(data)
+
+    return encode
+
+
+register_backend(JsonBackend("json", json.loads, _json_dumper, priority=0))
+if ujson is not None:
+    register_backend(
+        JsonBackend("ujson", ujson.loads, _ujson_dumper, priority=10)
+    )
+if orjson is not None:
+    register_backend(
+        JsonBackend(
+            "orjson", _orjson_loads, _orjson_dumper, binary=True, priority=20
+        )
+    )
+
+
+def dumper(model: Type[BaseModel], backend: JsonBackend) -> Dumps:
+    """``backend.dumper(model)``, made once."""
+    key = (backend.name, model)
+    try:
+        return _dumpers[key]
+    except KeyError:
+        dumps = _dumpers[key] = backend.dumper(model)
+        return dumps
+
+
+class BackendModel(BaseModel):
+    """Base class for models encoded and decoded by a :class:`JsonBackend`
+    (``Config.json_backend``), returning bytes from ``.json()`` if
+    ``Config.json_bytes``."""
+
+    class Config:
+        json_backend: Optional[str] = None
+        json_bytes = False
+
+    def json(  # type: ignore[override]
+        self,
+        *,
+        include: Any = None,
+        exclude: Any = None,
+        by_alias: bool = False,
+        skip_defaults: Optional[bool] = None,
+        exclude_unset: bool = False,
+        exclude_defaults: bool = False,
+        exclude_none: bool = False,
+        encoder: Optional[Callable[[Any], Any]] = None,
+        models_as_dict: bool = True,
+        **dumps_kwargs: Any,
+    ) -> Union[str, bytes]:
+        """``.json()``, encoded by the configured backend."""
+        if encoder is not None or dumps_kwargs or skip_defaults is not None:
+            return super().json(
+                include=include,
+                exclude=exclude,
+                by_alias=by_alias,
+                skip_defaults=skip_defaults,
+                exclude_unset=exclude_unset,
+                exclude_defaults=exclude_defaults,
+                exclude_none=exclude_none,
+                encoder=encoder,
+                models_as_dict=models_as_dict,
+                **dumps_kwargs,
+            )
+        data = dict(
+            self._iter(
+                to_dict=models_as_dict,
+                by_alias=by_alias,
+                include=include,
+                exclude=exclude,
+                exclude_unset=exclude_unset,
+                exclude_defaults=exclude_defaults,
+                exclude_none=exclude_none,
+            )
+        )
+        if self.__custom_root_type__:
+            data = data[ROOT_KEY]
+        config = self.__config__
+        backend = get_backend(config.json_backend)
+        encoded = dumper(type(self), backend)(data)
+        if config.json_bytes:
+            return encoded if backend.binary else encoded.encode()
+        return encoded.decode() if backend.binary else encoded
+
+    @classmethod
+    def parse_raw(
+        cls,
+        b: Union[str, bytes],
+        *,
+        content_type: Optional[str] = None,
+        encoding: str = "utf8",
+        proto: Optional[Protocol] = None,
+        allow_pickle: bool = False,
+    ) -> Any:
+        """``parse_raw()``, decoding JSON with the configured backend."""
+        is_json = proto in (None, Protocol.json) and (
+            content_type is None
+            or content_type.endswith(("json", "javascript"))
+        )
+        if not is_json:
+            return super().parse_raw(
+                b,
+                content_type=content_type,
+                encoding=encoding,
+                proto=proto,
+                allow_pickle=allow_pickle,
+            )
+        backend = get_backend(cls.__config__.json_backend)
+        try:
+            if isinstance(b, bytes) and encoding.replace("-", "") != "utf8":
+                b = b.decode(encoding)
+            obj = backend.loads(b)
+        except (ValueError, TypeError, UnicodeDecodeError) as e:
+            raise ValidationError([ErrorWrapper(e, loc=ROOT_KEY)], cls)
+        return cls.parse_obj(obj)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # classes made by backend_model() share their name with the model
+        # they wrap, so they are pickled as a reference to that model
+        cls = type(self)
+        config = cls.__config__
+        return (
+            _reconstruct,
+            (
+                cls.__dict__.get("__backend_of__", cls),
+                config.json_backend,
+                config.json_bytes,
+            ),
+            self.__getstate__(),
+        )
+
+
+_backend_models: Dict[
+    Tuple[Type[BaseModel], Optional[str], bool], Type[BaseModel]
+] = {}
+
+
+def _reconstruct(
+    model: Type[BaseModel], backend: Optional[str], json_bytes: bool
+) -> BaseModel:
+    cls = backend_model(model, backend, json_bytes=json_bytes)
+    return cls.__new__(cls)
+
+
+def backend_model(
+    model: Type[BaseModel],
+    backend: Optional[str] = None,
+    *,
+    json_bytes: bool = False,
+) -> Type[BaseModel]:
+    """A subclass of ``model`` encoded and decoded by ``backend`` (the default
+    one if None)."""
+    model = model.__dict__.get("__backend_of__", model)
+    key = (model, backend, json_bytes)
+    try:
+        return _backend_models[key]
+    except KeyError:
+        pass
+    config = type(
+        "Config", (), {"json_backend": backend, "json_bytes": json_bytes}
+    )
+    cls = _backend_models[key] = type(model)(
+        model.__name__,
+        (model, BackendModel),
+        {
+            "__module__": model.__module__,
+            "__qualname__": model.__qualname__,
+            "Config": config,
+            "__backend_of__": model,
+            # or the schema would describe the model with our docstring
+            "__doc__": inspect.getdoc(model) or "",
+        },
+    )
+    return cls
+
+
+def rank_backends(
+    sample: BaseModel, number: int = 200
+) -> List[Tuple[JsonBackend, float]]:
+    """The registered backends and the seconds each takes to encode and decode
+    ``sample`` ``number`` times, fastest first."""
+    model = type(sample)
+    data = sample.dict()
+    timings = []
+    for backend in available_backends():
+        dumps, loads = dumper(model, backend), backend.loads
+        try:
+            encoded = dumps(data)
+            loads(encoded)
+        except (TypeError, ValueError):
+            continue
+        seconds = min(
+            timeit.repeat(lambda: loads(dumps(data)), number=number, repeat=3)
+        )
+        timings.append((backend, seconds))
+    timings.sort(key=lambda item: item[1])
+    return timings
+
+
+def pick_backend(sample: BaseModel, number: int = 200) -> JsonBackend:
+    """The fastest backend for models shaped like ``sample``."""
+    ranking = rank_backends(sample, number)
+    return ranking[0][0] if ranking else get_backend("json")
@@ -0,0 +1,20 @@
+"""Benchmarks for the example models.
+
+Run ``python -m practical_pydantic.bench examples -o results.json`` to
+measure validations/sec, dumps/sec and peak RSS for every model defined
+in the topic directories, and ``python -m practical_pydantic.bench
+compare old.json new.json`` to diff two runs.
+"""
+
+from practical_pydantic.bench.example_models import measure_model, run_examples
+from practical_pydantic.bench.payloads import payload_for
+from practical_pydantic.bench.results import BenchReport, BenchResult, compare
+
+__all__ = [
+    "BenchReport",
+    "BenchResult",
+    "compare",
+    "measure_model",
+    "payload_for",
+    "run_examples",
+]
@@ -0,0 +1,107 @@
+import argparse
+import sys
+from typing import List, Optional
+
+from practical_pydantic.bench import (
+    arrays,
+    backends,
+    binary,
+    cache,
+    columnar,
+    compact,
+    construct,
+    dispatch,
+    example_models,
+    factory,
+    getters,
+    lazy,
+    mapped,
+    masks,
+    memo,
+    orm,
+    parallel,
+    serializer,
+    sharing,
+    specialisations,
+    streaming,
+    unions,
+    xml_streaming,
+)
+from practical_pydantic.bench.results import BenchReport, compare, format_table
+
+SUITES = {
+    example_models.SUITE: example_models,
+    serializer.SUITE: serializer,
+    masks.SUITE: masks,
+    streaming.SUITE: streaming,
+    parallel.SUITE: parallel,
+    construct.SUITE: construct,
+    cache.SUITE: cache,
+    dispatch.SUITE: dispatch,
+    unions.SUITE: unions,
+    columnar.SUITE: columnar,
+    compact.SUITE: compact,
+    arrays.SUITE: arrays,
+    lazy.SUITE: lazy,
+    sharing.SUITE: sharing,
+    memo.SUITE: memo,
+    binary.SUITE: binary,
+    mapped.SUITE: mapped,
+    backends.SUITE: backends,
+    orm.SUITE: orm,
+    getters.SUITE: getters,
+    xml_streaming.SUITE: xml_streaming,
+    specialisations.SUITE: specialisations,
+    factory.SUITE: factory,
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m practical_pydantic.bench",
+        description="Throughput and memory benchmarks for the examples.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, suite in SUITES.items():
+        sub = commands.add_parser(name, help=suite.__doc__)
+        sub.add_argument(
+            "-n",
+            "--number",
+            type=int,
+            default=1000,
+            help="calls per timing run (best of three runs is kept)",
+        )
+        sub.add_argument(
+            "-o", "--output", help="write the results to this JSON file"
+        )
+        suite.add_arguments(sub)
+
+    diff = commands.add_parser(
+        "compare", help="compare two JSON results files"
+    )
+    diff.add_argument("old")
+    diff.add_argument("new")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if args.command == "compare":
+        old, new = BenchReport.read(args.old), BenchReport.read(args.new)
+        for suite, name, metric, before, after, ratio in compare(old, new):
+            print(
+                f"{suite}  {name}  {metric}: "
+                f"{before:,.0f} -> {after:,.0f} ({ratio:.2f}x)"
+            )
+        return 0
+
+    report = BenchReport(results=SUITES[args.command].run(args))
+    print(format_table(report.results))
+    if args.output:
+        report.write(args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""``ModelArray`` against a list of models from ``parse_obj_as``."""
+
+import argparse
+from typing import List
+
+from pydantic import parse_obj_as
+
+from practical_pydantic import columnar
+from practical_pydantic.bench.memory import traced_bytes
+from practical_pydantic.bench.results import BenchResult
+from practical_pydantic.bench.timing import ops_per_sec
+from practical_pydantic.examples import load_model
+
+SUITE = "arrays"
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--rows", type=int, default=100_000, help="rows per batch"
+    )
+
+
+def run(args: argparse.Namespace) -> List[BenchResult]:
+    return run_arrays(rows=args.rows)
+
+
+def run_arrays(rows: int = 100_000) -> List[BenchResult]:
+    if columnar.np is None:
+        return [BenchResult(suite=SUITE, name="Item", skipped="needs numpy")]
+    from practical_pydantic.arrays import ModelArray
+
+    item = load_model("models", "parsing-data", "Item")
+    data = [{"id": i, "name": f"item {i % 1000}"} for i in range(rows)]
+    array = ModelArray[item].parse_obj(data)
+    models = parse_obj_as(List[item], data)
+    if list(array) != models:
+        return [BenchResult(suite=SUITE, name="Item", skipped="mismatch")]
+    metrics = {
+        "list_bytes_per_row": traced_bytes(
+            lambda: parse_obj_as(List[item], data)
+        )
+        / rows,
+        "array_bytes_per_row": traced_bytes(
+            lambda: ModelArray[item].parse_obj(data)
+        )
+        / rows,
+        "list_parse_rows_per_sec": ops_per_sec(
+            lambda: parse_obj_as(List[item], data), 1
+        )
+        * rows,
+        "array_parse_rows_per_sec": ops_per_sec(
+            lambda: ModelArray[item].parse_obj(data), 1
+        )
+        * rows,
+        "list_iter_rows_per_sec": ops_per_sec(
+            lambda: [m.id for m in models], 1
+        )
+        * rows,
+        "array_iter_rows_per_sec": ops_per_sec(
+            lambda: [m.id for m in array], 1
+        )
+        * rows,
+    }
+    return [BenchResult(suite=SUITE, name="Item", metrics=metrics)]
@@ -0,0 +1,57 @@
+"""``.json()`` and ``parse_raw()`` with each registered JSON backend."""
+
+import argparse
+import json
+from typing import List
+
+from practical_pydantic.backends import available_backends, backend_model
+from practical_pydantic.bench.payloads import payload_for
+from practical_pydantic.bench.results import BenchResult
+from practical_pydantic.bench.timing import ops_per_sec
+from practical_pydantic.examples import load_model
+
+SUITE = "backends"
+
+CASES = [
+    ("export-models", "model-json", "WithCustomEncoders"),
+    ("models", "recursive-models", "Foo"),
+    ("field-types", "datetime-types", "Model"),
+    ("models", "custom-root-types", "Pets"),
+]
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    pass
+
+
+def run(args: argparse.Namespace) -> List[BenchResult]:
+    return run_backends(number=args.number)
+
+
+def run_backends(number: int = 1000) -> List[BenchResult]:
+    results = []
+    for topic, script, name in CASES:
+        model = load_model(topic, script, name)
+        data = payload_for(model, seed=0)
+        plain = model.parse_obj(data)
+        raw = plain.json()
+        metrics = {
+            "json_per_sec": ops_per_sec(plain.json, number),
+            "parse_raw_per_sec": ops_per_sec(
+                lambda: model.parse_raw(raw), number
+            ),
+        }
+        for backend in available_backends():
+            fast = backend_model(model, backend.name, json_bytes=True)
+            m = fast.parse_obj(data)
+            encoded = m.json()
+            if json.loads(encoded) != json.loads(raw):
+                continue
+            metrics[f"{backend.name}_json_per_sec"] = ops_per_sec(
+                m.json, number
+            )
+            metrics[f"{backend.name}_parse_raw_per_sec"] = ops_per_sec(
+                lambda: fast.parse_raw(encoded), number
+            )
+        results.append(BenchResult(suite=SUITE, name=name, metrics=metrics))
+    return results
@@ -0,0 +1,84 @@
+"""Size and speed of ``to_bytes``/``from_bytes`` against pickle, orjson and
+``.json()``."""
+
+import argparse
+import pickle
+from typing import List
+
+from practical_pydantic.bench.payloads import payload_for
+from practical_pydantic.bench.results import BenchResult
+from practical_pydantic.bench.timing import ops_per_sec
+from practical_pydantic.binary import from_bytes, to_bytes
+from practical_pydantic.examples import load_model
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+SUITE = "binary"
+
+CASES = [
+    ("export-models", "pickle-dumps", "FooBarModel"),
+    ("models", "recursive-models", "Spam"),
+    ("export-models", "advanced-include-exclude", "ComplexUser"),
+    ("field-types", "datetime-types", "Model"),
+]
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    pass
+
+
+def run(args: argparse.Namespace) -> List[BenchResult]:
+    return run_binary(number=args.number)
+
+
+def run_binary(number: int = 1000) -> List[BenchResult]:
+    results = []
+    for topic, script, name in CASES:
+        model = load_model(topic, script, name)
+        m = model.parse_obj(payload_for(model, seed=0))
+        data = to_bytes(m)
+        if from_bytes(model, data) != m:
+            results.append(
+                BenchResult(suite=SUITE, name=name, skipped="model mismatch")
+            )
+            continue
+        pickled = pickle.dumps(m)
+        json_data = m.json()
+        metrics = {
+            "pickle_bytes": len(pickled),
+            "json_bytes": len(json_data.encode()),
+            "binary_bytes": len(data),
+            "pickle_dumps_per_sec": ops_per_sec(
+                lambda: pickle.dumps(m), number
+            ),
+            "json_per_sec": ops_per_sec(m.json, number),
+            "to_bytes_per_sec": ops_per_sec(lambda: to_bytes(m), number),
+            # pickle does not validate anything
+            "pickle_loads_per_sec": ops_per_sec(
+                lambda: pickle.loads(pickled), number
+            ),
+            "parse_raw_per_sec": ops_per_sec(
+                lambda: model.parse_raw(json_data), number
+            ),
+            "from_bytes_per_sec": ops_per_sec(
+                lambda: from_bytes(model, data), number
+            ),
+            "from_bytes_trusted_per_sec": ops_per_sec(
+                lambda: from_bytes(model, data, validate=False), number
+            ),
+        }
+        if orjson is not None:
+            orjson_data = orjson.dumps(m.dict(), default=m.__json_encoder__)
+            metrics["orjson_bytes"] = len(orjson_data)
+            metrics["orjson_per_sec"] = ops_per_sec(
+                lambda: orjson.dumps(m.dict(), default=m.__json_encoder__),
+                number,
+            )
+            metrics["orjson_parse_per_sec"] = ops_per_sec(
+                lambda: model.parse_obj(orjson.loads(orjson_data)), number
+            )
+        results.append(BenchResult(suite=SUITE, name=name, metrics=metrics))
+    return results
@@ -0,0 +1,82 @@
+"""``ValidationCache`` against plain ``parse_obj``/``parse_raw``."""
+
+import argparse
+import json
+import random
+from typing import List
+
+from practical_pydantic.bench.payloads import payload_for
+from practical_pydantic.bench.results import BenchResult
+from practical_pydantic.bench.timing import ops_per_sec
+from practical_pydantic.cache import ValidationCache
+from practical_pydantic.examples import load_model
+
+SUITE = "cache"
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--distinct",
+        type=int,
+        default=100,
+        help="number of distinct payloads cycled through",
+    )
+    parser.add_argument(
+        "--maxsize",
+        type=int,
+        default=1024,
+        help="cache size; below --distinct the cache starts evicting",
+    )
+
+
+def run(args: argparse.Namespace) -> List[BenchResult]:
+    return run_cache(
+        number=args.number, distinct=args.distinct, maxsize=args.maxsize
+    )
+
+
+def run_cache(
+    number: int = 1000, distinct: int = 100, maxsize: int = 1024
+) -> List[BenchResult]:
+    results = []
+    for script, name in [
+        ("advanced-include-exclude", "Country"),
+        ("advanced-include-exclude", "ComplexUser"),
+    ]:
+        model = load_model("export-models", script, name)
+        objs = [
+            model.parse_obj(payload_for(model, seed=seed)).dict()
+            for seed in range(distinct)
+        ]
+        raws = [json.dumps(obj, default=str).encode() for obj in objs]
+        # a skewed stream of requests, as for popular reference data
+        rng = random.Random(0)
+        stream = rng.choices(
+            range(distinct),
+            weights=[1 / (i + 1) for i in range(distinct)],
+            k=number,
+        )
+
+        def each(parse, inputs):
+            return lambda: [parse(inputs[i]) for i in stream]
+
+        cache = ValidationCache(model, maxsize=maxsize)
+        metrics = {
+            "parse_obj_per_sec": ops_per_sec(each(model.parse_obj, objs), 1)
+            * number,
+            "cached_parse_obj_per_sec": ops_per_sec(
+                each(cache.parse_obj, objs), 1
+            )
+            * number,
+            "parse_raw_per_sec": ops_per_sec(each(model.parse_raw, raws), 1)
+            * number,
+            "cached_parse_raw_per_sec": ops_per_sec(
+                each(cache.parse_raw, raws), 1
+            )
+            * number,
+        }
+        info = cache.cache_info()
+        metrics["hit_pct"] = 100 * info.hits / (info.hits + info.misses)
+        metrics["evictions"] = info.evictions
+        results.append(BenchResult(suite=SUITE, name=name, metrics=metrics))
+    return results
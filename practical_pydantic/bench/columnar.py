@@ -0,0 +1,116 @@
+"""Column-wise against row-by-row validation of constrained numbers, and export
+of model lists to columns."""
+
+import argparse
+from typing import List
+
+from pydantic import create_model
+
+from practical_pydantic import columnar
+from practical_pydantic.bench.payloads import payload_for
+from practical_pydantic.bench.results import BenchResult
+from practical_pydantic.bench.timing import ops_per_sec
+from practical_pydantic.examples import load_model
+
+SUITE = "columnar"
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=100_000,
+        help="rows per batch, one in a hundred of them invalid",
+    )
+
+
+def run(args: argparse.Namespace) -> List[BenchResult]:
+    return run_columnar(rows=args.rows)
+
+
+def run_columnar(rows: int = 100_000) -> List[BenchResult]:
+    if columnar.np is None:
+        return [
+            BenchResult(suite=SUITE, name="Numbers", skipped="needs numpy")
+        ]
+    constrained = load_model("field-types", "constrained-types", "Model")
+    # the int and float fields of Model, next to one ordinary string field
+    model = create_model(
+        "Numbers",
+        label=(str, ...),
+        **{
+            name: (field.outer_type_, ...)
+            for name, field in constrained.__fields__.items()
+            if name.endswith(("_int", "_float")) or name == "unit_interval"
+        },
+    )
+    distinct = [
+        dict(payload_for(model, seed=seed), label=str(seed))
+        for seed in range(min(rows, 1000))
+    ]
+    data = []
+    for i in range(rows):
+        row = dict(distinct[i % len(distinct)])
+        if i % 100 == 99:
+            row["big_int"] = 5
+        data.append(row)
+    columns = {key: [row[key] for row in data] for key in data[0]}
+
+    def scalar():
+        models = []
+        for row in data:
+            try:
+                models.append(model.parse_obj(row))
+            except ValueError:
+                models.append(None)
+        return models
+
+    by_rows = columnar.validate_columns(model, data)
+    if by_rows.models != scalar():
+        return [
+            BenchResult(suite=SUITE, name="Numbers", skipped="model mismatch")
+        ]
+    metrics = {
+        "scalar_rows_per_sec": ops_per_sec(scalar, 1) * rows,
+        "columnar_rows_per_sec": ops_per_sec(
+            lambda: columnar.validate_columns(model, data), 1
+        )
+        * rows,
+        "columnar_columns_per_sec": ops_per_sec(
+            lambda: columnar.validate_columns(model, columns), 1
+        )
+        * rows,
+    }
+    return [
+        BenchResult(suite=SUITE, name="Numbers", metrics=metrics),
+        _export(rows),
+    ]
+
+
+def _export(rows: int) -> BenchResult:
+    model = load_model(
+        "export-models", "advanced-include-exclude", "Transaction"
+    )
+    distinct = [
+        model.parse_obj(payload_for(model, seed=seed))
+        for seed in range(min(rows, 1000))
+    ]
+    models = [distinct[i % len(distinct)] for i in range(rows)]
+    exclude = {"user": {"password"}}
+
+    def transposed():
+        # .dict() per row, then turned into columns
+        dicts = [m.dict(exclude=exclude) for m in models]
+        columns = {key: [d[key] for d in dicts] for key in ("id", "value")}
+        for key in ("id", "username"):
+            columns[f"user.{key}"] = [d["user"][key] for d in dicts]
+        return columns
+
+    metrics = {
+        "dict_rows_per_sec": ops_per_sec(transposed, 1) * rows,
+        "to_columns_rows_per_sec": ops_per_sec(
+            lambda: columnar.to_columns(models, exclude=exclude), 1
+        )
+        * rows,
+    }
+    return BenchResult(suite=SUITE, name="Transaction:export", metrics=metrics)
@@ -0,0 +1,60 @@
+"""Memory and speed of compact against regular model instances."""
+
+import argparse
+from typing import List
+
+from practical_pydantic.bench.memory import traced_bytes
+from practical_pydantic.bench.results import BenchResult
+from practical_pydantic.bench.timing import ops_per_sec
+from practical_pydantic.compact import compact_model
+from practical_pydantic.examples import load_model
+
+SUITE = "compact"
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--items",
+        type=int,
+        default=100_000,
+        help="instances kept alive for the memory measurement",
+    )
+
+
+def run(args: argparse.Namespace) -> List[BenchResult]:
+    return run_compact(number=args.number, items=args.items)
+
+
+def run_compact(number: int = 1000, items: int = 100_000) -> List[BenchResult]:
+    results = []
+    for topic, script, name in [
+        ("models", "basic-model-usage", "User"),
+        ("export-models", "dict-model-iteration", "BarModel"),
+    ]:
+        model = load_model(topic, script, name)
+        data = [{"id": i, "whatever": i} for i in range(items)]
+        metrics = {}
+        for label, cls in [
+            ("regular", model),
+            ("compact", compact_model(model)),
+        ]:
+            instances = [cls.parse_obj(d) for d in data[:number]]
+            first = next(iter(cls.__fields__))
+            metrics[f"{label}_bytes_per_item"] = (
+                traced_bytes(lambda: [cls.parse_obj(d) for d in data]) / items
+            )
+            metrics[f"{label}_parse_per_sec"] = (
+                ops_per_sec(
+                    lambda: [cls.parse_obj(d) for d in data[:number]], 1
+                )
+                * number
+            )
+            metrics[f"{label}_getattr_per_sec"] = (
+                ops_per_sec(lambda: [getattr(m, first) for m in instances], 1)
+                * number
+            )
+            metrics[f"{label}_dict_per_sec"] = (
+                ops_per_sec(lambda: [m.dict() for m in instances], 1) * number
+            )
+        results.append(BenchResult(suite=SUITE, name=name, metrics=metrics))
+    return results
@@ -0,0 +1,67 @@
+"""``construct_deep`` against ``parse_obj`` on trusted nested payloads."""
+
+import argparse
+from typing import Any, List, Tuple, Type
+
+from pydantic import BaseModel
+
+from practical_pydantic.bench.payloads import payload_for
+from practical_pydantic.bench.results import BenchResult
+from practical_pydantic.bench.timing import ops_per_sec
+from practical_pydantic.construct import construct_deep
+from practical_pydantic.examples import load_model
+
+SUITE = "construct"
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=20,
+        help="nesting depth of the self-referencing Foo payload",
+    )
+
+
+def run(args: argparse.Namespace) -> List[BenchResult]:
+    return run_construct(number=args.number, depth=args.depth)
+
+
+def _cases(depth: int) -> List[Tuple[str, Type[BaseModel], Any]]:
+    spam = load_model("models", "recursive-models", "Spam")
+    user = load_model(
+        "export-models", "advanced-include-exclude", "ComplexUser"
+    )
+    foo = load_model("postponed-annotations", "postponed-annotations", "Foo")
+    chain = None
+    for i in range(depth):
+        chain = {"a": i, "b": chain}
+    cases = [
+        ("Spam", spam, payload_for(spam)),
+        ("ComplexUser", user, payload_for(user)),
+        (f"Foo[depth={depth}]", foo, chain),
+    ]
+    # trusted data is what we dumped ourselves, so already coerced
+    return [(name, m, m.parse_obj(data).dict()) for name, m, data in cases]
+
+
+def run_construct(number: int = 1000, depth: int = 20) -> List[BenchResult]:
+    results = []
+    for name, model, data in _cases(depth):
+        if construct_deep(model, data) != model.parse_obj(data):
+            results.append(
+                BenchResult(suite=SUITE, name=name, skipped="model mismatch")
+            )
+            continue
+        parse_rate = ops_per_sec(lambda: model.parse_obj(data), number)
+        deep_rate = ops_per_sec(lambda: construct_deep(model, data), number)
+        metrics = {
+            "parse_obj_per_sec": parse_rate,
+            "construct_per_sec": ops_per_sec(
+                lambda: model.construct(**data), number
+            ),
+            "construct_deep_per_sec": deep_rate,
+            "speedup": deep_rate / parse_rate,
+        }
+        results.append(BenchResult(suite=SUITE, name=name, metrics=metrics))
+    return results
@@ -0,0 +1,81 @@
+"""Discriminated against plain (try every member) union validation."""
+
+import argparse
+import warnings
+from typing import Any, List, Literal, Type, Union
+
+from pydantic import BaseModel, create_model
+
+from practical_pydantic.bench.results import BenchResult
+from practical_pydantic.bench.timing import ops_per_sec
+from practical_pydantic.dispatch import FieldArgumentWarning, discriminate
+from practical_pydantic.examples import load_model
+
+SUITE = "dispatch"
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--members",
+        type=int,
+        default=16,
+        help="members of the synthetic Union[Kind0, Kind1, ...]",
+    )
+
+
+def run(args: argparse.Namespace) -> List[BenchResult]:
+    return run_dispatch(number=args.number, members=args.members)
+
+
+def _synthetic(members: int) -> Type[BaseModel]:
+    kinds = [
+        create_model(
+            f"Kind{i}", kind=(Literal[f"kind{i}"], ...), value=(int, ...)
+        )
+        for i in range(members)
+    ]
+    return create_model("Synthetic", item=(Union[tuple(kinds)], ...))
+
+
+def run_dispatch(number: int = 1000, members: int = 16) -> List[BenchResult]:
+    meal = load_model("field-types", "literal-type", "Meal")
+    pet = load_model("field-types", "unions", "Pet")
+    cases: List[Any] = [
+        ("Meal:last", meal, {"dessert": {"kind": "icecream"}}),
+        (
+            "Pet:last",
+            pet,
+            {"pet": {"pet_type": "lizard", "scales": 1}, "n": 1},
+        ),
+        (
+            f"Synthetic[{members}]:last",
+            _synthetic(members),
+            {"item": {"kind": f"kind{members - 1}", "value": "1"}},
+        ),
+        (
+            f"Synthetic[{members}]:first",
+            _synthetic(members),
+            {"item": {"kind": "kind0", "value": "1"}},
+        ),
+    ]
+    results = []
+    for name, model, data in cases:
+        # fields are copied into subclasses, so this leaves model alone
+        dispatched = type(model)(model.__name__, (model,), {})
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", FieldArgumentWarning)
+            discriminate(dispatched, recursive=False)
+        if dispatched.parse_obj(data) != model.parse_obj(data):
+            results.append(
+                BenchResult(suite=SUITE, name=name, skipped="model mismatch")
+            )
+            continue
+        plain_rate = ops_per_sec(lambda: model.parse_obj(data), number)
+        rate = ops_per_sec(lambda: dispatched.parse_obj(data), number)
+        metrics = {
+            "union_per_sec": plain_rate,
+            "discriminated_per_sec": rate,
+            "speedup": rate / plain_rate,
+        }
+        results.append(BenchResult(suite=SUITE, name=name, metrics=metrics))
+    return results
@@ -0,0 +1,100 @@
+"""Run every model defined by the example scripts as a throughput workload."""
+
+import argparse
+from typing import List, Optional, Type
+
+from pydantic import BaseModel
+
+from practical_pydantic.bench.memory import (
+    current_rss_kb,
+    peak_rss_kb,
+    reset_peak_rss,
+)
+from practical_pydantic.bench.payloads import UnsupportedType, payload_for
+from practical_pydantic.bench.results import BenchResult
+from practical_pydantic.bench.timing import ops_per_sec
+from practical_pydantic.examples import TOPICS, load_examples
+
+SUITE = "examples"
+
+
+def measure_model(
+    model: Type[BaseModel],
+    name: str,
+    number: int = 1000,
+    batch: int = 10_000,
+    seed: int = 0,
+) -> BenchResult:
+    try:
+        payload = payload_for(model, seed=seed)
+    except UnsupportedType as e:
+        return BenchResult(suite=SUITE, name=name, skipped=str(e))
+
+    instance = model.parse_obj(payload)
+    metrics = {
+        "validations_per_sec": ops_per_sec(
+            lambda: model.parse_obj(payload), number
+        ),
+        "dicts_per_sec": ops_per_sec(instance.dict, number),
+    }
+    try:
+        metrics["dumps_per_sec"] = ops_per_sec(instance.json, number)
+    except (TypeError, ValueError) as e:
+        return BenchResult(
+            suite=SUITE, name=name, metrics=metrics, skipped=f"json: {e}"
+        )
+
+    before = current_rss_kb()
+    reset_peak_rss()
+    held = [model.parse_obj(payload) for _ in range(batch)]
+    metrics["peak_rss_kb"] = peak_rss_kb()
+    metrics["batch_rss_kb"] = max(current_rss_kb() - before, 0)
+    del held
+    return BenchResult(suite=SUITE, name=name, metrics=metrics)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--topic",
+        action="append",
+        choices=TOPICS,
+        help="topic directory to load (repeatable, default: all)",
+    )
+    parser.add_argument(
+        "-k",
+        dest="pattern",
+        help="only run models whose name contains this substring",
+    )
+    parser.add_argument(
+        "--batch",
+        type=int,
+        default=10_000,
+        help="instances held in memory for the RSS measurement",
+    )
+
+
+def run(args: argparse.Namespace) -> List[BenchResult]:
+    return run_examples(
+        topics=args.topic,
+        pattern=args.pattern,
+        number=args.number,
+        batch=args.batch,
+    )
+
+
+def run_examples(
+    topics: Optional[List[str]] = None,
+    pattern: Optional[str] = None,
+    number: int = 1000,
+    batch: int = 10_000,
+) -> List[BenchResult]:
+    results = []
+    for example in load_examples(topics):
+        for qualname, model in example.models.items():
+            name = f"{example.topic}/{example.path.stem}:{qualname}"
+            if pattern and pattern not in name:
+                continue
+            results.append(
+                measure_model(model, name, number=number, batch=batch)
+            )
+    return results
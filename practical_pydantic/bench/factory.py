@@ -0,0 +1,101 @@
+"""``create_model`` against ``ModelFactory`` for many tenant schemas."""
+
+import argparse
+import gc
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from pydantic import create_model, validator
+
+from practical_pydantic.bench.results import BenchResult
+from practical_pydantic.factory import ModelFactory, ModelSpec
+
+SUITE = "factory"
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--schemas",
+        type=int,
+        default=2000,
+        help="tenant schemas turned into models",
+    )
+    parser.add_argument(
+        "--distinct",
+        type=int,
+        default=200,
+        help="distinct schemas among them, for the duplicates case",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="threads for create_many",
+    )
+
+
+def run(args: argparse.Namespace) -> List[BenchResult]:
+    return run_factory(
+        schemas=args.schemas, distinct=args.distinct, workers=args.workers
+    )
+
+
+def _username_alphanumeric(cls: Any, v: str) -> str:
+    # as in models/dynamic-model-creation.py
+    assert v.isalnum(), "must be alphanumeric"
+    return v
+
+
+_validators = {
+    "username_validator": validator("username", allow_reuse=True)(
+        _username_alphanumeric
+    )
+}
+
+
+def _spec(i: int) -> ModelSpec:
+    fields: Dict[str, Any] = {
+        "username": (str, ...),
+        "email": (Optional[str], None),
+        "tags": (List[str], []),
+        "score": 1.5,
+        "active": True,
+        "__validators__": _validators,
+    }
+    for j in range(10):
+        fields[f"field{j}"] = (int, i + j)
+    return f"Tenant{i}Model", fields
+
+
+def _rate(count: int, func: Callable[[], List[Any]]) -> float:
+    gc.collect()
+    start = time.perf_counter()
+    assert len(func()) == count
+    return count / (time.perf_counter() - start)
+
+
+def run_factory(
+    schemas: int = 2000, distinct: int = 200, workers: int = 4
+) -> List[BenchResult]:
+    unique = [_spec(i) for i in range(schemas)]
+    repeated = [_spec(i % distinct) for i in range(schemas)]
+    results = []
+    for name, specs in [("unique", unique), ("duplicates", repeated)]:
+        factory = ModelFactory()
+        metrics = {
+            "create_model_per_sec": _rate(
+                schemas, lambda: [create_model(n, **kw) for n, kw in specs]
+            ),
+            "factory_per_sec": _rate(
+                schemas, lambda: factory.create_many(specs)
+            ),
+            "threads_per_sec": _rate(
+                schemas,
+                lambda: ModelFactory().create_many(specs, workers=workers),
+            ),
+        }
+        builds = [b.seconds for b in factory.builds]
+        metrics["mean_build_ms"] = sum(builds) / len(builds) * 1000
+        metrics["max_build_ms"] = max(builds) * 1000
+        results.append(BenchResult(suite=SUITE, name=name, metrics=metrics))
+    return results
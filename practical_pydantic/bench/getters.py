@@ -0,0 +1,90 @@
+"""The ``UserGetter`` of ``models/orm-mode.py`` against a compiled
+``xml_getter``, one element at a time and in bulk."""
+
+import argparse
+import gc
+import time
+from typing import Any, Callable, List, Optional
+from xml.etree.ElementTree import fromstring
+
+from pydantic import BaseModel
+
+from practical_pydantic.bench.results import BenchResult
+from practical_pydantic.examples import load_model
+from practical_pydantic.getters import child_attr, iter_elements, xml_getter
+from practical_pydantic.orm import from_orm_many
+
+SUITE = "getters"
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--elements",
+        type=int,
+        default=100_000,
+        help="<User> elements in the document",
+    )
+
+
+def run(args: argparse.Namespace) -> List[BenchResult]:
+    return run_getters(elements=args.elements)
+
+
+class User(BaseModel):
+    Id: int
+    Status: Optional[str]
+    FirstName: Optional[str]
+    LastName: Optional[str]
+    LoggedIn: bool
+
+    class Config:
+        orm_mode = True
+        getter_dict = xml_getter(
+            FirstName=child_attr("FirstName", "Value"),
+            LastName=child_attr("LastName", "Value"),
+            LoggedIn=child_attr("LoggedIn", "Value"),
+        )
+
+
+def _document(elements: int) -> str:
+    users = "".join(
+        f'<User Id="{i}" Status="active">'
+        f'<FirstName Value="First{i}" />'
+        + (f'<LastName Value="Last{i}" />' if i % 3 else "")
+        + f'<LoggedIn Value="{("false", "true")[i % 2]}" />'
+        "</User>"
+        for i in range(elements)
+    )
+    return f"<Users>{users}</Users>"
+
+
+def _rate(elements: int, func: Callable[[], List[Any]]) -> float:
+    gc.collect()
+    start = time.perf_counter()
+    assert len(func()) == elements
+    return elements / (time.perf_counter() - start)
+
+
+def run_getters(elements: int = 100_000) -> List[BenchResult]:
+    reference = load_model("models", "orm-mode", "User")
+    root = fromstring(_document(elements))
+    users = list(root.iter("User"))
+    expected = [reference.from_orm(e).dict() for e in users[:1000]]
+    got = from_orm_many(User, iter_elements(root, "User"))
+    if [m.dict() for m in got[:1000]] != expected:
+        return [BenchResult(suite=SUITE, name="User", skipped="mismatch")]
+    del got
+
+    metrics = {
+        "UserGetter_per_sec": _rate(
+            elements, lambda: [reference.from_orm(e) for e in users]
+        ),
+        "compiled_per_sec": _rate(
+            elements, lambda: [User.from_orm(e) for e in users]
+        ),
+        "many_per_sec": _rate(
+            elements,
+            lambda: from_orm_many(User, iter_elements(root, "User")),
+        ),
+    }
+    return [BenchResult(suite=SUITE, name="User", metrics=metrics)]
@@ -0,0 +1,60 @@
+"""Lazy against eager validation of nested models, reading one field."""
+
+import argparse
+from typing import List
+
+from practical_pydantic.bench.payloads import payload_for
+from practical_pydantic.bench.results import BenchResult
+from practical_pydantic.bench.timing import ops_per_sec
+from practical_pydantic.examples import load_model
+from practical_pydantic.lazy import lazy_model
+
+SUITE = "lazy"
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--hobbies",
+        type=int,
+        default=100,
+        help="hobbies in the ComplexUser payload",
+    )
+
+
+def run(args: argparse.Namespace) -> List[BenchResult]:
+    return run_lazy(number=args.number, hobbies=args.hobbies)
+
+
+def run_lazy(number: int = 1000, hobbies: int = 100) -> List[BenchResult]:
+    results = []
+    complex_user = load_model(
+        "export-models", "advanced-include-exclude", "ComplexUser"
+    )
+    payload = payload_for(complex_user, seed=0)
+    payload["hobbies"] = [
+        {"name": f"hobby {i}", "info": "..."} for i in range(hobbies)
+    ]
+    spam = load_model("models", "recursive-models", "Spam")
+    for name, model, data, field in [
+        (f"ComplexUser[{hobbies}]", complex_user, payload, "first_name"),
+        ("Spam", spam, payload_for(spam, seed=0), "foo"),
+    ]:
+        lazy = lazy_model(model)
+        if lazy(**data) != model(**data):
+            results.append(
+                BenchResult(suite=SUITE, name=name, skipped="model mismatch")
+            )
+            continue
+        metrics = {
+            "eager_per_sec": ops_per_sec(
+                lambda: getattr(model(**data), field), number
+            ),
+            "lazy_per_sec": ops_per_sec(
+                lambda: getattr(lazy(**data), field), number
+            ),
+            "lazy_validate_all_per_sec": ops_per_sec(
+                lambda: lazy(**data).validate_all(), number
+            ),
+        }
+        results.append(BenchResult(suite=SUITE, name=name, metrics=metrics))
+    return results
@@ -0,0 +1,82 @@
+"""Parsing large JSON files through mmap against ``parse_file_as``."""
+
+import argparse
+import json
+import tempfile
+from pathlib import Path
+from typing import Callable, Iterator, List
+
+from pydantic import BaseModel
+from pydantic import parse_file_as as pydantic_parse_file_as
+
+from practical_pydantic.bench.results import BenchResult
+from practical_pydantic.bench.streaming import _measure
+from practical_pydantic.examples import load_model
+from practical_pydantic.mapped import buffer_loads, open_buffer, parse_file_as
+from practical_pydantic.streaming import iter_parse, write_json
+
+SUITE = "mapped"
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--megabytes",
+        type=int,
+        default=100,
+        help="size of the JSON array of Item models",
+    )
+
+
+def run(args: argparse.Namespace) -> List[BenchResult]:
+    return run_mapped(megabytes=args.megabytes)
+
+
+def run_mapped(megabytes: int = 100) -> List[BenchResult]:
+    item = load_model("models", "parsing-data", "Item")
+    name = "x" * 80
+    # about 100 bytes per item
+    items = megabytes * 10_000
+
+    def produce() -> Iterator[BaseModel]:
+        for i in range(items):
+            yield item.construct(id=i, name=name)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "items.json"
+        with path.open("wb") as f:
+            write_json(produce(), f)
+
+        def decode(use_mmap: bool) -> Callable[[], None]:
+            def run() -> None:
+                with open_buffer(path, use_mmap) as data:
+                    buffer_loads(data)
+
+            return run
+
+        def streamed(use_mmap: bool) -> Callable[[], None]:
+            def run() -> None:
+                for _ in iter_parse(
+                    item, path, loads=buffer_loads, use_mmap=use_mmap
+                ):
+                    pass
+
+            return run
+
+        benchmarks = {
+            # what parse_file does: bytes, then str, then json.loads
+            "decode:json_loads": lambda: json.loads(path.read_text()),
+            "decode:orjson_read": decode(use_mmap=False),
+            "decode:orjson_mmap": decode(use_mmap=True),
+            "parse:pydantic_parse_file_as": lambda: pydantic_parse_file_as(
+                List[item], path
+            ),
+            "parse:parse_file_as_mmap": lambda: parse_file_as(
+                List[item], path, loads=buffer_loads
+            ),
+            "parse:iter_parse_read": streamed(use_mmap=False),
+            "parse:iter_parse_mmap": streamed(use_mmap=True),
+        }
+        return [
+            BenchResult(suite=SUITE, name=name, metrics=_measure(func, items))
+            for name, func in benchmarks.items()
+        ]
@@ -0,0 +1,58 @@
+"""Precompiled masks against per-call include/exclude on ``ComplexUser``."""
+
+import argparse
+from typing import List
+
+from practical_pydantic.bench.results import BenchResult
+from practical_pydantic.bench.timing import ops_per_sec
+from practical_pydantic.examples import ROOT, load_example
+from practical_pydantic.masks import compile_mask
+
+SUITE = "masks"
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    pass
+
+
+def run(args: argparse.Namespace) -> List[BenchResult]:
+    return run_masks(number=args.number)
+
+
+def run_masks(number: int = 1000) -> List[BenchResult]:
+    example = load_example(
+        "export-models", ROOT / "export-models" / "advanced-include-exclude.py"
+    ).module
+    user = example.user
+    specs = {
+        "exclude_keys": {"exclude": example.exclude_keys},
+        "include_keys": {"include": example.include_keys},
+        "exclude_all_info": {"exclude": {"hobbies": {"__all__": {"info"}}}},
+        "include_nested": {
+            "include": {
+                "hobbies": {"__all__": {"info"}},
+                "address": {"country": {"phone_code"}},
+            }
+        },
+    }
+    results = []
+    for name, kwargs in specs.items():
+        mask = compile_mask(example.ComplexUser, **kwargs)
+        if mask.dict(user) != user.dict(**kwargs):
+            results.append(
+                BenchResult(suite=SUITE, name=name, skipped="dict mismatch")
+            )
+            continue
+        dict_rate = ops_per_sec(lambda: user.dict(**kwargs), number)
+        masked_rate = ops_per_sec(lambda: mask.dict(user), number)
+        metrics = {
+            "dict_per_sec": dict_rate,
+            "masked_dict_per_sec": masked_rate,
+            "json_per_sec": ops_per_sec(lambda: user.json(**kwargs), number),
+            "masked_json_per_sec": ops_per_sec(
+                lambda: mask.json(user), number
+            ),
+            "saved_ns_per_dict": 1e9 / dict_rate - 1e9 / masked_rate,
+        }
+        results.append(BenchResult(suite=SUITE, name=name, metrics=metrics))
+    return results
@@ -0,0 +1,63 @@
+"""Repeated ``dict()``/``json()``/``hash()`` of immutable models, with and
+without ``memo_model``."""
+
+import argparse
+from typing import Any, List
+
+from practical_pydantic.bench.payloads import payload_for
+from practical_pydantic.bench.results import BenchResult
+from practical_pydantic.bench.timing import ops_per_sec
+from practical_pydantic.cache import frozen_model
+from practical_pydantic.examples import load_model
+from practical_pydantic.memo import memo_model
+
+SUITE = "memo"
+
+CASES = [
+    ("models", "recursive-models", "Foo", False),
+    ("models", "faux-immutability", "FooBarModel", True),
+    ("field-types", "datetime-types", "Model", False),
+    ("models", "custom-root-types", "Pets", True),
+]
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    pass
+
+
+def run(args: argparse.Namespace) -> List[BenchResult]:
+    return run_memo(number=args.number)
+
+
+def _hash(m: Any) -> int:
+    # what pydantic's hash of a ``frozen = True`` model computes
+    return hash(type(m)) + hash(tuple(m.__dict__.values()))
+
+
+def run_memo(number: int = 1000) -> List[BenchResult]:
+    results = []
+    for topic, script, name, deep_freeze in CASES:
+        model = load_model(topic, script, name)
+        data = payload_for(model, seed=0)
+        plain = frozen_model(model).parse_obj(data)
+        memo = memo_model(model, deep_freeze=deep_freeze).parse_obj(data)
+        if memo.dict() != plain.dict() or memo.json() != plain.json():
+            results.append(
+                BenchResult(suite=SUITE, name=name, skipped="output mismatch")
+            )
+            continue
+        metrics = {
+            "dict_per_sec": ops_per_sec(plain.dict, number),
+            "memo_dict_per_sec": ops_per_sec(memo.dict, number),
+            "json_per_sec": ops_per_sec(plain.json, number),
+            "memo_json_per_sec": ops_per_sec(memo.json, number),
+            "memo_hash_per_sec": ops_per_sec(lambda: hash(memo), number),
+        }
+        try:
+            _hash(plain)
+        except TypeError:
+            pass
+        else:
+            metrics["hash_per_sec"] = ops_per_sec(lambda: _hash(plain), number)
+        results.append(BenchResult(suite=SUITE, name=name, metrics=metrics))
+    return results
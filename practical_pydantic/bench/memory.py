@@ -0,0 +1,65 @@
+"""Process memory readings.
+
+:func:`traced_bytes` measures what a workload keeps allocated, through
+:mod:`tracemalloc`, independently of the rest of the process.
+
+On Linux the peak resident set size (``VmHWM``) can be reset by writing
+``5`` to ``/proc/self/clear_refs``, which lets every workload report its
+own peak instead of the running maximum of the whole process. Elsewhere
+the process-wide maximum from :mod:`resource` is reported.
+"""
+
+import gc
+import resource
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+_STATUS = Path("/proc/self/status")
+_CLEAR_REFS = Path("/proc/self/clear_refs")
+
+
+def _status_kb(key: str) -> int:
+    for line in _STATUS.read_text().splitlines():
+        if line.startswith(key + ":"):
+            return int(line.split()[1])
+    raise KeyError(key)
+
+
+def current_rss_kb() -> int:
+    try:
+        return _status_kb("VmRSS")
+    except (OSError, KeyError):
+        return peak_rss_kb()
+
+
+def peak_rss_kb() -> int:
+    try:
+        return _status_kb("VmHWM")
+    except (OSError, KeyError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes on Linux
+        return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def reset_peak_rss() -> bool:
+    """Reset the peak RSS counter, returning whether that was possible."""
+    try:
+        _CLEAR_REFS.write_text("5")
+    except OSError:
+        return False
+    return True
+
+
+def traced_bytes(build: Callable[[], Any]) -> int:
+    """Bytes allocated by ``build()`` and still held by its result."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        kept = build()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del kept
+    return size
@@ -0,0 +1,187 @@
+"""``from_orm`` row by row against ``from_orm_many`` over a SQLite table."""
+
+import argparse
+import gc
+import os
+import tempfile
+import time
+from typing import Any, Callable, List
+
+from practical_pydantic.bench.results import BenchResult
+from practical_pydantic.examples import load_model
+from practical_pydantic.orm import from_orm_many
+
+try:
+    from sqlalchemy import (
+        JSON,
+        Column,
+        Float,
+        ForeignKey,
+        Integer,
+        String,
+        create_engine,
+        select,
+    )
+    from sqlalchemy.orm import (
+        Session,
+        declarative_base,
+        relationship,
+        selectinload,
+    )
+except ImportError:  # pragma: no cover
+    create_engine = None
+
+SUITE = "orm"
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=100_000,
+        help="rows in each table",
+    )
+
+
+def run(args: argparse.Namespace) -> List[BenchResult]:
+    return run_orm(rows=args.rows)
+
+
+def _tables() -> Any:
+    Base = declarative_base()
+
+    class CompanyOrm(Base):
+        # models/orm-mode.py's table, with JSON in place of a Postgres ARRAY
+        __tablename__ = "companies"
+        id = Column(Integer, primary_key=True, nullable=False)
+        public_key = Column(String(20), nullable=False, unique=True)
+        name = Column(String(63), unique=True)
+        domains = Column(JSON)
+
+    class PersonOrm(Base):
+        __tablename__ = "people"
+        id = Column(Integer, primary_key=True)
+        name = Column(String(63))
+        age = Column(Float)
+        pets = relationship("PetOrm")
+
+    class PetOrm(Base):
+        __tablename__ = "pets"
+        id = Column(Integer, primary_key=True)
+        owner_id = Column(Integer, ForeignKey("people.id"), index=True)
+        name = Column(String(63))
+        species = Column(String(63))
+
+    return Base, CompanyOrm, PersonOrm, PetOrm
+
+
+def _rate(rows: int, func: Callable[[], List[Any]]) -> float:
+    gc.collect()
+    start = time.perf_counter()
+    assert len(func()) == rows
+    return rows / (time.perf_counter() - start)
+
+
+def run_orm(rows: int = 100_000) -> List[BenchResult]:
+    if create_engine is None:  # pragma: no cover
+        return [BenchResult(suite=SUITE, name="orm", skipped="no sqlalchemy")]
+    company = load_model("models", "orm-mode", "CompanyModel")
+    person = load_model("models", "orm-mode", "Person")
+    Base, CompanyOrm, PersonOrm, PetOrm = _tables()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            session.bulk_insert_mappings(
+                CompanyOrm,
+                [
+                    {
+                        "id": i,
+                        "public_key": f"key{i}",
+                        "name": f"Company {i}",
+                        "domains": [f"c{i}.example.com", f"c{i}.com"],
+                    }
+                    for i in range(rows)
+                ],
+            )
+            session.bulk_insert_mappings(
+                PersonOrm,
+                [
+                    {"id": i, "name": f"Person {i}", "age": i % 90}
+                    for i in range(rows)
+                ],
+            )
+            session.bulk_insert_mappings(
+                PetOrm,
+                [
+                    {
+                        "owner_id": i // 2,
+                        "name": f"Pet {i}",
+                        "species": ("dog", "cat")[i % 2],
+                    }
+                    for i in range(rows * 2)
+                ],
+            )
+            session.commit()
+
+        with Session(engine) as session:
+            companies = session.scalars(select(CompanyOrm)).all()
+            tuples = session.execute(
+                select(
+                    CompanyOrm.id,
+                    CompanyOrm.public_key,
+                    CompanyOrm.name,
+                    CompanyOrm.domains,
+                )
+            ).all()
+            mappings = [row._mapping for row in tuples]
+            people = (
+                session.scalars(
+                    select(PersonOrm).options(selectinload(PersonOrm.pets))
+                )
+                .unique()
+                .all()
+            )
+            assert from_orm_many(company, tuples) == [
+                company.from_orm(c) for c in companies
+            ]
+            assert from_orm_many(person, people[:100]) == [
+                person.from_orm(p) for p in people[:100]
+            ]
+
+            cases = [
+                ("CompanyModel:entities", company, companies),
+                ("CompanyModel:rows", company, tuples),
+                ("Person:entities+pets", person, people),
+            ]
+            results = []
+            for name, model, source in cases:
+                results.append(
+                    BenchResult(
+                        suite=SUITE,
+                        name=name,
+                        metrics={
+                            "from_orm_rows_per_sec": _rate(
+                                rows,
+                                lambda: [model.from_orm(r) for r in source],
+                            ),
+                            "many_rows_per_sec": _rate(
+                                rows, lambda: from_orm_many(model, source)
+                            ),
+                        },
+                    )
+                )
+            results.append(
+                BenchResult(
+                    suite=SUITE,
+                    name="CompanyModel:mappings",
+                    metrics={
+                        "many_rows_per_sec": _rate(
+                            rows, lambda: from_orm_many(company, mappings)
+                        )
+                    },
+                )
+            )
+        engine.dispose()
+    return results
@@ -0,0 +1,65 @@
+"""Serial against process-pool validation of ``ComplexUser`` records."""
+
+import argparse
+import os
+import time
+from typing import List
+
+from practical_pydantic.bench.payloads import payload_for
+from practical_pydantic.bench.results import BenchResult
+from practical_pydantic.examples import load_model
+from practical_pydantic.parallel import validate_many
+
+SUITE = "parallel"
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--records",
+        type=int,
+        default=200_000,
+        help="number of records per batch",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="worker processes (default: one per CPU)",
+    )
+
+
+def run(args: argparse.Namespace) -> List[BenchResult]:
+    return run_parallel(records=args.records, workers=args.workers)
+
+
+def run_parallel(
+    records: int = 200_000, workers: int = None
+) -> List[BenchResult]:
+    model = load_model(
+        "export-models", "advanced-include-exclude", "ComplexUser"
+    )
+    samples = [payload_for(model, seed=seed) for seed in range(100)]
+    batch = [samples[i % len(samples)] for i in range(records)]
+
+    start = time.perf_counter()
+    models = [model.parse_obj(record) for record in batch]
+    serial = time.perf_counter() - start
+    del models
+
+    start = time.perf_counter()
+    result = validate_many(model, batch, workers=workers)
+    parallel = time.perf_counter() - start
+    assert len(result.models) == records and not result.errors
+
+    return [
+        BenchResult(
+            suite=SUITE,
+            name="ComplexUser:serial",
+            metrics={"records_per_sec": records / serial},
+        ),
+        BenchResult(
+            suite=SUITE,
+            name=f"ComplexUser:validate_many[{workers or os.cpu_count()}]",
+            metrics={"records_per_sec": records / parallel},
+        ),
+    ]
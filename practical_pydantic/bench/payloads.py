@@ -0,0 +1,303 @@
+"""Synthetic, realistic-looking input payloads generated from model fields."""
+
+import collections.abc
+import dataclasses
+import datetime
+import enum
+import inspect
+import json
+import random
+import sys
+import uuid
+from decimal import Decimal
+from ipaddress import IPv4Address, IPv6Address
+from pathlib import Path
+from typing import Any, Dict, ForwardRef, Type, TypeVar, Union
+
+from pydantic import (
+    AnyUrl,
+    BaseConfig,
+    BaseModel,
+    ByteSize,
+    ConstrainedBytes,
+    ConstrainedDecimal,
+    ConstrainedFloat,
+    ConstrainedInt,
+    ConstrainedList,
+    ConstrainedSet,
+    ConstrainedStr,
+    EmailStr,
+    NameEmail,
+    PaymentCardNumber,
+    PyObject,
+    SecretBytes,
+    SecretStr,
+    StrictBool,
+)
+from pydantic.color import Color
+from pydantic.json import pydantic_encoder
+from pydantic.types import Json, JsonWrapper
+from pydantic.typing import NoneType, evaluate_forwardref
+from typing_extensions import Annotated, Literal, get_args, get_origin
+
+WORDS = (
+    "apple",
+    "berlin",
+    "falcon",
+    "harbor",
+    "jasmine",
+    "lantern",
+    "meadow",
+    "orbit",
+    "pepper",
+    "quartz",
+    "river",
+    "summit",
+)
+
+# beyond this depth optional values become None and lists become empty,
+# which is what terminates self-referencing models
+SHALLOW_DEPTH = 3
+MAX_DEPTH = 8
+
+
+class UnsupportedType(TypeError):
+    pass
+
+
+def _bounded_number(tp, rng: random.Random, kind):
+    low = getattr(tp, "ge", None)
+    if getattr(tp, "gt", None) is not None:
+        low = tp.gt + (1 if kind is int else 0.5)
+    high = getattr(tp, "le", None)
+    if getattr(tp, "lt", None) is not None:
+        high = tp.lt - (1 if kind is int else 0.5)
+    if low is None and high is None:
+        low, high = 1, 1000
+    elif low is None:
+        low = high - 1000
+    elif high is None:
+        high = low + 1000
+    value = kind(rng.uniform(float(low), float(high)))
+    multiple_of = getattr(tp, "multiple_of", None)
+    if multiple_of:
+        value = kind(multiple_of) * kind(int(value / kind(multiple_of)))
+        if value < low:
+            value += kind(multiple_of)
+    return value
+
+
+class _Generator:
+    def __init__(self, rng: random.Random, namespace: Dict[str, Any]):
+        self.rng = rng
+        self.namespace = namespace
+
+    def text(self, config, min_length=None, max_length=None) -> str:
+        rng = self.rng
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+        min_length = min_length or config.min_anystr_length
+        max_length = max_length or config.max_anystr_length
+        while len(text) < (min_length or 0):
+            text += rng.choice(WORDS)
+        if max_length is not None:
+            text = text[:max_length]
+        return text
+
+    def scalar(self, tp, config):
+        rng = self.rng
+        if issubclass(tp, (bool, StrictBool)):
+            return rng.random() < 0.5
+        if issubclass(tp, enum.Enum):
+            return rng.choice(list(tp)).value
+        if issubclass(tp, ConstrainedInt):
+            return _bounded_number(tp, rng, int)
+        if issubclass(tp, ConstrainedFloat):
+            return _bounded_number(tp, rng, float)
+        if issubclass(tp, ConstrainedDecimal):
+            value = _bounded_number(tp, rng, float)
+            places = tp.decimal_places if tp.decimal_places is not None else 2
+            if tp.max_digits is not None:
+                places = min(places, tp.max_digits - 1)
+                value = value % 1
+            return round(Decimal(str(value)), places)
+        if issubclass(tp, ConstrainedStr):
+            if tp.regex is not None:
+                raise UnsupportedType(f"no generator for regex {tp.regex}")
+            return self.text(config, tp.min_length, tp.max_length)
+        if issubclass(tp, ConstrainedBytes):
+            return self.text(config, tp.min_length, tp.max_length).encode()
+        if issubclass(tp, ByteSize):
+            return f"{rng.randint(1, 512)} MiB"
+        if issubclass(tp, PaymentCardNumber):
+            return "4000000000000002"
+        if issubclass(tp, (EmailStr, NameEmail)):
+            return f"{rng.choice(WORDS)}@example.com"
+        if issubclass(tp, AnyUrl):
+            scheme = sorted(tp.allowed_schemes or {"https"})[0]
+            user = "bench@" if tp.user_required else ""
+            host = f"{rng.choice(WORDS)}.example.com"
+            return f"{scheme}://{user}{host}:8000/{rng.choice(WORDS)}"
+        if tp is PyObject:
+            return "math.cos"
+        if issubclass(tp, (SecretStr, str)):
+            return self.text(config)
+        if issubclass(tp, (SecretBytes, bytes)):
+            return self.text(config).encode()
+        if issubclass(tp, int):
+            return rng.randint(1, 100_000)
+        if issubclass(tp, (float, Decimal)):
+            return round(rng.uniform(0, 1000), 2)
+        if issubclass(tp, datetime.datetime):
+            return datetime.datetime(2023, 1, 1) + datetime.timedelta(
+                seconds=rng.randint(0, 10_000_000)
+            )
+        if issubclass(tp, datetime.date):
+            return datetime.date(2023, 1, 1) + datetime.timedelta(
+                days=rng.randint(0, 365)
+            )
+        if issubclass(tp, datetime.time):
+            return datetime.time(rng.randint(0, 23), rng.randint(0, 59))
+        if issubclass(tp, datetime.timedelta):
+            return datetime.timedelta(seconds=rng.randint(0, 100_000))
+        if issubclass(tp, uuid.UUID):
+            return uuid.UUID(int=rng.getrandbits(128), version=4)
+        if issubclass(tp, Color):
+            return rng.choice(("red", "#7fffd4", "rgb(0, 255, 255)"))
+        if issubclass(tp, IPv4Address):
+            return f"10.0.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+        if issubclass(tp, IPv6Address):
+            return "::1"
+        if issubclass(tp, Path):
+            return f"/tmp/{rng.choice(WORDS)}"
+        raise UnsupportedType(f"no generator for {tp!r}")
+
+    def value(self, tp, config, depth: int = 0) -> Any:
+        if depth > MAX_DEPTH:
+            raise UnsupportedType("annotation is nested too deeply")
+        rng = self.rng
+        if isinstance(tp, ForwardRef):
+            tp = evaluate_forwardref(tp, self.namespace, None)
+        if tp is Any or tp is object or isinstance(tp, TypeVar):
+            return self.text(config)
+        if tp is Json:
+            return json.dumps(self.text(config))
+        origin = get_origin(tp)
+        args = get_args(tp)
+        if origin is Annotated:
+            return self.value(args[0], config, depth)
+        if origin is Literal:
+            return rng.choice(args)
+        if origin is Union:
+            if depth >= SHALLOW_DEPTH and NoneType in args:
+                return None
+            for member in args:
+                if member is NoneType:
+                    continue
+                try:
+                    return self.value(member, config, depth + 1)
+                except UnsupportedType:
+                    continue
+            raise UnsupportedType(f"no usable member in {tp!r}")
+        if origin is type:
+            return args[0] if args and inspect.isclass(args[0]) else int
+        if tp is type:
+            return int
+        if (
+            origin is collections.abc.Callable
+            or tp is collections.abc.Callable
+        ):
+            return abs
+        if origin is not None and issubclass(origin, collections.abc.Mapping):
+            key, value = args if args else (str, str)
+            count = 0 if depth >= SHALLOW_DEPTH else rng.randint(1, 3)
+            return {
+                self.value(key, config, depth + 1): self.value(
+                    value, config, depth + 1
+                )
+                for _ in range(count)
+            }
+        if origin is not None and issubclass(origin, collections.abc.Iterable):
+            if origin is tuple and args and args[-1] is not Ellipsis:
+                return [self.value(arg, config, depth + 1) for arg in args]
+            count = 0 if depth >= SHALLOW_DEPTH else rng.randint(1, 3)
+            item = args[0] if args else str
+            return [self.value(item, config, depth + 1) for _ in range(count)]
+        if origin is not None:
+            raise UnsupportedType(f"no generator for {tp!r}")
+        if not inspect.isclass(tp):
+            raise UnsupportedType(f"no generator for {tp!r}")
+        if issubclass(tp, JsonWrapper):
+            inner = self.value(tp.inner_type, config, depth + 1)
+            return json.dumps(inner, default=pydantic_encoder)
+        if issubclass(tp, BaseModel):
+            return self.payload(tp, depth + 1)
+        if hasattr(tp, "__pydantic_model__"):
+            return self.payload(tp.__pydantic_model__, depth + 1)
+        if dataclasses.is_dataclass(tp):
+            hints = {f.name: f.type for f in dataclasses.fields(tp)}
+            return {
+                name: self.value(hint, config, depth + 1)
+                for name, hint in hints.items()
+            }
+        if issubclass(tp, (ConstrainedList, ConstrainedSet)):
+            count = max(tp.min_items or 1, 1)
+            if tp.max_items is not None:
+                count = min(count, tp.max_items)
+            return [self.value(tp.item_type, config, depth + 1)] * count
+        if tp in (list, set, tuple, frozenset):
+            return [self.text(config)]
+        if tp is dict:
+            return {rng.choice(WORDS): self.text(config)}
+        return self.scalar(tp, config)
+
+    def payload(self, model: Type[BaseModel], depth: int = 0) -> Any:
+        config = model.__config__
+        if model.__custom_root_type__:
+            root = model.__fields__["__root__"]
+            return self.value(root.outer_type_, config, depth)
+        return {
+            field.alias: self.value(field.outer_type_, config, depth)
+            for field in model.__fields__.values()
+            if field.required or depth < SHALLOW_DEPTH
+        }
+
+
+def generate_payload(
+    model: Type[BaseModel], rng: random.Random, depth: int = 0
+) -> Any:
+    """Generate a raw payload for ``model``, keyed by field alias."""
+    module = sys.modules.get(model.__module__)
+    namespace = dict(vars(module)) if module else {}
+    return _Generator(rng, namespace).payload(model, depth)
+
+
+def generate_value(
+    tp, rng: random.Random, config: Type[BaseConfig] = BaseConfig
+) -> Any:
+    """Generate a raw (pre-validation) value for the annotation ``tp``."""
+    return _Generator(rng, {}).value(tp, config)
+
+
+def payload_for(model: Type[BaseModel], seed: int = 0) -> Any:
+    """Return a payload that validates against ``model``.
+
+    A handful of candidates are tried because validators in the examples
+    can reject otherwise well-typed values; :class:`UnsupportedType` is
+    raised if none of them pass.
+    """
+    rng = random.Random(seed)
+    last_error = None
+    for _ in range(5):
+        try:
+            payload = generate_payload(model, rng)
+            model.parse_obj(payload)
+        except UnsupportedType:
+            raise
+        except Exception as e:
+            last_error = e
+            continue
+        return payload
+    reason = str(last_error).splitlines()
+    raise UnsupportedType(
+        f"no valid payload for {model.__name__}: {' '.join(reason)}"
+    )
@@ -0,0 +1,105 @@
+"""Benchmark result models and the JSON results file."""
+
+import platform
+import sys
+from datetime import datetime
+from importlib import metadata
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import pydantic
+from pydantic import BaseModel, Field
+
+PACKAGES = ("pydantic", "orjson", "ujson", "sqlalchemy", "numpy")
+
+
+def _version(package: str) -> Optional[str]:
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+class Environment(BaseModel):
+    python: str = Field(default_factory=platform.python_version)
+    implementation: str = Field(default_factory=platform.python_implementation)
+    platform: str = Field(default_factory=platform.platform)
+    pydantic_compiled: bool = pydantic.compiled
+    packages: Dict[str, Optional[str]] = Field(
+        default_factory=lambda: {name: _version(name) for name in PACKAGES}
+    )
+    argv: List[str] = Field(default_factory=lambda: list(sys.argv))
+    started: datetime = Field(default_factory=datetime.now)
+
+
+class BenchResult(BaseModel):
+    suite: str
+    name: str
+    metrics: Dict[str, float] = {}
+    skipped: Optional[str] = None
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return self.suite, self.name
+
+
+class BenchReport(BaseModel):
+    environment: Environment = Field(default_factory=Environment)
+    results: List[BenchResult] = []
+
+    def write(self, path: Union[str, Path]) -> None:
+        Path(path).write_text(self.json(indent=2))
+
+    @classmethod
+    def read(cls, path: Union[str, Path]) -> "BenchReport":
+        return cls.parse_file(path)
+
+
+def compare(
+    old: BenchReport, new: BenchReport
+) -> Iterator[Tuple[str, str, str, float, float, float]]:
+    """Yield ``(suite, name, metric, old, new, ratio)`` for every metric
+    present in both reports; ``ratio`` is ``new / old``."""
+    previous = {result.key: result for result in old.results}
+    for result in new.results:
+        before = previous.get(result.key)
+        if before is None:
+            continue
+        for metric, value in result.metrics.items():
+            if metric not in before.metrics:
+                continue
+            base = before.metrics[metric]
+            ratio = value / base if base else float("nan")
+            yield result.suite, result.name, metric, base, value, ratio
+
+
+def format_table(results: List[BenchResult]) -> str:
+    measured = [result for result in results if not result.skipped]
+    metrics = []
+    for result in measured:
+        for metric in result.metrics:
+            if metric not in metrics:
+                metrics.append(metric)
+    rows = [["suite", "name", *metrics]]
+    for result in measured:
+        rows.append(
+            [
+                result.suite,
+                result.name,
+                *(
+                    f"{result.metrics[m]:,.0f}" if m in result.metrics else "-"
+                    for m in metrics
+                ),
+            ]
+        )
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    lines = [
+        "  ".join(cell.ljust(width) for cell, width in zip(row, widths))
+        for row in rows
+    ]
+    for result in results:
+        if result.skipped:
+            lines.append(
+                f"{result.suite}  {result.name}  skipped: {result.skipped}"
+            )
+    return "\n".join(line.rstrip() for line in lines)
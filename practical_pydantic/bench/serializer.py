@@ -0,0 +1,62 @@
+"""Compiled serializers against ``.dict()``/``.json()`` on export shapes."""
+
+import argparse
+from typing import List
+
+from practical_pydantic.bench.payloads import payload_for
+from practical_pydantic.bench.results import BenchResult
+from practical_pydantic.bench.timing import ops_per_sec
+from practical_pydantic.examples import load_model
+from practical_pydantic.serializer import compile_dict, compile_json
+
+SUITE = "serializer"
+
+MODELS = (
+    ("export-models", "model-dict", "FooBarModel"),
+    ("export-models", "model-json", "FooBarModel"),
+    ("export-models", "model-json", "User"),
+    ("export-models", "advanced-include-exclude", "Transaction"),
+    ("export-models", "advanced-include-exclude", "ComplexUser"),
+    ("export-models", "advanced-include-exclude", "TransactionWithConfig"),
+    ("models", "recursive-models", "Spam"),
+)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    pass
+
+
+def run(args: argparse.Namespace) -> List[BenchResult]:
+    return run_serializer(number=args.number)
+
+
+def run_serializer(number: int = 1000) -> List[BenchResult]:
+    results = []
+    for topic, script, name in MODELS:
+        model = load_model(topic, script, name)
+        instance = model.parse_obj(payload_for(model))
+        to_dict = compile_dict(model)
+        to_json = compile_json(model)
+        label = f"{topic}/{script}:{name}"
+        if to_dict(instance) != instance.dict():
+            results.append(
+                BenchResult(suite=SUITE, name=label, skipped="dict mismatch")
+            )
+            continue
+        if to_json(instance) != instance.json():
+            results.append(
+                BenchResult(suite=SUITE, name=label, skipped="json mismatch")
+            )
+            continue
+        metrics = {
+            "dict_per_sec": ops_per_sec(instance.dict, number),
+            "compiled_dict_per_sec": ops_per_sec(
+                lambda: to_dict(instance), number
+            ),
+            "json_per_sec": ops_per_sec(instance.json, number),
+            "compiled_json_per_sec": ops_per_sec(
+                lambda: to_json(instance), number
+            ),
+        }
+        results.append(BenchResult(suite=SUITE, name=label, metrics=metrics))
+    return results
@@ -0,0 +1,86 @@
+"""``evolve`` against ``copy(update=..., deep=True)`` on a deep tree."""
+
+import argparse
+from typing import List, Optional
+
+from practical_pydantic.bench.results import BenchResult
+from practical_pydantic.bench.timing import ops_per_sec
+from practical_pydantic.sharing import PersistentModel, evolve
+
+SUITE = "sharing"
+
+
+class Leaf(PersistentModel):
+    name: str
+    values: List[int]
+
+
+class Node(PersistentModel):
+    a: int
+    leaves: List[Leaf]
+    b: Optional["Node"] = None
+
+
+Node.update_forward_refs()
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=20,
+        help="nesting depth of the self-referencing Node tree",
+    )
+
+
+def run(args: argparse.Namespace) -> List[BenchResult]:
+    return run_sharing(number=args.number, depth=args.depth)
+
+
+def _tree(depth: int) -> Node:
+    chain = None
+    for i in range(depth):
+        leaves = [
+            {"name": f"leaf {j}", "values": list(range(10))} for j in range(5)
+        ]
+        chain = {"a": i, "leaves": leaves, "b": chain}
+    return Node.parse_obj(chain)
+
+
+def run_sharing(number: int = 1000, depth: int = 20) -> List[BenchResult]:
+    results = []
+    tree = _tree(depth)
+    deepest = ".".join(["b"] * (depth - 1))
+    for name, path in [
+        ("top", "a"),
+        (f"depth={depth}", f"{deepest}.a" if deepest else "a"),
+    ]:
+        new = evolve(tree, {path: -1})
+        old, copy_path = tree, path.split(".")
+        for key in copy_path[:-1]:
+            old, new = getattr(old, key), getattr(new, key)
+        if getattr(new, copy_path[-1]) != -1 or new.leaves is not old.leaves:
+            results.append(
+                BenchResult(suite=SUITE, name=name, skipped="not shared")
+            )
+            continue
+        if path == "a":
+            # only top-level fields can be updated by copy()
+            copy_rate = ops_per_sec(
+                lambda: super(PersistentModel, tree).copy(
+                    update={"a": -1}, deep=True
+                ),
+                number,
+            )
+        else:
+            copy_rate = ops_per_sec(
+                lambda: super(PersistentModel, tree).copy(deep=True), number
+            )
+        evolve_rate = ops_per_sec(lambda: evolve(tree, {path: -1}), number)
+        metrics = {
+            "copy_deep_per_sec": copy_rate,
+            "evolve_per_sec": evolve_rate,
+            "speedup": evolve_rate / copy_rate,
+        }
+        results.append(BenchResult(suite=SUITE, name=name, metrics=metrics))
+    return results
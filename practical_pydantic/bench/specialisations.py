@@ -0,0 +1,92 @@
+"""Parametrising ``Response`` per tenant, with pydantic's cache of generic
+models and with a bounded ``SpecialisationCache``."""
+
+import argparse
+import gc
+import time
+import tracemalloc
+import weakref
+from typing import Any, Dict, List, Tuple, Type
+
+from pydantic import BaseModel, create_model
+
+from practical_pydantic.bench.results import BenchResult
+from practical_pydantic.bench.timing import ops_per_sec
+from practical_pydantic.examples import load_model
+from practical_pydantic.specialisations import install_cache, uninstall_cache
+
+SUITE = "specialisations"
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--tenants",
+        type=int,
+        default=1500,
+        help="distinct parametrisations, one data model per tenant",
+    )
+    parser.add_argument(
+        "--maxsize",
+        type=int,
+        default=256,
+        help="classes kept by the SpecialisationCache",
+    )
+
+
+def run(args: argparse.Namespace) -> List[BenchResult]:
+    return run_specialisations(
+        number=args.number, tenants=args.tenants, maxsize=args.maxsize
+    )
+
+
+def _churn(
+    response: Type[BaseModel], tenants: int
+) -> Tuple[float, int, float]:
+    """Seconds per new parametrisation, classes still alive afterwards, and the
+    bytes they keep."""
+    refs: List[Any] = []
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        for i in range(tenants):
+            data = create_model(f"Tenant{i}Data", value=(int, ...))
+            cls = response[data]
+            cls(data={"value": i})
+            refs.append(weakref.ref(cls))
+        seconds = (time.perf_counter() - start) / tenants
+        del data, cls
+        gc.collect()
+        kept = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return seconds, sum(ref() is not None for ref in refs), kept
+
+
+def run_specialisations(
+    number: int = 1000, tenants: int = 1500, maxsize: int = 256
+) -> List[BenchResult]:
+    response = load_model("models", "generic-models", "Response")
+    results = []
+    for name, bounded in [("pydantic", False), ("bounded", True)]:
+        if bounded:
+            cache = install_cache(maxsize)
+        try:
+            lookups = ops_per_sec(lambda: response[int], number)
+            seconds, alive, kept = _churn(response, tenants)
+            metrics: Dict[str, float] = {
+                "lookups_per_sec": lookups,
+                "build_ms": seconds * 1000,
+                "classes_alive": float(alive),
+                "kept_kb": kept / 1024,
+            }
+            if bounded:
+                info = cache.cache_info()
+                metrics["evictions"] = float(info.evictions)
+        finally:
+            if bounded:
+                uninstall_cache()
+        results.append(
+            BenchResult(suite=SUITE, name=f"Response:{name}", metrics=metrics)
+        )
+    return results
@@ -0,0 +1,92 @@
+"""Streaming JSON arrays of ``Item`` models against one-shot dump/parse."""
+
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Iterator, List
+
+from pydantic import BaseModel, parse_obj_as
+
+from practical_pydantic.bench.results import BenchResult
+from practical_pydantic.examples import load_model
+from practical_pydantic.streaming import iter_parse, write_json
+
+SUITE = "streaming"
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--items",
+        type=int,
+        default=200_000,
+        help="number of Item models per document",
+    )
+
+
+def run(args: argparse.Namespace) -> List[BenchResult]:
+    return run_streaming(items=args.items)
+
+
+def _measure(func: Callable[[], None], items: int) -> dict:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"items_per_sec": items / elapsed, "peak_traced_kb": peak / 1024}
+
+
+def run_streaming(items: int = 200_000) -> List[BenchResult]:
+    item = load_model("models", "parsing-data", "Item")
+
+    class Items(BaseModel):
+        __root__: List[item]
+
+    def produce() -> Iterator[BaseModel]:
+        # models arrive lazily, e.g. from a database cursor
+        for i in range(items):
+            yield item.construct(id=i, name=f"item {i}")
+
+    def one_shot_dump() -> None:
+        with tempfile.TemporaryFile("w") as f:
+            f.write(Items.construct(__root__=list(produce())).json())
+
+    def streamed_dump() -> None:
+        with tempfile.TemporaryFile("w") as f:
+            write_json(produce(), f)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        array = Path(tmp) / "items.json"
+        with array.open("w") as f:
+            write_json(produce(), f)
+        ndjson = Path(tmp) / "items.ndjson"
+        with ndjson.open("w") as f:
+            for m in produce():
+                f.write(m.json() + "\n")
+
+        def one_shot_parse() -> None:
+            parse_obj_as(List[item], json.loads(array.read_bytes()))
+
+        def streamed_parse(path: Path) -> Callable[[], None]:
+            def parse() -> None:
+                for _ in iter_parse(item, path):
+                    pass
+
+            return parse
+
+        benchmarks = {
+            "dump:root_model_json": one_shot_dump,
+            "dump:write_json": streamed_dump,
+            "parse:parse_obj_as": one_shot_parse,
+            "parse:iter_parse_array": streamed_parse(array),
+            "parse:iter_parse_ndjson": streamed_parse(ndjson),
+        }
+        return [
+            BenchResult(suite=SUITE, name=name, metrics=_measure(func, items))
+            for name, func in benchmarks.items()
+        ]
@@ -0,0 +1,11 @@
+import gc
+import timeit
+from typing import Callable
+
+
+def ops_per_sec(func: Callable[[], object], number: int, repeat: int = 3):
+    """Best-of-``repeat`` throughput of ``func`` in calls per second."""
+    timer = timeit.Timer(func)
+    gc.collect()
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return number / best if best else float("inf")
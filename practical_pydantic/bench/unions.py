@@ -0,0 +1,89 @@
+"""Pre-filtered against plain (try every member) union validation."""
+
+import argparse
+import uuid
+from typing import Any, List, Literal, Type, Union
+
+from pydantic import BaseModel, create_model
+
+from practical_pydantic.bench.results import BenchResult
+from practical_pydantic.bench.timing import ops_per_sec
+from practical_pydantic.examples import load_model
+from practical_pydantic.unions import prefilter_unions
+
+SUITE = "unions"
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--members",
+        type=int,
+        default=16,
+        help="members of the synthetic Union[Kind0, Kind1, ...]",
+    )
+
+
+def run(args: argparse.Namespace) -> List[BenchResult]:
+    return run_unions(number=args.number, members=args.members)
+
+
+def _wide(members: int) -> Type[BaseModel]:
+    kinds = [
+        create_model(
+            f"Kind{i}", kind=(Literal[f"kind{i}"], ...), value=(int, ...)
+        )
+        for i in range(members)
+    ]
+    return create_model("Wide", item=(Union[tuple(kinds)], ...))
+
+
+def run_unions(number: int = 1000, members: int = 16) -> List[BenchResult]:
+    right_user = load_model("field-types", "unions", "RightUser")
+    good_model = load_model("model-config", "smart-union", "GoodModel")
+    cases: List[Any] = [
+        (
+            "RightUser:str_id",
+            right_user,
+            {"id": "john", "name": "John Doe"},
+        ),
+        (
+            "RightUser:uuid_id",
+            right_user,
+            {"id": str(uuid.uuid4()), "name": "John Doe"},
+        ),
+        ("GoodModel:smart", good_model, {"x": 1, "y": {}}),
+        (
+            f"Wide[{members}]:last",
+            _wide(members),
+            {"item": {"kind": f"kind{members - 1}", "value": "1"}},
+        ),
+        (
+            f"Wide[{members}]:middle",
+            _wide(members),
+            {"item": {"kind": f"kind{members // 2}", "value": "1"}},
+        ),
+    ]
+    results = []
+    for name, model, data in cases:
+        # fields are copied into subclasses, so this leaves model alone
+        filtered = prefilter_unions(type(model)(model.__name__, (model,), {}))
+        counted = prefilter_unions(
+            type(model)(model.__name__, (model,), {}), instrument=True
+        )
+        if filtered.parse_obj(data) != model.parse_obj(data):
+            results.append(
+                BenchResult(suite=SUITE, name=name, skipped="model mismatch")
+            )
+            continue
+        plain_rate = ops_per_sec(lambda: model.parse_obj(data), number)
+        rate = ops_per_sec(lambda: filtered.parse_obj(data), number)
+        metrics = {
+            "union_per_sec": plain_rate,
+            "prefiltered_per_sec": rate,
+            "instrumented_per_sec": ops_per_sec(
+                lambda: counted.parse_obj(data), number
+            ),
+            "speedup": rate / plain_rate,
+        }
+        results.append(BenchResult(suite=SUITE, name=name, metrics=metrics))
+    return results
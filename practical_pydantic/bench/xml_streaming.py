@@ -0,0 +1,74 @@
+"""``fromstring`` of a whole XML document against ``iter_from_xml``."""
+
+import argparse
+import os
+import tempfile
+from pathlib import Path
+from typing import List
+from xml.etree.ElementTree import fromstring
+
+from practical_pydantic.bench.getters import User, _document
+from practical_pydantic.bench.results import BenchResult
+from practical_pydantic.bench.streaming import _measure
+from practical_pydantic.examples import load_model
+from practical_pydantic.xml_streaming import iter_from_xml
+
+SUITE = "xml_streaming"
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--elements",
+        type=int,
+        default=200_000,
+        help="<User> elements in the document",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="worker processes for the parallel run (default: one per CPU)",
+    )
+
+
+def run(args: argparse.Namespace) -> List[BenchResult]:
+    return run_xml_streaming(elements=args.elements, workers=args.workers)
+
+
+def run_xml_streaming(
+    elements: int = 200_000, workers: int = None
+) -> List[BenchResult]:
+    reference = load_model("models", "orm-mode", "User")
+    workers = workers or os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "users.xml"
+        path.write_text(_document(elements))
+
+        def whole_document() -> None:
+            root = fromstring(path.read_bytes())
+            for element in root.iter("User"):
+                reference.from_orm(element)
+
+        def stream(model: type, workers: int = 1) -> None:
+            for _ in iter_from_xml(model, path, "User", workers=workers):
+                pass
+
+        cases = [
+            ("fromstring+UserGetter", whole_document),
+            ("iter_from_xml[UserGetter]", lambda: stream(reference)),
+            ("iter_from_xml[xml_getter]", lambda: stream(User)),
+        ]
+        if workers > 1:
+            cases.append(
+                (
+                    f"iter_from_xml[xml_getter,{workers}]",
+                    lambda: stream(User, workers),
+                )
+            )
+        return [
+            BenchResult(
+                suite=SUITE, name=name, metrics=_measure(func, elements)
+            )
+            for name, func in cases
+        ]
@@ -0,0 +1,667 @@
+"""A compact binary encoding of models, driven by their fields.
+
+``pickle`` (``export-models/pickle-dumps.py``) stores class references and
+field names in every payload and runs arbitrary code when loading, and
+``parse_raw(..., allow_pickle=True)`` (``models/helper-functions.py``)
+hands that to whoever sends the bytes. Both ends of a connection already
+know the model, though, so :func:`to_bytes` writes only the values, in
+field order::
+
+    >>> data = to_bytes(user)
+    >>> from_bytes(User, data) == user
+    True
+
+Integers are zigzag varints, floats 8-byte doubles, strings and bytes
+length-prefixed, optional values flagged, lists, sets, tuples and dicts
+counted, and nested models written the same way in place; datetimes,
+``Decimal``, ``UUID`` and secrets have encodings of their own (secrets
+are written in clear, as pickle does, not masked as in ``.json()``), and
+values of any other type are written as JSON, encoded as ``.json()``
+would. Each model
+records its ``__fields_set__`` as a bitmask, and only declared fields are
+kept (extra fields are dropped, as ``ModelArray`` does).
+
+Payloads start with a fingerprint of the encoding of the model, field
+names and types included, so bytes written for a different version of a
+model fail with :class:`BinaryDecodeError` rather than decode into garbage.
+
+:func:`from_bytes` validates every model it decodes, innermost first, so
+it is as safe on untrusted input as ``parse_raw`` is; with
+``validate=False`` the decoded values are used as they are, apart from
+those (JSON-encoded values, enums, ...) that need the field's validation
+to get back their type. :class:`BinaryModel` adds both as methods.
+"""
+
+import hashlib
+import json
+import struct
+from collections import deque
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+)
+from uuid import UUID
+
+from pydantic import BaseModel, SecretBytes, SecretStr, ValidationError
+from pydantic.fields import (
+    SHAPE_DEQUE,
+    SHAPE_DICT,
+    SHAPE_FROZENSET,
+    SHAPE_LIST,
+    SHAPE_MAPPING,
+    SHAPE_SEQUENCE,
+    SHAPE_SET,
+    SHAPE_SINGLETON,
+    SHAPE_TUPLE,
+    SHAPE_TUPLE_ELLIPSIS,
+    ModelField,
+)
+from pydantic.types import (
+    ConstrainedBytes,
+    ConstrainedFloat,
+    ConstrainedInt,
+    ConstrainedStr,
+)
+
+MAGIC = b"PPB\x01"
+
+Buffer = Any  # bytes, bytearray, memoryview, mmap, ...
+Encoder = Callable[[Any, bytearray], None]
+Decoder = Callable[[Buffer, int, bool], Tuple[Any, int]]
+
+object_setattr = object.__setattr__
+_double = struct.Struct("<d")
+
+
+class BinaryDecodeError(ValueError):
+    """The bytes are not an encoding of the model: truncated, corrupt or
+    written for another version of it."""
+
+
+class _Codec:
+    """How to write and read the values of one field (or item type).
+
+    ``exact`` is False if the decoded values still need the field's
+    validation to have the right type; ``models`` are the model classes
+    written in place.
+    """
+
+    __slots__ = ("encode", "decode", "desc", "exact", "models")
+
+    def __init__(
+        self,
+        encode: Encoder,
+        decode: Decoder,
+        desc: str,
+        exact: bool = True,
+        models: FrozenSet[Type[BaseModel]] = frozenset(),
+    ):
+        self.encode = encode
+        self.decode = decode
+        self.desc = desc
+        self.exact = exact
+        self.models = models
+
+
+# varints
+
+
+def _write_uint(n: int, out: bytearray) -> None:
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_uint(buf: Buffer, pos: int) -> Tuple[int, int]:
+    b = buf[pos]
+    pos += 1
+    if b < 0x80:
+        return b, pos
+    result = b & 0x7F
+    shift = 7
+    while True:
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _read_span(buf: Buffer, pos: int) -> Tuple[int, int]:
+    n, pos = _read_uint(buf, pos)
+    end = pos + n
+    if end > len(buf):
+        raise IndexError("length past the end of the data")
+    return pos, end
+
+
+# scalars
+
+
+def _enc_bool(v: Any, out: bytearray) -> None:
+    out.append(1 if v else 0)
+
+
+def _dec_bool(buf: Buffer, pos: int, validate: bool) -> Tuple[Any, int]:
+    return buf[pos] != 0, pos + 1
+
+
+def _enc_int(v: Any, out: bytearray) -> None:
+    _write_uint(v << 1 if v >= 0 else (-v << 1) - 1, out)
+
+
+def _dec_int(buf: Buffer, pos: int, validate: bool) -> Tuple[Any, int]:
+    n, pos = _read_uint(buf, pos)
+    return (n >> 1) if not n & 1 else -((n + 1) >> 1), pos
+
+
+def _enc_float(v: Any, out: bytearray) -> None:
+    out += _double.pack(v)
+
+
+def _dec_float(buf: Buffer, pos: int, validate: bool) -> Tuple[Any, int]:
+    return _double.unpack_from(buf, pos)[0], pos + 8
+
+
+def _enc_str(v: Any, out: bytearray) -> None:
+    b = v.encode()
+    _write_uint(len(b), out)
+    out += b
+
+
+def _dec_str(buf: Buffer, pos: int, validate: bool) -> Tuple[Any, int]:
+    start, end = _read_span(buf, pos)
+    return str(buf[start:end], "utf-8"), end
+
+
+def _enc_bytes(v: Any, out: bytearray) -> None:
+    _write_uint(len(v), out)
+    out += v
+
+
+def _dec_bytes(buf: Buffer, pos: int, validate: bool) -> Tuple[Any, int]:
+    start, end = _read_span(buf, pos)
+    return bytes(buf[start:end]), end
+
+
+def _enc_isoformat(v: Any, out: bytearray) -> None:
+    _enc_str(v.isoformat(), out)
+
+
+def _dec_isoformat(tp: Type[Any]) -> Decoder:
+    def decode(buf: Buffer, pos: int, validate: bool) -> Tuple[Any, int]:
+        s, pos = _dec_str(buf, pos, validate)
+        try:
+            return tp.fromisoformat(s), pos
+        except ValueError as exc:
+            raise BinaryDecodeError(f"corrupt data: {exc}") from None
+
+    return decode
+
+
+def _enc_timedelta(v: Any, out: bytearray) -> None:
+    _enc_int(v.days, out)
+    _enc_int(v.seconds, out)
+    _enc_int(v.microseconds, out)
+
+
+def _dec_timedelta(buf: Buffer, pos: int, validate: bool) -> Tuple[Any, int]:
+    days, pos = _dec_int(buf, pos, validate)
+    seconds, pos = _dec_int(buf, pos, validate)
+    microseconds, pos = _dec_int(buf, pos, validate)
+    try:
+        return timedelta(days, seconds, microseconds), pos
+    except OverflowError as exc:
+        raise BinaryDecodeError(f"corrupt data: {exc}") from None
+
+
+def _enc_decimal(v: Any, out: bytearray) -> None:
+    _enc_str(str(v), out)
+
+
+def _dec_decimal(buf: Buffer, pos: int, validate: bool) -> Tuple[Any, int]:
+    s, pos = _dec_str(buf, pos, validate)
+    return Decimal(s), pos
+
+
+def _enc_uuid(v: Any, out: bytearray) -> None:
+    out += v.bytes
+
+
+def _dec_uuid(buf: Buffer, pos: int, validate: bool) -> Tuple[Any, int]:
+    end = pos + 16
+    if end > len(buf):
+        raise IndexError("UUID past the end of the data")
+    return UUID(bytes=bytes(buf[pos:end])), end
+
+
+def _enc_secret_str(v: Any, out: bytearray) -> None:
+    _enc_str(v.get_secret_value(), out)
+
+
+def _dec_secret_str(buf: Buffer, pos: int, validate: bool) -> Tuple[Any, int]:
+    s, pos = _dec_str(buf, pos, validate)
+    return SecretStr(s), pos
+
+
+def _enc_secret_bytes(v: Any, out: bytearray) -> None:
+    _enc_bytes(v.get_secret_value(), out)
+
+
+def _dec_secret_bytes(
+    buf: Buffer, pos: int, validate: bool
+) -> Tuple[Any, int]:
+    b, pos = _dec_bytes(buf, pos, validate)
+    return SecretBytes(b), pos
+
+
+# matched on the exact declared type of a field
+_SCALARS: List[Tuple[Type[Any], str, Encoder, Decoder]] = [
+    (bool, "bool", _enc_bool, _dec_bool),
+    (int, "int", _enc_int, _dec_int),
+    (float, "float", _enc_float, _dec_float),
+    (str, "str", _enc_str, _dec_str),
+    (bytes, "bytes", _enc_bytes, _dec_bytes),
+    (datetime, "datetime", _enc_isoformat, _dec_isoformat(datetime)),
+    (date, "date", _enc_isoformat, _dec_isoformat(date)),
+    (time, "time", _enc_isoformat, _dec_isoformat(time)),
+    (timedelta, "timedelta", _enc_timedelta, _dec_timedelta),
+    (Decimal, "decimal", _enc_decimal, _dec_decimal),
+    (UUID, "uuid", _enc_uuid, _dec_uuid),
+    (SecretStr, "secretstr", _enc_secret_str, _dec_secret_str),
+    (SecretBytes, "secretbytes", _enc_secret_bytes, _dec_secret_bytes),
+]
+# subclasses of these hold plain values of the base type once validated
+_CONSTRAINED = {
+    ConstrainedInt: int,
+    ConstrainedFloat: float,
+    ConstrainedStr: str,
+    ConstrainedBytes: bytes,
+}
+
+
+def _scalar(tp: Any) -> Optional[_Codec]:
+    if not isinstance(tp, type):
+        return None
+    for base, plain in _CONSTRAINED.items():
+        if issubclass(tp, base):
+            tp = plain
+    for scalar, desc, encode, decode in _SCALARS:
+        if tp is scalar:
+            return _Codec(encode, decode, desc)
+    return None
+
+
+# anything else goes through JSON
+
+
+def _json_codec(model: Type[BaseModel], parse: bool = True) -> _Codec:
+    """Values as JSON; left as the JSON string when decoding if not ``parse``,
+    for ``Json`` fields."""
+    dumps = json.JSONEncoder(
+        separators=(",", ":"), default=model.__json_encoder__
+    ).encode
+
+    def encode(v: Any, out: bytearray) -> None:
+        _enc_str(dumps(v), out)
+
+    def decode(buf: Buffer, pos: int, validate: bool) -> Tuple[Any, int]:
+        s, pos = _dec_str(buf, pos, validate)
+        return json.loads(s) if parse else s, pos
+
+    return _Codec(encode, decode, "json", exact=False)
+
+
+# containers
+
+
+def _optional(codec: _Codec) -> _Codec:
+    inner_encode, inner_decode = codec.encode, codec.decode
+
+    def encode(v: Any, out: bytearray) -> None:
+        if v is None:
+            out.append(0)
+        else:
+            out.append(1)
+            inner_encode(v, out)
+
+    def decode(buf: Buffer, pos: int, validate: bool) -> Tuple[Any, int]:
+        if buf[pos] == 0:
+            return None, pos + 1
+        return inner_decode(buf, pos + 1, validate)
+
+    return _Codec(encode, decode, f"?{codec.desc}", codec.exact, codec.models)
+
+
+def _sequence(codec: _Codec, make: Callable[[Any], Any], name: str) -> _Codec:
+    item_encode, item_decode = codec.encode, codec.decode
+
+    def encode(v: Any, out: bytearray) -> None:
+        _write_uint(len(v), out)
+        for item in v:
+            item_encode(item, out)
+
+    def decode(buf: Buffer, pos: int, validate: bool) -> Tuple[Any, int]:
+        n, pos = _read_uint(buf, pos)
+        items = []
+        append = items.append
+        for _ in range(n):
+            item, pos = item_decode(buf, pos, validate)
+            append(item)
+        return make(items), pos
+
+    return _Codec(
+        encode, decode, f"{name}[{codec.desc}]", codec.exact, codec.models
+    )
+
+
+def _fixed_tuple(codecs: List[_Codec]) -> _Codec:
+    def encode(v: Any, out: bytearray) -> None:
+        if len(v) != len(codecs):
+            raise ValueError(f"expected a tuple of {len(codecs)} items")
+        for codec, item in zip(codecs, v):
+            codec.encode(item, out)
+
+    def decode(buf: Buffer, pos: int, validate: bool) -> Tuple[Any, int]:
+        items = []
+        for codec in codecs:
+            item, pos = codec.decode(buf, pos, validate)
+            items.append(item)
+        return tuple(items), pos
+
+    return _Codec(
+        encode,
+        decode,
+        f"tuple[{','.join(codec.desc for codec in codecs)}]",
+        all(codec.exact for codec in codecs),
+        _models_of(codecs),
+    )
+
+
+def _mapping(keys: _Codec, values: _Codec) -> _Codec:
+    key_encode, key_decode = keys.encode, keys.decode
+    value_encode, value_decode = values.encode, values.decode
+
+    def encode(v: Any, out: bytearray) -> None:
+        _write_uint(len(v), out)
+        for key, value in v.items():
+            key_encode(key, out)
+            value_encode(value, out)
+
+    def decode(buf: Buffer, pos: int, validate: bool) -> Tuple[Any, int]:
+        n, pos = _read_uint(buf, pos)
+        d = {}
+        for _ in range(n):
+            key, pos = key_decode(buf, pos, validate)
+            d[key], pos = value_decode(buf, pos, validate)
+        return d, pos
+
+    return _Codec(
+        encode,
+        decode,
+        f"dict[{keys.desc},{values.desc}]",
+        keys.exact and values.exact,
+        _models_of([keys, values]),
+    )
+
+
+def _union(members: List[Tuple[Any, _Codec]], fallback: _Codec) -> _Codec:
+    types = [tp for tp, _ in members]
+
+    def encode(v: Any, out: bytearray) -> None:
+        t = type(v)
+        for i, tp in enumerate(types):
+            if t is tp:
+                out.append(i)
+                members[i][1].encode(v, out)
+                return
+        out.append(0xFF)
+        fallback.encode(v, out)
+
+    def decode(buf: Buffer, pos: int, validate: bool) -> Tuple[Any, int]:
+        tag = buf[pos]
+        codec = fallback if tag == 0xFF else members[tag][1]
+        return codec.decode(buf, pos + 1, validate)
+
+    codecs = [codec for _, codec in members]
+    # values that took the fallback need the union's validation
+    return _Codec(
+        encode,
+        decode,
+        f"union[{'|'.join(codec.desc for codec in codecs)}]",
+        False,
+        _models_of(codecs),
+    )
+
+
+_SEQUENCES: Dict[int, Tuple[Callable[[Any], Any], str]] = {
+    SHAPE_LIST: (list, "list"),
+    SHAPE_SEQUENCE: (list, "list"),
+    SHAPE_SET: (set, "set"),
+    SHAPE_FROZENSET: (frozenset, "frozenset"),
+    SHAPE_TUPLE_ELLIPSIS: (tuple, "tuple"),
+    SHAPE_DEQUE: (deque, "deque"),
+}
+
+
+def _field_codec(model: Type[BaseModel], field: ModelField) -> _Codec:
+    """The codec of the values of ``field`` (without its optionality)."""
+    if field.parse_json:
+        # validation expects the JSON string
+        return _json_codec(model, parse=False)
+    shape = field.shape
+    if shape in _SEQUENCES:
+        make, name = _SEQUENCES[shape]
+        item = _with_none(model, field.sub_fields[0])  # type: ignore[index]
+        codec = _sequence(item, make, name)
+        # the validated value of a Sequence field is not always a list
+        codec.exact = codec.exact and shape != SHAPE_SEQUENCE
+        return codec
+    if shape == SHAPE_TUPLE:
+        return _fixed_tuple(
+            [_with_none(model, sub) for sub in field.sub_fields or ()]
+        )
+    if shape in (SHAPE_DICT, SHAPE_MAPPING):
+        codec = _mapping(
+            _with_none(model, field.key_field),  # type: ignore[arg-type]
+            _with_none(model, field.sub_fields[0]),  # type: ignore[index]
+        )
+        codec.exact = codec.exact and shape == SHAPE_DICT
+        return codec
+    if shape != SHAPE_SINGLETON:
+        return _json_codec(model)
+    if field.sub_fields:
+        # a value is written with the codec of the member of its type
+        members = [
+            (sub.type_, _with_none(model, sub))
+            for sub in field.sub_fields
+            if sub.shape == SHAPE_SINGLETON
+            and not sub.sub_fields
+            and isinstance(sub.type_, type)
+        ]
+        return _union(members[:0xFF], _json_codec(model))
+    tp = field.type_
+    if isinstance(tp, type) and issubclass(tp, BaseModel):
+        return _model_codec(tp).codec
+    return _scalar(tp) or _json_codec(model)
+
+
+def _with_none(model: Type[BaseModel], field: ModelField) -> _Codec:
+    codec = _field_codec(model, field)
+    return _optional(codec) if field.allow_none else codec
+
+
+class _ModelCodec:
+    """Writes and reads the declared fields of ``model``, in order, after a
+    bitmask of the fields that were set."""
+
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self.fields: List[Tuple[str, str, ModelField, _Codec]] = []
+        self.bits = {name: 1 << i for i, name in enumerate(model.__fields__)}
+        self.codec = _Codec(
+            self.encode, self.decode, model.__name__, models=frozenset([model])
+        )
+
+    def compile(self) -> None:
+        self.fields = [
+            (name, field.alias, field, _with_none(self.model, field))
+            for name, field in self.model.__fields__.items()
+        ]
+
+    def describe(self) -> str:
+        """The encoding of the fields, with nested models by name."""
+        fields = ";".join(f"{name}:{c.desc}" for name, _, _, c in self.fields)
+        return f"{self.model.__name__}{{{fields}}}"
+
+    def encode(self, m: Any, out: bytearray) -> None:
+        bits = self.bits
+        mask = 0
+        for name in m.__fields_set__:
+            mask |= bits.get(name, 0)
+        _write_uint(mask, out)
+        d = m.__dict__
+        for name, _, _, codec in self.fields:
+            try:
+                value = d[name]
+            except KeyError:
+                raise ValueError(
+                    f"{self.model.__name__}.{name} has no value"
+                ) from None
+            codec.encode(value, out)
+
+    def decode(self, buf: Buffer, pos: int, validate: bool) -> Tuple[Any, int]:
+        mask, pos = _read_uint(buf, pos)
+        values = {}
+        for name, _, _, codec in self.fields:
+            values[name], pos = codec.decode(buf, pos, validate)
+        fields_set = {name for name, bit in self.bits.items() if mask & bit}
+        model = self.model
+        if validate:
+            m = model(
+                **{alias: values[name] for name, alias, _, _ in self.fields}
+            )
+        else:
+            errors = []
+            for name, _, field, codec in self.fields:
+                if not codec.exact:
+                    values[name], error = field.validate(
+                        values[name], values, loc=field.alias, cls=model
+                    )
+                    if error:
+                        errors.append(error)
+            if errors:
+                raise ValidationError(errors, model)
+            m = model.__new__(model)
+            object_setattr(m, "__dict__", values)
+            m._init_private_attributes()
+        object_setattr(m, "__fields_set__", fields_set)
+        return m, pos
+
+
+_models: Dict[Type[BaseModel], _ModelCodec] = {}
+_fingerprints: Dict[Type[BaseModel], bytes] = {}
+
+
+def _models_of(codecs: List[_Codec]) -> FrozenSet[Type[BaseModel]]:
+    return frozenset().union(*(codec.models for codec in codecs))
+
+
+def _model_codec(model: Type[BaseModel]) -> _ModelCodec:
+    try:
+        return _models[model]
+    except KeyError:
+        pass
+    # registered before compiling, for models that refer to themselves
+    codec = _models[model] = _ModelCodec(model)
+    try:
+        codec.compile()
+    except BaseException:
+        del _models[model]
+        raise
+    return codec
+
+
+def fingerprint(model: Type[BaseModel]) -> bytes:
+    """8 bytes that change whenever the encoding of ``model`` does."""
+    try:
+        return _fingerprints[model]
+    except KeyError:
+        pass
+    # the descriptions of every model that can be written in place
+    descs = []
+    seen: Set[Type[BaseModel]] = set()
+    todo = [model]
+    while todo:
+        current = todo.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        codec = _model_codec(current)
+        descs.append(codec.describe())
+        for _, _, _, field_codec in codec.fields:
+            todo.extend(field_codec.models)
+    # the model itself first, the others in a stable order
+    desc = "\n".join(descs[:1] + sorted(descs[1:]))
+    digest = hashlib.blake2b(desc.encode(), digest_size=8).digest()
+    _fingerprints[model] = digest
+    return digest
+
+
+def to_bytes(m: BaseModel) -> bytes:
+    """The binary encoding of ``m``, headed by its model's fingerprint."""
+    model = type(m)
+    out = bytearray(MAGIC)
+    out += fingerprint(model)
+    _model_codec(model).encode(m, out)
+    return bytes(out)
+
+
+def from_bytes(
+    model: Type[BaseModel], data: Buffer, *, validate: bool = True
+) -> BaseModel:
+    """Decode what :func:`to_bytes` wrote for an instance of ``model``."""
+    header = MAGIC + fingerprint(model)
+    start = len(header)
+    if bytes(data[:start]) != header:
+        if not bytes(data[:start]).startswith(MAGIC):
+            raise BinaryDecodeError("not a binary encoded model")
+        raise BinaryDecodeError(
+            f"the data was written for another version of {model.__name__}"
+        )
+    try:
+        m, pos = _model_codec(model).decode(data, start, validate)
+    except (
+        IndexError,
+        struct.error,
+        UnicodeDecodeError,
+        json.JSONDecodeError,
+        InvalidOperation,
+        RecursionError,
+    ) as exc:
+        raise BinaryDecodeError(f"corrupt data: {exc}") from None
+    if pos != len(data):
+        raise BinaryDecodeError("unexpected data after the model")
+    return m
+
+
+class BinaryModel(BaseModel):
+    """Base class adding :func:`to_bytes` and :func:`from_bytes` as methods."""
+
+    def to_bytes(self) -> bytes:
+        return to_bytes(self)
+
+    @classmethod
+    def from_bytes(cls, data: Buffer, *, validate: bool = True) -> Any:
+        return from_bytes(cls, data, validate=validate)
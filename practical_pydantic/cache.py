@@ -0,0 +1,247 @@
+"""Reuse validated instances for payloads that have been seen before.
+
+Configuration blobs and reference data such as
+``Country(name="USA", phone_code=1)`` tend to be validated over and over
+from identical input. A :class:`ValidationCache` keys the result of
+``parse_raw``/``parse_obj`` on a digest of the input, raw bytes for the
+former and a canonical JSON encoding of the object for the latter, and
+hands out the same instance on every hit::
+
+    >>> countries = ValidationCache(Country, maxsize=256, ttl=300)
+    >>> countries.parse_obj({"name": "USA", "phone_code": 1}) is \\
+    ...     countries.parse_obj({"phone_code": 1, "name": "USA"})
+    True
+
+Since the instance is shared, it has to be read-only. If ``model`` does not
+already set ``allow_mutation = False`` the cache validates into a subclass
+that does, as in ``models/faux-immutability.py``; as there, that only
+protects the attributes, and mutable values held in them (lists, dicts,
+nested models) must not be modified by callers.
+
+Payloads that fail validation are not cached, and neither are objects
+the canonical encoding could confuse with unequal ones: dicts with keys
+other than strings, tuples, and values other than the JSON types,
+``Decimal``, dates and times, ``UUID`` and secrets; those are validated every
+time.
+"""
+
+import dataclasses
+import datetime
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel, SecretBytes, SecretStr
+
+_frozen: Dict[Type[BaseModel], Type[BaseModel]] = {}
+
+
+def frozen_model(model: Type[BaseModel]) -> Type[BaseModel]:
+    """``model`` itself if it is immutable, otherwise a subclass of it with
+    ``allow_mutation = False``."""
+    if not model.__config__.allow_mutation or model.__config__.frozen:
+        return model
+    try:
+        return _frozen[model]
+    except KeyError:
+        pass
+
+    class Config:
+        allow_mutation = False
+
+    frozen = _frozen[model] = type(model)(
+        model.__name__,
+        (model,),
+        {"__module__": model.__module__, "Config": Config},
+    )
+    return frozen
+
+
+@dataclasses.dataclass(frozen=True)
+class CacheInfo:
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    currsize: int
+    maxsize: int
+
+
+# leaves keyed by their type and the repr of their value
+_VALUE_TYPES = (
+    Decimal,
+    datetime.datetime,
+    datetime.date,
+    datetime.time,
+    datetime.timedelta,
+    uuid.UUID,
+    SecretStr,
+    SecretBytes,
+)
+
+
+def _tag(obj: Any) -> Any:
+    # keeps e.g. Decimal("1") and "1" apart in the canonical encoding
+    value = obj
+    if isinstance(obj, (SecretStr, SecretBytes)):
+        # their repr hides the value; it only goes into the digest
+        value = obj.get_secret_value()
+    return {"__type__": type(obj).__qualname__, "__repr__": repr(value)}
+
+
+def _check_canonical(obj: Any) -> None:
+    """Raise TypeError unless the JSON encoding of ``obj`` tells it apart from
+    every unequal object: only ``str`` keys, no tuples, and no subclasses of
+    the JSON types (an ``IntEnum`` member would encode as the ``int`` it
+    equals)."""
+    tp = type(obj)
+    if tp is dict:
+        if "__type__" in obj:
+            raise TypeError("dict encoded like a tagged value")
+        for key, value in obj.items():
+            if type(key) is not str:
+                raise TypeError(f"non-str key {key!r}")
+            _check_canonical(value)
+    elif tp is list:
+        for value in obj:
+            _check_canonical(value)
+    elif tp not in (str, int, float, bool, type(None), *_VALUE_TYPES):
+        raise TypeError(f"cannot key {tp.__qualname__} values")
+
+
+# json.dumps() with arguments builds a new encoder on every call
+_canonical = json.JSONEncoder(
+    sort_keys=True, separators=(",", ":"), default=_tag
+).encode
+
+
+def canonical_digest(obj: Any) -> bytes:
+    """A digest of ``obj`` that does not depend on dict ordering; raises
+    TypeError for objects it cannot key by value (see
+    :func:`_check_canonical`), and RecursionError for circular ones."""
+    _check_canonical(obj)
+    encoded = _canonical(obj).encode()
+    return hashlib.blake2b(encoded, digest_size=16).digest()
+
+
+class ValidationCache:
+    """LRU cache of validated ``model`` instances, optionally expiring each
+    entry ``ttl`` seconds after it was stored.
+
+    Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        model: Type[BaseModel],
+        maxsize: int = 1024,
+        ttl: Optional[float] = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be positive")
+        self.model = frozen_model(model)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, BaseModel]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._hits = self._misses = 0
+        self._evictions = self._expirations = 0
+
+    def _lookup(self, key: Hashable) -> Optional[BaseModel]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, instance = entry
+                if expires >= self.clock():
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return instance
+                del self._entries[key]
+                self._expirations += 1
+            self._misses += 1
+            return None
+
+    def _store(self, key: Hashable, instance: BaseModel) -> BaseModel:
+        expires = float("inf") if self.ttl is None else self.clock() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires, instance)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return instance
+
+    def parse_raw(
+        self,
+        b: Union[str, bytes],
+        *,
+        content_type: Optional[str] = None,
+        encoding: str = "utf8",
+    ) -> BaseModel:
+        """``model.parse_raw(b)``, reusing the instance built from the same
+        bytes (and arguments) before."""
+        raw = b.encode(encoding) if isinstance(b, str) else bytes(b)
+        key = (
+            "raw",
+            content_type,
+            encoding,
+            hashlib.blake2b(raw, digest_size=16).digest(),
+        )
+        instance = self._lookup(key)
+        if instance is None:
+            instance = self._store(
+                key,
+                self.model.parse_raw(
+                    raw, content_type=content_type, encoding=encoding
+                ),
+            )
+        return instance
+
+    def parse_obj(self, obj: Any) -> BaseModel:
+        """``model.parse_obj(obj)``, reusing the instance built from an equal
+        object before."""
+        try:
+            key = ("obj", canonical_digest(obj))
+        except (TypeError, ValueError, RecursionError):
+            # keys other than str, values not keyed by value, or a
+            # circular structure: not cacheable
+            with self._lock:
+                self._misses += 1
+            return self.model.parse_obj(obj)
+        instance = self._lookup(key)
+        if instance is None:
+            instance = self._store(key, self.model.parse_obj(obj))
+        return instance
+
+    def cache_info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                expirations=self._expirations,
+                currsize=len(self._entries),
+                maxsize=self.maxsize,
+            )
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = 0
+            self._evictions = self._expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
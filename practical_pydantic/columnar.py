@@ -0,0 +1,630 @@
+"""Column-at-a-time validation of numeric fields with NumPy.
+
+``conint(gt=1000, lt=1024)``, ``confloat(multiple_of=0.5)``,
+``PositiveInt`` and friends from ``field-types/constrained-types.py`` are
+checked one value at a time by a chain of validators. For a batch of rows
+:func:`validate_columns` instead pulls each such field out as a column and
+checks every constraint on the whole column as NumPy array operations::
+
+    >>> result = validate_columns(Model, rows)  # or {"big_int": [...], ...}
+    >>> result.models[0].big_int
+    1001
+
+Every other field (strings, nested models, fields with validators of
+their own) is validated per row as usual, with the numeric fields already
+in place. Rows where any check fails are validated again in full, the
+normal way, so their :class:`~pydantic.ValidationError` lists exactly the
+errors, in the same order and at the same locations, that ``Model(**row)``
+would have raised.
+
+Values that are already of the field's type (``int`` for integer fields,
+``int`` or ``float`` for float fields) skip coercion entirely; anything
+else, such as numeric strings, is coerced by pydantic's own validator.
+Models with ``pre`` root validators, which may rewrite a row before any
+field sees it, are validated entirely row by row.
+
+The other direction, :func:`to_columns`, turns a list of instances into
+columns for Parquet/Arrow writers in one pass, without building a
+``.dict()`` per row, nested models flattened into dotted columns::
+
+    >>> to_columns(transactions, exclude={"user": {"password"}})
+    {'id': [...], 'user.id': array([...]), 'user.username': [...], ...}
+
+Requires NumPy.
+"""
+
+import dataclasses
+import inspect
+import math
+import operator
+from enum import Enum
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Type
+from typing import Union as TypingUnion
+
+from pydantic import (
+    BaseModel,
+    ConstrainedFloat,
+    ConstrainedInt,
+    SecretBytes,
+    SecretStr,
+)
+from pydantic.fields import SHAPE_SINGLETON, ModelField
+from pydantic.main import validate_model
+from pydantic.utils import ValueItems, lenient_issubclass
+from pydantic.validators import (
+    float_validator,
+    int_validator,
+    strict_float_validator,
+    strict_int_validator,
+)
+
+from practical_pydantic.parallel import BatchResult
+from practical_pydantic.serializer import (
+    _for_element,
+    _generic,
+    _is_leaf,
+    _is_model,
+    field_specs,
+    freeze_spec,
+    thaw_spec,
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+Rows = Sequence[Mapping[str, Any]]
+Columns = Mapping[str, Sequence[Any]]
+
+_MISSING = object()
+# integers beyond this do not survive a round trip through float64, so
+# comparing them with float limits in NumPy could disagree with Python
+_EXACT_FLOAT_INT = 2**53
+# pydantic.utils.almost_equal_floats
+_MULTIPLE_DELTA = 1e-8
+# in the order number_size_validator checks them
+_COMPARE = {
+    "gt": operator.gt,
+    "ge": operator.ge,
+    "lt": operator.lt,
+    "le": operator.le,
+}
+
+object_setattr = object.__setattr__
+
+# per column: the values, coerced, and the key each was found under
+_Checked = List[Tuple["_NumericColumn", List[Any], List[str]]]
+
+
+class _NumericColumn:
+    """The constraints of one ``int``/``float`` field, checked over a whole
+    column at once."""
+
+    def __init__(self, field: ModelField):
+        tp = field.type_
+        self.field = field
+        self.name = field.name
+        # as validate_model looks values up
+        self.keys: Tuple[str, ...] = (field.alias,)
+        if (
+            field.alt_alias
+            and field.model_config.allow_population_by_field_name
+        ):
+            self.keys += (field.name,)
+        self.allow_none = field.allow_none
+        # a missing value takes the default, which is only validated with
+        # validate_all or validate_always
+        self.allow_missing = not (
+            field.required
+            or field.validate_always
+            or field.model_config.validate_all
+        )
+        self.is_float = issubclass(tp, float)
+        constrained = issubclass(tp, (ConstrainedInt, ConstrainedFloat))
+        strict = constrained and tp.strict
+        if self.is_float:
+            self.coerce = strict_float_validator if strict else float_validator
+            self.exact = (float,) if strict else (float, int)
+            allow_inf_nan = getattr(tp, "allow_inf_nan", None)
+            if allow_inf_nan is None:
+                allow_inf_nan = field.model_config.allow_inf_nan
+            self.finite = not allow_inf_nan
+        else:
+            self.coerce = strict_int_validator if strict else int_validator
+            self.exact = (int,)
+            self.finite = False
+        self.limits = []
+        self.multiple_of = None
+        if constrained:
+            self.limits = [
+                (_COMPARE[op], getattr(tp, op))
+                for op in _COMPARE
+                if getattr(tp, op) is not None
+            ]
+            self.multiple_of = tp.multiple_of
+
+    def _exact_in_numpy(self, array: "np.ndarray") -> bool:
+        """Whether comparing ``array`` with the limits in NumPy gives the same
+        answers as comparing the Python numbers."""
+        for _, limit in self.limits:
+            if isinstance(limit, int):
+                if not -_EXACT_FLOAT_INT <= limit <= _EXACT_FLOAT_INT:
+                    return False
+            elif not self.is_float and len(array):
+                if np.abs(array).max() > _EXACT_FLOAT_INT:
+                    return False
+        return True
+
+    def check(self, values: List[Any]) -> "np.ndarray":
+        """Coerce ``values`` in place and return a mask of the rows where they
+        pass every check."""
+        ok = np.ones(len(values), dtype=bool)
+        present = np.ones(len(values), dtype=bool)
+        exact = self.exact
+        for i, v in enumerate(values):
+            if type(v) in exact:
+                continue
+            if (v is None and self.allow_none) or (
+                v is _MISSING and self.allow_missing
+            ):
+                present[i] = False
+                continue
+            try:
+                if v is None or v is _MISSING:
+                    raise ValueError
+                values[i] = self.coerce(v)
+            except (ValueError, TypeError):
+                ok[i] = present[i] = False
+        numbers = values
+        if not present.all():
+            numbers = [v if p else 0 for v, p in zip(values, present)]
+        try:
+            array = np.array(
+                numbers, dtype=np.float64 if self.is_float else np.int64
+            )
+        except OverflowError:
+            return self._check_scalar(values, ok, present)
+        if not self._exact_in_numpy(array):
+            return self._check_scalar(values, ok, present)
+
+        passed = present.copy()
+        if self.finite:
+            passed &= np.isfinite(array)
+        for compare, limit in self.limits:
+            passed &= compare(array, limit)
+        if self.multiple_of is not None:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                mod = np.remainder(
+                    array.astype(np.float64) / float(self.multiple_of), 1.0
+                )
+            passed &= (np.abs(mod) <= _MULTIPLE_DELTA) | (
+                np.abs(mod - 1.0) <= _MULTIPLE_DELTA
+            )
+        if self.is_float:
+            # float_validator turns ints into floats
+            for i, v in enumerate(array.tolist()):
+                if present[i]:
+                    values[i] = v
+        return np.where(present, passed, ok)
+
+    def _check_scalar(
+        self, values: List[Any], ok: "np.ndarray", present: "np.ndarray"
+    ) -> "np.ndarray":
+        # the same checks one value at a time, for the rare columns that
+        # NumPy cannot hold exactly
+        for i, v in enumerate(values):
+            if not present[i]:
+                continue
+            if self.is_float:
+                values[i] = v = float(v)
+            if self.finite and (math.isnan(v) or math.isinf(v)):
+                ok[i] = False
+            elif not all(compare(v, limit) for compare, limit in self.limits):
+                ok[i] = False
+            elif self.multiple_of is not None:
+                mod = float(v) / float(self.multiple_of) % 1
+                if min(abs(mod), abs(mod - 1)) > _MULTIPLE_DELTA:
+                    ok[i] = False
+        return ok
+
+
+def _vectorisable(field: ModelField) -> bool:
+    tp = field.type_
+    return (
+        field.shape == SHAPE_SINGLETON
+        and not field.sub_fields
+        and not field.class_validators
+        and not field.field_info.const
+        and (
+            tp in (int, float)
+            or lenient_issubclass(tp, (ConstrainedInt, ConstrainedFloat))
+        )
+    )
+
+
+class _ColumnPlan:
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self.columns: List[_NumericColumn] = []
+        self.residual = model
+        self.detached = False
+        if model.__pre_root_validators__:
+            return
+        self.columns = [
+            _NumericColumn(f)
+            for f in model.__fields__.values()
+            if _vectorisable(f)
+        ]
+        if not self.columns:
+            return
+        # the model without the numeric fields, used to validate everything
+        # else once the columns have been checked; a validator that could
+        # look at the numbers through ``values`` still sees them, as fields
+        # that take any value
+        self.detached = not model.__post_root_validators__ and not any(
+            f.class_validators for f in model.__fields__.values()
+        )
+        residual = type(model)(model.__name__, (model,), {})
+        for column in self.columns:
+            field = model.__fields__[column.name]
+            if self.detached:
+                del residual.__fields__[column.name]
+                continue
+            residual.__fields__[column.name] = ModelField(
+                name=field.name,
+                type_=Any,
+                class_validators={},
+                model_config=residual.__config__,
+                default=field.default,
+                default_factory=field.default_factory,
+                required=field.required,
+                alias=field.alias if field.alt_alias else None,
+                field_info=field.field_info,
+            )
+        self.residual = residual
+
+    def validate_row(
+        self, row: Mapping[str, Any], i: int, checked: "_Checked"
+    ) -> Optional[BaseModel]:
+        """Row ``i`` as an instance, given that its numbers passed, or ``None``
+        if any other field fails."""
+        row = dict(row)
+        for column, values, used in checked:
+            if self.detached:
+                row.pop(used[i], None)
+            elif values[i] is not _MISSING:
+                row[used[i]] = values[i]
+        values, fields_set, error = validate_model(
+            self.residual, row, self.model
+        )
+        if error is not None:
+            return None
+        if self.detached:
+            numbers = {}
+            for column, column_values, _ in checked:
+                v = column_values[i]
+                if v is _MISSING:
+                    v = column.field.get_default()
+                else:
+                    fields_set.add(column.name)
+                numbers[column.name] = v
+            # fields in declaration order, then any extras
+            merged = {
+                name: numbers[name] if name in numbers else values.pop(name)
+                for name in self.model.__fields__
+            }
+            merged.update(values)
+            values = merged
+        return _instance(self.model, values, fields_set)
+
+
+_plans: Dict[Type[BaseModel], _ColumnPlan] = {}
+
+
+def _plan(model: Type[BaseModel]) -> _ColumnPlan:
+    try:
+        return _plans[model]
+    except KeyError:
+        plan = _plans[model] = _ColumnPlan(model)
+        return plan
+
+
+def _rows_from_columns(data: Columns) -> List[Dict[str, Any]]:
+    lengths = {len(column) for column in data.values()}
+    if len(lengths) > 1:
+        raise ValueError("all columns must have the same length")
+    keys = list(data)
+    return [dict(zip(keys, values)) for values in zip(*data.values())]
+
+
+def _column(rows: Rows, keys: Tuple[str, ...]) -> Tuple[List[Any], List[str]]:
+    first = keys[0]
+    values = [row.get(first, _MISSING) for row in rows]
+    used = [first] * len(rows)
+    for other in keys[1:]:
+        for i, v in enumerate(values):
+            if v is _MISSING and other in rows[i]:
+                values[i] = rows[i][other]
+                used[i] = other
+    return values, used
+
+
+def validate_columns(
+    model: Type[BaseModel], data: TypingUnion[Rows, Columns]
+) -> BatchResult:
+    """Validate ``data``, either a sequence of row dicts or a dict of columns
+    of the same length, into ``model`` instances, checking numeric fields
+    column by column.
+
+    The result is laid out like :func:`~practical_pydantic.parallel.
+    validate_many`'s: instances in row order with ``None`` for the rows
+    that failed, and their errors by row index.
+    """
+    if np is None:
+        raise ImportError(
+            "numpy is not installed, run `pip install numpy` to use "
+            "validate_columns"
+        )
+    if isinstance(data, Mapping):
+        rows: Rows = _rows_from_columns(data)
+    else:
+        rows = data if isinstance(data, list) else list(data)
+    plan = _plan(model)
+    n = len(rows)
+    valid = np.ones(n, dtype=bool)
+    checked: _Checked = []
+    for column in plan.columns:
+        values, used = _column(rows, column.keys)
+        valid &= column.check(values)
+        checked.append((column, values, used))
+
+    models: List[Optional[BaseModel]] = []
+    errors = {}
+    for i, row in enumerate(rows):
+        if valid[i] and checked:
+            instance = plan.validate_row(row, i, checked)
+            if instance is not None:
+                models.append(instance)
+                continue
+        # the full scalar path, for exactly the errors Model(**row) raises
+        values, fields_set, error = validate_model(model, row)
+        if error is None:
+            models.append(_instance(model, values, fields_set))
+        else:
+            models.append(None)
+            errors[i] = error
+    return BatchResult(models, errors)
+
+
+def _instance(
+    model: Type[BaseModel], values: Dict[str, Any], fields_set: set
+) -> BaseModel:
+    # what BaseModel.__init__ does after validate_model
+    m = model.__new__(model)
+    object_setattr(m, "__dict__", values)
+    object_setattr(m, "__fields_set__", fields_set)
+    m._init_private_attributes()
+    return m
+
+
+Column = TypingUnion["np.ndarray", List[Any]]
+
+_DTYPES = {"bool": "bool", "int": "int64", "float": "float64"}
+_SECRETS = (SecretStr, SecretBytes)
+_export_cache: Dict[Any, "_Exporter"] = {}
+
+
+@dataclasses.dataclass(frozen=True)
+class StringBuffers:
+    """A string column in Arrow's ``large_string`` layout: value ``i`` is
+    ``data[offsets[i]:offsets[i + 1]]``, UTF-8 encoded, and is null where
+    ``valid`` is false."""
+
+    offsets: "np.ndarray"
+    data: bytes
+    valid: "np.ndarray"
+
+
+def string_buffers(values: Sequence[Optional[str]]) -> StringBuffers:
+    """Pack a column of strings (or ``None``) into offset and data buffers."""
+    if np is None:
+        raise ImportError(
+            "numpy is not installed, run `pip install numpy` to use "
+            "string_buffers"
+        )
+    encoded = [b"" if v is None else v.encode() for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    valid = np.fromiter(
+        (v is not None for v in values), dtype=bool, count=len(encoded)
+    )
+    return StringBuffers(offsets, b"".join(encoded), valid)
+
+
+def _kind(model: Type[BaseModel], field: ModelField) -> str:
+    if not _is_leaf(model, field):
+        return "object"
+    tp = field.type_
+    if lenient_issubclass(tp, _SECRETS):
+        return "secret"
+    if not inspect.isclass(tp) or issubclass(tp, Enum):
+        return "object"
+    if issubclass(tp, bool):
+        return "bool"
+    if issubclass(tp, int):
+        return "int"
+    if issubclass(tp, float):
+        return "float"
+    return "object"
+
+
+class _Exporter:
+    """Generates one loop over the instances that appends every value to its
+    column, flattening nested models into dotted columns."""
+
+    def __init__(
+        self,
+        model: Type[BaseModel],
+        by_alias: bool,
+        include: Any,
+        exclude: Any,
+    ):
+        self.by_alias = by_alias
+        self.lines: List[str] = []
+        self.namespace: Dict[str, Any] = {}
+        self.counter = 0
+        self.names: List[str] = []
+        self.kinds: List[str] = []
+
+        self.emit(0, "def extract(models):")
+        body = len(self.lines)
+        self.emit(1, "for m in models:")
+        self.fields(model, "m", "", 2, (model,), include, exclude)
+        self.emit(1, f"return [{', '.join(f'c{i}' for i in self.columns())}]")
+        self.lines[body:body] = [
+            f"    c{i} = []; a{i} = c{i}.append" for i in self.columns()
+        ]
+        source = "\n".join(self.lines)
+        code = compile(source, f"<to_columns {model.__qualname__}>", "exec")
+        exec(code, self.namespace)
+        self.extract = self.namespace["extract"]
+        self.extract.__source__ = source
+
+    def columns(self, start: int = 0) -> range:
+        return range(start, len(self.names))
+
+    def fresh(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def emit(self, indent: int, line: str) -> None:
+        self.lines.append("    " * indent + line)
+
+    def fields(
+        self,
+        model: Type[BaseModel],
+        src: str,
+        prefix: str,
+        indent: int,
+        stack: Tuple[Type[BaseModel], ...],
+        include: Any,
+        exclude: Any,
+    ) -> None:
+        include, exclude = field_specs(model, include, exclude)
+        d = self.fresh("d")
+        self.emit(indent, f"{d} = {src}.__dict__")
+        for name, field in model.__fields__.items():
+            if include is not None and name not in include:
+                continue
+            if exclude is not None and ValueItems.is_true(exclude.get(name)):
+                continue
+            self.field(
+                model,
+                field,
+                f"{d}.get({name!r})",
+                prefix + (field.alias if self.by_alias else name),
+                indent,
+                stack,
+                _for_element(include, name),
+                _for_element(exclude, name),
+            )
+
+    def field(
+        self,
+        model: Type[BaseModel],
+        field: ModelField,
+        src: str,
+        name: str,
+        indent: int,
+        stack: Tuple[Type[BaseModel], ...],
+        include: Any,
+        exclude: Any,
+    ) -> None:
+        tp = field.type_
+        if (
+            field.shape == SHAPE_SINGLETON
+            and _is_model(field)
+            and not tp.__custom_root_type__
+            and tp not in stack
+        ):
+            v = self.fresh("v")
+            start = len(self.names)
+            self.emit(indent, f"{v} = {src}")
+            self.emit(indent, f"if {v} is not None:")
+            self.fields(
+                tp, v, f"{name}.", indent + 1, stack + (tp,), include, exclude
+            )
+            self.emit(indent, "else:")
+            for i in self.columns(start):
+                self.emit(indent + 1, f"a{i}(None)")
+            return
+        i = len(self.names)
+        kind = _kind(model, field)
+        self.names.append(name)
+        self.kinds.append(kind)
+        if kind == "secret":
+            v = self.fresh("v")
+            self.emit(indent, f"{v} = {src}")
+            self.emit(indent, f"a{i}(None if {v} is None else str({v}))")
+        elif _is_leaf(model, field):
+            self.emit(indent, f"a{i}({src})")
+        else:
+            g = self.fresh("g")
+            self.namespace[g] = _generic(
+                model, self.by_alias, include, exclude
+            )
+            self.emit(indent, f"a{i}({g}({src}))")
+
+    def __call__(self, models: Sequence[BaseModel]) -> Dict[str, Column]:
+        columns: Dict[str, Column] = {}
+        for name, kind, values in zip(
+            self.names, self.kinds, self.extract(models)
+        ):
+            if kind in _DTYPES and None not in values:
+                try:
+                    values = np.fromiter(
+                        values, dtype=_DTYPES[kind], count=len(values)
+                    )
+                except (OverflowError, TypeError):
+                    pass
+            columns[name] = values
+        return columns
+
+
+def to_columns(
+    models: Sequence[BaseModel],
+    model: Optional[Type[BaseModel]] = None,
+    *,
+    by_alias: bool = False,
+    include: Any = None,
+    exclude: Any = None,
+) -> Dict[str, Column]:
+    """The fields of ``models``, instances of ``model`` (by default the class
+    of the first one), as one column per field.
+
+    ``include``/``exclude`` work as for ``.dict()``, together with the
+    ``Field(include=..., exclude=...)`` settings of the model. Nested
+    models are flattened into dotted columns (``user.id``), all ``None``
+    where the nested model is; ``int``, ``float`` and ``bool`` columns
+    become NumPy arrays unless they hold ``None``, secrets are masked as
+    by ``str()``, and every other column is a list of the values
+    ``.dict()`` would give.
+    """
+    if np is None:
+        raise ImportError(
+            "numpy is not installed, run `pip install numpy` to use "
+            "to_columns"
+        )
+    if model is None:
+        if not models:
+            raise ValueError("pass model to export an empty sequence")
+        model = type(models[0])
+    key = (model, by_alias, freeze_spec(include), freeze_spec(exclude))
+    try:
+        exporter = _export_cache[key]
+    except KeyError:
+        exporter = _export_cache[key] = _Exporter(
+            model, by_alias, thaw_spec(key[2]), thaw_spec(key[3])
+        )
+    return exporter(models)
@@ -0,0 +1,206 @@
+"""Models that keep their field values in a tuple instead of a dict.
+
+Every instance of a regular model owns a ``__dict__`` with its values and
+a ``__fields_set__`` set; for a small ``User(id, name)`` those two
+containers are most of its footprint. A :class:`CompactModel` stores the
+values as a tuple in declaration order and ``__fields_set__`` as a bitmask
+of field positions, in two slots::
+
+    >>> class Item(CompactModel):
+    ...     id: int
+    ...     name: str
+    >>> compact_model(User)  # the same for an existing model
+
+Attribute access goes through a descriptor per field. ``__dict__`` and
+``__fields_set__`` are still there, built from the slots on each access
+and writing changes back, so ``.dict()``, iteration, ``copy()``,
+assignment (with or without ``validate_assignment``), pickling and
+``match`` statements all work unchanged; what gets slower is everything
+that goes through ``__dict__``. Instances whose values do not fit the
+layout, such as ``construct()``-ed ones with missing fields or models with
+``Extra.allow`` that received extra fields, keep a plain dict and set in
+the slots instead.
+
+:func:`compact_model` cannot convert models with private attributes (or
+any other ``__slots__``): their slots and those of :class:`CompactModel`
+cannot share an instance layout, so it raises ``TypeError``. Declaring
+such a model as a :class:`CompactModel` subclass works.
+"""
+
+import inspect
+from typing import Any, Dict, Set, Tuple, Type
+
+from pydantic import BaseModel
+
+object_setattr = object.__setattr__
+_compact: Dict[Type[BaseModel], Type[BaseModel]] = {}
+
+
+class _Field:
+    """Reads and writes one field of a compact instance."""
+
+    __slots__ = ("name", "index")
+
+    def __init__(self, name: str, index: int):
+        self.name = name
+        self.index = index
+
+    def __get__(self, instance: Any, owner: Any) -> Any:
+        if instance is None:
+            # like a regular model, the class has no attribute for a field
+            raise AttributeError(self.name)
+        values = instance._values
+        if type(values) is tuple:
+            return values[self.index]
+        try:
+            return values[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+
+    def __set__(self, instance: Any, value: Any) -> None:
+        instance.__dict__[self.name] = value
+
+
+class _Values(dict):
+    """``__dict__`` of a compact instance: a copy that writes item assignments
+    through to the instance."""
+
+    __slots__ = ("owner",)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        super().__setitem__(key, value)
+        object_setattr(self.owner, "__dict__", self)
+
+
+class _FieldsSet(set):
+    """``__fields_set__`` of a compact instance, writing ``add`` through to the
+    bitmask."""
+
+    __slots__ = ("owner",)
+
+    def add(self, name: str) -> None:
+        super().add(name)
+        object_setattr(self.owner, "__fields_set__", self)
+
+
+class CompactModel(BaseModel):
+    """Base class for models stored as a tuple of values and a bitmask of set
+    fields."""
+
+    __slots__ = ("_values", "_fields_mask")
+
+    __field_names__: Tuple[str, ...] = ()
+    __field_bits__: Dict[str, int] = {}
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls.__field_names__ = tuple(cls.__fields__)
+        cls.__field_bits__ = {
+            name: 1 << i for i, name in enumerate(cls.__field_names__)
+        }
+        for i, name in enumerate(cls.__field_names__):
+            setattr(cls, name, _Field(name, i))
+
+    @property  # type: ignore[misc]
+    def __dict__(self) -> Dict[str, Any]:  # type: ignore[override]
+        values = self._values
+        if type(values) is not tuple:
+            return values
+        d = _Values(zip(self.__field_names__, values))
+        d.owner = self
+        return d
+
+    @__dict__.setter
+    def __dict__(self, values: Dict[str, Any]) -> None:
+        if tuple(values) == self.__field_names__:
+            object_setattr(self, "_values", tuple(values.values()))
+        else:
+            object_setattr(self, "_values", dict(values))
+
+    @property  # type: ignore[misc]
+    def __fields_set__(self) -> Set[str]:  # type: ignore[override]
+        mask = self._fields_mask
+        if type(mask) is not int:
+            return mask
+        fields_set = _FieldsSet(
+            name for name, bit in self.__field_bits__.items() if mask & bit
+        )
+        fields_set.owner = self
+        return fields_set
+
+    @__fields_set__.setter
+    def __fields_set__(self, fields_set: Set[str]) -> None:
+        bits = self.__field_bits__
+        if fields_set <= bits.keys():
+            mask = 0
+            for name in fields_set:
+                mask |= bits[name]
+            object_setattr(self, "_fields_mask", mask)
+        else:
+            object_setattr(self, "_fields_mask", set(fields_set))
+
+    def __getattr__(self, name: str) -> Any:
+        # extra fields of instances that fell back to a dict
+        if name not in CompactModel.__slots__:
+            values = self._values
+            if type(values) is dict and name in values:
+                return values[name]
+        raise AttributeError(
+            f"{type(self).__name__!r} object has no attribute {name!r}"
+        )
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # plain containers, so that pickles do not refer to this module's
+        # helper classes
+        state = super().__getstate__()
+        state["__dict__"] = dict(state["__dict__"])
+        state["__fields_set__"] = set(state["__fields_set__"])
+        return state
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # classes made by compact_model() share their name with the model
+        # they wrap, so they are pickled as a reference to that model
+        cls = type(self)
+        return (
+            _reconstruct,
+            (cls.__dict__.get("__compact_of__", cls),),
+            self.__getstate__(),
+        )
+
+
+def _reconstruct(model: Type[BaseModel]) -> BaseModel:
+    cls = compact_model(model)
+    return cls.__new__(cls)
+
+
+def compact_model(model: Type[BaseModel]) -> Type[BaseModel]:
+    """A subclass of ``model`` with compact storage (``model`` itself if it
+    already has it)."""
+    if issubclass(model, CompactModel):
+        return model
+    try:
+        return _compact[model]
+    except KeyError:
+        pass
+    if any(
+        cls.__dict__.get("__slots__")
+        for cls in model.__mro__
+        if cls not in BaseModel.__mro__
+    ):
+        raise TypeError(
+            f"compact_model() cannot convert {model.__name__}, which has "
+            "private attributes or __slots__; declare it as a CompactModel "
+            "subclass instead"
+        )
+    compact = _compact[model] = type(model)(
+        model.__name__,
+        (model, CompactModel),
+        {
+            "__module__": model.__module__,
+            "__qualname__": model.__qualname__,
+            "__compact_of__": model,
+            # or the schema would describe the model with our docstring
+            "__doc__": inspect.getdoc(model) or "",
+        },
+    )
+    return compact
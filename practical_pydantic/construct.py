@@ -0,0 +1,313 @@
+"""Recursive ``construct()`` for trusted data.
+
+``BaseModel.construct()`` skips validation but leaves nested values as
+they are, so ``Spam.construct(**m.dict())`` ends up with a plain dict in
+``foo`` and a list of dicts in ``bars``. :func:`construct_deep` builds the
+whole tree, sub-models, lists/tuples/dicts of sub-models and ``__root__``
+models included, without validating anything::
+
+    >>> m = construct_deep(Spam, {"foo": {"count": 4}, "bars": [{}]})
+    >>> type(m.foo), type(m.bars[0])
+    (<class 'Foo'>, <class 'Bar'>)
+
+As in :mod:`practical_pydantic.serializer`, the fields are inspected once
+per model to generate a specialised builder function.
+
+Like ``construct()`` it is only safe for data that is already valid and of
+the right Python types, such as the output of ``.dict()`` kept in a cache
+or rows read back from our own database. Unlike ``construct()``, values
+given by alias are stored only under the field name, and
+``__fields_set__`` holds field names.
+"""
+
+import inspect
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, List, Optional, Type
+
+from pydantic import BaseModel
+from pydantic.fields import (
+    SHAPE_DEFAULTDICT,
+    SHAPE_DEQUE,
+    SHAPE_DICT,
+    SHAPE_FROZENSET,
+    SHAPE_LIST,
+    SHAPE_MAPPING,
+    SHAPE_SEQUENCE,
+    SHAPE_SET,
+    SHAPE_SINGLETON,
+    SHAPE_TUPLE,
+    SHAPE_TUPLE_ELLIPSIS,
+    ModelField,
+)
+from pydantic.typing import all_literal_values, is_literal_type
+from pydantic.utils import IMMUTABLE_NON_COLLECTIONS_TYPES, ROOT_KEY
+
+Converter = Callable[[Any], Any]
+Builder = Callable[[Mapping], BaseModel]
+
+_SEQUENCE_SHAPES = {
+    SHAPE_LIST: list,
+    SHAPE_SEQUENCE: list,
+    SHAPE_TUPLE_ELLIPSIS: tuple,
+    SHAPE_SET: set,
+    SHAPE_FROZENSET: frozenset,
+}
+_MAPPING_SHAPES = {SHAPE_DICT, SHAPE_MAPPING, SHAPE_DEFAULTDICT}
+
+_MISSING = object()
+
+
+class _Builders(dict):
+    """Generated builder functions looked up by model class.
+
+    Converters look their builder up here when called rather than when
+    created, which is what lets self-referencing models compile.
+    """
+
+    def __missing__(self, model: Type[BaseModel]) -> Builder:
+        build = self[model] = _compile(model)
+        return build
+
+
+_builders = _Builders()
+
+
+def clear_cache() -> None:
+    _builders.clear()
+
+
+def _is_model(tp: Any) -> bool:
+    return inspect.isclass(tp) and issubclass(tp, BaseModel)
+
+
+def _known_keys(model: Type[BaseModel]) -> set:
+    return {
+        key for f in model.__fields__.values() for key in (f.name, f.alias)
+    }
+
+
+def _model_converter(model: Type[BaseModel]) -> Converter:
+    root = bool(model.__custom_root_type__)
+
+    def convert(v: Any) -> Any:
+        if v is None or isinstance(v, model):
+            return v
+        if root:
+            return construct_deep(model, v)
+        if isinstance(v, Mapping):
+            return _builders[model](v)
+        return v
+
+    return convert
+
+
+def _pick_member(
+    models: List[Type[BaseModel]], data: Mapping
+) -> Type[BaseModel]:
+    """The first union member whose fields account for every key of ``data``,
+    whose required fields are all present and whose ``Literal`` fields accept
+    the given values."""
+    keys = set(data)
+    for model in models:
+        if keys <= _known_keys(model) and all(
+            _accepts(f, data) for f in model.__fields__.values()
+        ):
+            return model
+    return models[0]
+
+
+def _accepts(field: ModelField, data: Mapping) -> bool:
+    value = data.get(field.alias, data.get(field.name, _MISSING))
+    if value is _MISSING:
+        return not field.required
+    if is_literal_type(field.outer_type_):
+        return value in all_literal_values(field.outer_type_)
+    return True
+
+
+def _union_converter(models: List[Type[BaseModel]]) -> Converter:
+    members = tuple(models)
+
+    def convert(v: Any) -> Any:
+        if not isinstance(v, Mapping) or isinstance(v, members):
+            return v
+        return construct_deep(_pick_member(models, v), v)
+
+    return convert
+
+
+def _discriminated_converter(field: ModelField) -> Optional[Converter]:
+    converters = {
+        tag: _item_converter(sub)
+        for tag, sub in field.sub_fields_mapping.items()
+    }
+    if not any(converters.values()):
+        return None
+    alias, name = field.discriminator_alias, field.discriminator_key
+
+    def convert(v: Any) -> Any:
+        if not isinstance(v, Mapping):
+            return v
+        convert_member = converters.get(v.get(alias, v.get(name)))
+        return v if convert_member is None else convert_member(v)
+
+    return convert
+
+
+def _item_converter(field: ModelField) -> Optional[Converter]:
+    if field.shape != SHAPE_SINGLETON:
+        return _converter(field)
+    if field.sub_fields_mapping:
+        return _discriminated_converter(field)
+    if field.sub_fields:
+        members = [
+            sub.type_ for sub in field.sub_fields if _is_model(sub.type_)
+        ]
+        if not members:
+            return None
+        if len(members) == 1 and len(field.sub_fields) == 1:
+            return _model_converter(members[0])
+        return _union_converter(members)
+    if _is_model(field.type_):
+        return _model_converter(field.type_)
+    return None
+
+
+def _converter(field: ModelField) -> Optional[Converter]:
+    """How to turn a trusted raw value for ``field`` into the value validation
+    would have produced, or ``None`` if it is used as is."""
+    if field.shape == SHAPE_SINGLETON:
+        return _item_converter(field)
+    if not field.sub_fields:
+        return None
+    if field.shape in _SEQUENCE_SHAPES:
+        item = _item_converter(field.sub_fields[0])
+        if item is None:
+            return None
+        container = _SEQUENCE_SHAPES[field.shape]
+
+        def convert_sequence(v: Any) -> Any:
+            return v if v is None else container([item(x) for x in v])
+
+        return convert_sequence
+    if field.shape == SHAPE_DEQUE:
+        item = _item_converter(field.sub_fields[0])
+        if item is None:
+            return None
+
+        def convert_deque(v: Any) -> Any:
+            return v if v is None else type(v)(item(x) for x in v)
+
+        return convert_deque
+    if field.shape == SHAPE_TUPLE:
+        items = [_item_converter(sub) for sub in field.sub_fields]
+        if not any(items):
+            return None
+
+        def convert_tuple(v: Any) -> Any:
+            if v is None:
+                return v
+            return tuple(
+                x if convert is None else convert(x)
+                for x, convert in zip(v, items)
+            )
+
+        return convert_tuple
+    if field.shape in _MAPPING_SHAPES:
+        value = _item_converter(field.sub_fields[0])
+        if value is None:
+            return None
+
+        def convert_mapping(v: Any) -> Any:
+            if v is None:
+                return v
+            return {k: value(x) for k, x in v.items()}
+
+        return convert_mapping
+    return None
+
+
+def _compile(model: Type[BaseModel]) -> Builder:
+    namespace: Dict[str, Any] = {
+        "M": model,
+        "MISSING": _MISSING,
+        "KNOWN": frozenset(_known_keys(model)),
+        "builders": _builders,
+        "setattr": object.__setattr__,
+    }
+    lines = ["def build(data):", "    values = {}", "    fields_set = set()"]
+
+    def emit(indent: int, line: str) -> None:
+        lines.append("    " * indent + line)
+
+    for i, (name, field) in enumerate(model.__fields__.items()):
+        emit(1, f"v = data.get({name!r}, MISSING)")
+        if field.alt_alias:
+            emit(1, f"v = data.get({field.alias!r}, v)")
+        emit(1, "if v is MISSING:")
+        if field.required:
+            emit(2, "pass")
+        elif (
+            field.default_factory is None
+            and type(field.default) in IMMUTABLE_NON_COLLECTIONS_TYPES
+        ):
+            namespace[f"d{i}"] = field.default
+            emit(2, f"values[{name!r}] = d{i}")
+        else:
+            namespace[f"d{i}"] = field.get_default
+            emit(2, f"values[{name!r}] = d{i}()")
+        emit(1, "else:")
+        convert = _converter(field)
+        if convert is not None:
+            namespace[f"c{i}"] = convert
+        if convert is None:
+            emit(2, f"values[{name!r}] = v")
+        elif (
+            field.shape == SHAPE_SINGLETON
+            and not field.sub_fields
+            and not field.type_.__custom_root_type__
+        ):
+            # a nested model given as a plain dict goes straight to its
+            # builder
+            namespace[f"t{i}"] = field.type_
+            emit(2, "if type(v) is dict:")
+            emit(3, f"values[{name!r}] = builders[t{i}](v)")
+            emit(2, "else:")
+            emit(3, f"values[{name!r}] = c{i}(v)")
+        else:
+            emit(2, f"values[{name!r}] = c{i}(v)")
+        emit(2, f"fields_set.add({name!r})")
+    emit(1, "if len(fields_set) < len(data):")
+    emit(2, "for k, v in data.items():")
+    emit(3, "if k not in KNOWN:")
+    emit(4, "values[k] = v")
+    emit(4, "fields_set.add(k)")
+    emit(1, "m = M.__new__(M)")
+    emit(1, 'setattr(m, "__dict__", values)')
+    emit(1, 'setattr(m, "__fields_set__", fields_set)')
+    if model.__private_attributes__:
+        emit(1, "m._init_private_attributes()")
+    emit(1, "return m")
+
+    source = "\n".join(lines)
+    code = compile(source, f"<construct {model.__qualname__}>", "exec")
+    exec(code, namespace)
+    build = namespace["build"]
+    build.__name__ = build.__qualname__ = f"build_{model.__name__}"
+    build.__source__ = source
+    return build
+
+
+def construct_deep(model: Type[BaseModel], data: Any) -> BaseModel:
+    """Build an instance of ``model``, and every nested model inside it, from
+    trusted ``data`` without validation.
+
+    Missing fields get their defaults, keys that are not fields are kept
+    as extra attributes (as ``construct()`` does), and for ``__root__``
+    models ``data`` is the root value itself.
+    """
+    if model.__custom_root_type__ and not (
+        isinstance(data, Mapping) and data.keys() == {ROOT_KEY}
+    ):
+        data = {ROOT_KEY: data}
+    return _builders[model](data)
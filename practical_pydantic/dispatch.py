@@ -0,0 +1,183 @@
+"""Tag-based dispatch for unions of models.
+
+A plain ``Union[Cake, IceCream]`` is validated by trying every member in
+turn, so the cost grows with the number of members and the last member
+pays for all the failed attempts before it. With
+``Field(discriminator="kind")`` pydantic instead builds a table from each
+member's ``Literal`` tag to the member once, when the field is prepared,
+and validation becomes a dict lookup, also through nested discriminators
+such as ``UpgragedPet`` in ``field-types/unions.py``.
+
+:func:`discriminate` finds a usable discriminator for the union fields of
+a model that never declared one (``Meal.dessert`` in
+``field-types/literal-type.py``) and switches them over to that table::
+
+    >>> discriminate(Meal).__fields__["dessert"].discriminator_key
+    'kind'
+
+A field name is usable as a discriminator when every member has it as a
+required ``Literal`` field under the same alias and no tag is shared by two
+members, since only then does picking by tag accept and reject exactly the
+inputs that trying every member would. Unions that have no such field,
+like ``DeliciousMeal.dessert``, are left as they are.
+
+:func:`discriminate` also warns about ``Field()`` arguments that look like
+misspellings of ``discriminator`` or ``alias``, such as ``discrimintor`` in
+``Pet.pet``: pydantic silently keeps unknown arguments as schema extras.
+"""
+
+import difflib
+import inspect
+import warnings
+from typing import Any, Dict, List, Optional, Sequence, Set, Type, Union
+
+from pydantic import BaseModel, create_model
+from pydantic.fields import ModelField
+from pydantic.typing import (
+    all_literal_values,
+    display_as_type,
+    get_origin,
+    is_literal_type,
+    is_union,
+)
+
+# the Field() arguments dispatch depends on; other unknown arguments are
+# usually JSON schema keywords ("minimum", "examples", ...), kept as extras
+_DISPATCH_ARGUMENTS = ("discriminator", "alias")
+
+DispatchTable = Dict[Any, Union[Type[BaseModel], "DispatchTable"]]
+
+
+class FieldArgumentWarning(UserWarning):
+    """A ``Field()`` argument looks like a misspelled known argument."""
+
+
+def _is_model(tp: Any) -> bool:
+    return inspect.isclass(tp) and issubclass(tp, BaseModel)
+
+
+def find_discriminator(
+    members: Sequence[Any], prefer: Optional[str] = None
+) -> Optional[str]:
+    """The name of a field that can discriminate between ``members``, or
+    ``None``; ``prefer`` is tried first."""
+    if len(members) < 2 or not all(_is_model(m) for m in members):
+        return None
+    names = [n for n in members[0].__fields__ if n != prefer]
+    if prefer is not None:
+        names.insert(0, prefer)
+    for name in names:
+        fields = [m.__fields__.get(name) for m in members]
+        if not all(
+            f is not None and f.required and is_literal_type(f.outer_type_)
+            for f in fields
+        ):
+            continue
+        if len({f.alias for f in fields}) != 1:
+            continue
+        seen: Set[Any] = set()
+        for f in fields:
+            tags = set(all_literal_values(f.outer_type_))
+            if seen & tags:
+                break
+            seen |= tags
+        else:
+            return name
+    return None
+
+
+def _misspelled(field: ModelField) -> Dict[str, str]:
+    """Unknown ``Field()`` arguments mapped to the dispatch argument they are
+    most likely a typo of."""
+    found = {}
+    for name in field.field_info.extra:
+        match = difflib.get_close_matches(
+            name, _DISPATCH_ARGUMENTS, n=1, cutoff=0.8
+        )
+        if match:
+            found[name] = match[0]
+    return found
+
+
+def _discriminate_field(field: ModelField, prefer: Optional[str]) -> None:
+    if (
+        field.sub_fields
+        and field.discriminator_key is None
+        and is_union(get_origin(field.type_))
+    ):
+        members = [sub.type_ for sub in field.sub_fields]
+        key = find_discriminator(members, prefer)
+        if key is not None:
+            field.discriminator_key = key
+            field.prepare_discriminated_union_sub_fields()
+    for sub in field.sub_fields or ():
+        _discriminate_field(sub, None)
+
+
+def discriminate(
+    model: Type[BaseModel], *, recursive: bool = True
+) -> Type[BaseModel]:
+    """Give every union field of ``model`` (and, if ``recursive``, of the
+    models it refers to) a discriminator when one can be found.
+
+    This changes the field definitions in place, so it is meant to be
+    applied once, e.g. as a class decorator. Returns ``model``.
+    """
+    seen: Set[Type[BaseModel]] = set()
+    todo = [model]
+    while todo:
+        current = todo.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        for name, field in current.__fields__.items():
+            prefer = None
+            for typo, known in _misspelled(field).items():
+                warnings.warn(
+                    f"{current.__name__}.{name}: unknown Field() argument "
+                    f"{typo!r}, did you mean {known!r}?",
+                    FieldArgumentWarning,
+                    stacklevel=2,
+                )
+                if known == "discriminator":
+                    prefer = field.field_info.extra[typo]
+            _discriminate_field(field, prefer)
+            if recursive:
+                todo.extend(_referenced_models(field))
+    return model
+
+
+def _referenced_models(field: ModelField) -> List[Type[BaseModel]]:
+    found = [field.type_] if _is_model(field.type_) else []
+    for sub in field.sub_fields or ():
+        found.extend(_referenced_models(sub))
+    return found
+
+
+def dispatch_table(field: ModelField) -> Optional[DispatchTable]:
+    """The tag to member table of a discriminated union field, with a nested
+    table in place of each member that is itself discriminated."""
+    if not field.sub_fields_mapping:
+        return None
+    table: DispatchTable = {}
+    for tag, sub in field.sub_fields_mapping.items():
+        nested = dispatch_table(sub)
+        table[tag] = sub.type_ if nested is None else nested
+    return table
+
+
+_union_models: Dict[Any, Type[BaseModel]] = {}
+
+
+def parse_union(union: Any, obj: Any) -> BaseModel:
+    """Validate ``obj`` against ``union``, a ``Union`` of models (possibly
+    ``Annotated`` with a discriminator), dispatching on a discriminator if one
+    is declared or can be found; raises ``ValidationError``."""
+    try:
+        wrapper = _union_models[union]
+    except KeyError:
+        wrapper = create_model(
+            f"ParsingModel[{display_as_type(union)}]", __root__=(union, ...)
+        )
+        _union_models[union] = discriminate(wrapper, recursive=False)
+    return wrapper.parse_obj(obj).__root__
@@ -0,0 +1,122 @@
+"""Import the example scripts of each topic directory as modules.
+
+The examples live in topic directories such as ``models/`` and have
+hyphenated file names, so they cannot be imported normally. They also
+print, write scratch files and poke at ``os.environ`` at import time, so
+every script is executed in a temporary working directory with its
+output swallowed and the environment restored afterwards.
+"""
+
+import contextlib
+import inspect
+import io
+import os
+import sys
+import tempfile
+import types
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Type
+
+from pydantic import BaseModel
+
+ROOT = Path(__file__).resolve().parent.parent
+
+TOPICS = (
+    "models",
+    "field-types",
+    "validators",
+    "model-config",
+    "schema",
+    "export-models",
+    "dataclasses",
+    "validation-decorator",
+    "settings",
+    "postponed-annotations",
+)
+
+
+@dataclass
+class Example:
+    topic: str
+    path: Path
+    module: types.ModuleType
+    error: Optional[BaseException] = None
+    models: Dict[str, Type[BaseModel]] = field(default_factory=dict)
+
+
+def module_name(topic: str, path: Path) -> str:
+    stem = path.stem.replace("-", "_").replace(".", "")
+    return f"practical_pydantic.examples.{topic.replace('-', '_')}.{stem}"
+
+
+@contextlib.contextmanager
+def _sandbox() -> Iterator[None]:
+    cwd = os.getcwd()
+    environ = dict(os.environ)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                with contextlib.redirect_stderr(io.StringIO()):
+                    yield
+        finally:
+            os.chdir(cwd)
+            os.environ.clear()
+            os.environ.update(environ)
+
+
+def _is_concrete_model(obj, module: types.ModuleType) -> bool:
+    return (
+        inspect.isclass(obj)
+        and issubclass(obj, BaseModel)
+        and obj.__module__ == module.__name__
+        and not getattr(obj, "__parameters__", None)
+    )
+
+
+def load_example(topic: str, path: Path) -> Example:
+    """Execute a single example script and collect the models it defines.
+
+    Scripts that raise part way through (some deliberately do) keep
+    every model defined before the failure; the exception is kept on
+    ``error``.
+    """
+    name = module_name(topic, path)
+    if name in sys.modules:
+        module = sys.modules[name]
+        error = getattr(module, "__example_error__", None)
+    else:
+        module = types.ModuleType(name)
+        module.__file__ = str(path)
+        # pydantic resolves forward references through sys.modules
+        sys.modules[name] = module
+        code = compile(path.read_text(), str(path), "exec")
+        error = None
+        with _sandbox():
+            try:
+                exec(code, module.__dict__)
+            except Exception as e:
+                error = e
+        module.__example_error__ = error
+
+    example = Example(topic=topic, path=path, module=module, error=error)
+    for attr, obj in vars(module).items():
+        if _is_concrete_model(obj, module):
+            example.models.setdefault(obj.__qualname__, obj)
+    return example
+
+
+def load_examples(topics: Optional[List[str]] = None) -> List[Example]:
+    examples = []
+    for topic in topics or TOPICS:
+        for path in sorted((ROOT / topic).glob("*.py")):
+            examples.append(load_example(topic, path))
+    return examples
+
+
+def load_model(topic: str, script: str, model: str) -> Type[BaseModel]:
+    """Return a model class by topic directory, script stem and class name,
+    e.g. ``load_model("export-models", "model-dict", "FooBarModel")``."""
+    example = load_example(topic, ROOT / topic / f"{script}.py")
+    return getattr(example.module, model)
@@ -0,0 +1,295 @@
+"""Build many models with ``create_model`` quickly.
+
+``models/dynamic-model-creation.py`` builds its models with
+``create_model``, which goes through the whole metaclass every time:
+fields are inferred from their types, validators are collected and
+wrapped one by one (each wrapper inspecting the validator's signature),
+and the class ``__signature__`` is generated. Services that turn
+thousands of tenant-defined schemas into models at startup pay for that
+per model, even when many of the schemas are the same.
+
+A :class:`ModelFactory` has the same ``create_model``, and:
+
+- returns the class built before for identical arguments (names, field
+  types and defaults, base, config, validators) instead of building it
+  again;
+- wraps each validator function once across all the models it builds,
+  rather than once per field;
+- generates ``__signature__`` when it is first read (by
+  ``inspect.signature`` or an IDE) rather than for every class;
+- records how long each class took to build in :attr:`ModelFactory.builds`.
+
+::
+
+    >>> factory = ModelFactory()
+    >>> UserModel = factory.create_model(
+    ...     "UserModel", username=(str, ...), __validators__=validators
+    ... )
+    >>> factory.create_model(
+    ...     "UserModel", username=(str, ...), __validators__=validators
+    ... ) is UserModel
+    True
+    >>> factory.create_many(tenant_specs, workers=4)  # at startup
+
+Validators are matched by identity, so the same ``__validators__`` dict
+(or the same validator objects) must be passed for a match; defaults are
+compared by value, and ``True`` is not taken for ``1``. The classes built
+are the same as those of ``create_model``, except that ``__signature__``
+is not in the class ``__dict__`` until it is read.
+
+:meth:`ModelFactory.create_many` builds on a pool of ``workers`` threads.
+Classes are built by Python code holding the GIL, so on CPython the pool
+overlaps the builds with whatever else the process does at startup
+(loading the schemas, opening connections) rather than building faster.
+"""
+
+import contextlib
+import dataclasses
+import threading
+import time
+import weakref
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Type,
+)
+
+import pydantic.class_validators as pydantic_class_validators
+import pydantic.fields as pydantic_fields
+import pydantic.main as pydantic_main
+from pydantic import BaseModel, create_model
+from pydantic.fields import FieldInfo
+from pydantic.utils import ClassAttribute, generate_model_signature
+
+# (model name, keyword arguments of create_model)
+ModelSpec = Tuple[str, Mapping[str, Any]]
+
+
+class _LazySignature:
+    """``__signature__`` of a model, generated on first access and then stored
+    on the class as pydantic would."""
+
+    def __get__(self, instance: Any, owner: Type[BaseModel]) -> Any:
+        if instance is not None:
+            # as for ClassAttribute: the signature is not for instances
+            raise AttributeError("__signature__")
+        signature = generate_model_signature(
+            owner.__init__, owner.__fields__, owner.__config__
+        )
+        type.__setattr__(
+            owner, "__signature__", ClassAttribute("__signature__", signature)
+        )
+        return signature
+
+
+_local = threading.local()
+
+
+def _signature(init: Any, fields: Any, config: Any) -> Any:
+    # only classes built by a factory, on this thread, skip it
+    if getattr(_local, "lazy_signature", False):
+        return None
+    return generate_model_signature(init, fields, config)
+
+
+_make_generic_validator = pydantic_class_validators.make_generic_validator
+# the wrappers are only held by the models using them: a wrapper refers to
+# its function, so holding it here would keep the entry forever
+_generic_validators: "weakref.WeakKeyDictionary[Any, weakref.ref]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _generic_validator(validator: Callable[..., Any]) -> Any:
+    """``make_generic_validator(validator)``, made once per function for as
+    long as a model uses it."""
+    try:
+        generic = _generic_validators[validator]()
+    except KeyError:
+        generic = None
+    except TypeError:
+        # builtins cannot be weakly referenced
+        return _make_generic_validator(validator)
+    if generic is None:
+        generic = _make_generic_validator(validator)
+        _generic_validators[validator] = weakref.ref(generic)
+    return generic
+
+
+_patch_lock = threading.Lock()
+_patch_depth = 0
+
+
+@contextlib.contextmanager
+def _patched() -> Iterator[None]:
+    """pydantic with :func:`_signature` and :func:`_generic_validator` in
+    place, for as long as any factory is building."""
+    global _patch_depth
+    with _patch_lock:
+        if not _patch_depth:
+            pydantic_main.generate_model_signature = _signature
+            pydantic_class_validators.make_generic_validator = (
+                _generic_validator
+            )
+            pydantic_fields.make_generic_validator = _generic_validator
+        _patch_depth += 1
+    try:
+        yield
+    finally:
+        with _patch_lock:
+            _patch_depth -= 1
+            if not _patch_depth:
+                pydantic_main.generate_model_signature = (
+                    generate_model_signature
+                )
+                pydantic_class_validators.make_generic_validator = (
+                    _make_generic_validator
+                )
+                pydantic_fields.make_generic_validator = (
+                    _make_generic_validator
+                )
+
+
+def _freeze(value: Any) -> Hashable:
+    """A hashable key equal for equal ``value`` s of the same types."""
+    if isinstance(value, FieldInfo):
+        return (
+            FieldInfo,
+            tuple(_freeze(getattr(value, n)) for n in FieldInfo.__slots__),
+        )
+    if isinstance(value, dict):
+        return (
+            type(value),
+            tuple((_freeze(k), _freeze(v)) for k, v in value.items()),
+        )
+    if isinstance(value, (list, tuple)):
+        return (type(value), tuple(_freeze(v) for v in value))
+    if isinstance(value, (set, frozenset)):
+        return (type(value), frozenset(_freeze(v) for v in value))
+    hash(value)
+    if isinstance(value, type):
+        return value
+    # 1, 1.0 and True are equal, but not interchangeable defaults
+    return (type(value), value)
+
+
+@dataclasses.dataclass(frozen=True)
+class BuildTime:
+    name: str
+    seconds: float
+
+
+@dataclasses.dataclass(frozen=True)
+class FactoryInfo:
+    hits: int
+    misses: int
+    currsize: int
+    build_seconds: float
+
+
+class ModelFactory:
+    """``create_model`` returning the same class for the same arguments, with
+    lazily generated signatures (unless ``lazy_signature`` is False).
+
+    Safe to share between threads.
+    """
+
+    def __init__(self, *, lazy_signature: bool = True):
+        self.lazy_signature = lazy_signature
+        self.builds: List[BuildTime] = []
+        self._models: Dict[Hashable, Type[BaseModel]] = {}
+        self._lock = threading.Lock()
+        self._hits = self._misses = 0
+
+    def _build(self, model_name: str, kwargs: Dict[str, Any]) -> Any:
+        lazy = self.lazy_signature
+        with _patched():
+            _local.lazy_signature = lazy
+            try:
+                start = time.perf_counter()
+                model = create_model(model_name, **kwargs)
+                if lazy:
+                    type.__setattr__(model, "__signature__", _LazySignature())
+                seconds = time.perf_counter() - start
+            finally:
+                _local.lazy_signature = False
+        with self._lock:
+            self.builds.append(BuildTime(model_name, seconds))
+        return model
+
+    def create_model(
+        self, model_name: str, /, **kwargs: Any
+    ) -> Type[BaseModel]:
+        """``pydantic.create_model(model_name, **kwargs)``, or the class it
+        returned before for the same arguments."""
+        try:
+            key: Optional[Hashable] = (model_name, _freeze(kwargs))
+        except TypeError:
+            # an unhashable default of a type _freeze does not know
+            key = None
+        if key is not None:
+            with self._lock:
+                model = self._models.get(key)
+                if model is not None:
+                    self._hits += 1
+                    return model
+        with self._lock:
+            self._misses += 1
+        model = self._build(model_name, kwargs)
+        if key is None:
+            return model
+        with self._lock:
+            # another thread may have built the same class meanwhile
+            return self._models.setdefault(key, model)
+
+    def create_many(
+        self,
+        specs: Iterable[ModelSpec],
+        *,
+        workers: int = 1,
+        executor: Optional[Executor] = None,
+    ) -> List[Type[BaseModel]]:
+        """The classes for ``(model_name, kwargs)`` pairs, in order, built on
+        ``workers`` threads (or by ``executor``)."""
+        specs = list(specs)
+        if executor is None and workers <= 1:
+            return [self.create_model(name, **kw) for name, kw in specs]
+
+        def build(spec: ModelSpec) -> Type[BaseModel]:
+            return self.create_model(spec[0], **spec[1])
+
+        if executor is not None:
+            return list(executor.map(build, specs))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(build, specs))
+
+    def cache_info(self) -> FactoryInfo:
+        with self._lock:
+            return FactoryInfo(
+                hits=self._hits,
+                misses=self._misses,
+                currsize=len(self._models),
+                build_seconds=sum(b.seconds for b in self.builds),
+            )
+
+    def slowest(self, n: int = 10) -> List[BuildTime]:
+        """The ``n`` classes that took longest to build."""
+        with self._lock:
+            builds = list(self.builds)
+        return sorted(builds, key=lambda b: b.seconds, reverse=True)[:n]
+
+    def clear(self) -> None:
+        """Forget the classes built, their build times and the counters."""
+        with self._lock:
+            self._models.clear()
+            self.builds.clear()
+            self._hits = self._misses = 0
@@ -0,0 +1,314 @@
+"""Declarative ``GetterDict`` s, compiled to one function per model.
+
+``UserGetter`` in ``models/orm-mode.py`` is asked for each field in turn,
+and looks each one up on its own: ``find()`` the child, catch the
+``AttributeError`` if there is none, catch the ``KeyError`` if it has no
+``Value``. Here the same getter is declared field by field, and the
+lookups are compiled (as in :mod:`practical_pydantic.construct`) into a
+single generated function that reads every field of an element, walking
+its children once::
+
+    >>> class User(BaseModel):
+    ...     Id: int
+    ...     Status: Optional[str]
+    ...     FirstName: Optional[str]
+    ...     LastName: Optional[str]
+    ...     LoggedIn: bool
+    ...
+    ...     class Config:
+    ...         orm_mode = True
+    ...         getter_dict = xml_getter(
+    ...             FirstName=child_attr("FirstName", "Value"),
+    ...             LastName=child_attr("LastName", "Value"),
+    ...             LoggedIn=child_attr("LoggedIn", "Value"),
+    ...         )
+    >>> User.from_orm(fromstring(xmlstring))
+    User(Id=2138, Status=None, FirstName=None, LastName=None, LoggedIn=True)
+
+Keys are field aliases, and keys that are not listed are read with
+``attr(key)``: an XML attribute of the element for :func:`xml_getter`, an
+attribute of the object for :func:`object_getter`, which serves plain
+classes such as ``PersonCls``. A value that is not there (no attribute,
+no child, an element without text) leaves the field missing, as the
+``default`` returned by ``UserGetter`` does.
+
+``from_orm`` still goes through the ``GetterDict``, one key at a time;
+:func:`~practical_pydantic.orm.from_orm_many` calls the function compiled
+for the model, :func:`model_extractor`, instead. Together with
+:func:`iter_elements` that reads every ``<User>`` of a document in bulk,
+from a parsed tree or from the events of ``iterparse``::
+
+    >>> users = from_orm_many(User, iter_elements(tree, "User"))
+"""
+
+import dataclasses
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterator, List, Tuple, Type
+from xml.etree.ElementTree import Element, ElementTree
+
+from pydantic import BaseModel
+from pydantic.utils import GetterDict
+
+_MISSING = object()
+
+Extract = Callable[[Any], Dict[str, Any]]
+
+
+@dataclasses.dataclass(frozen=True)
+class Spec(ABC):
+    """Where a value is read from."""
+
+    xml_only = False
+    uses_children = False
+
+    @abstractmethod
+    def lines(self, xml: bool) -> List[str]:
+        """Statements that set ``v`` to the value of ``obj``, or to
+        ``MISSING``."""
+
+
+@dataclasses.dataclass(frozen=True)
+class Attr(Spec):
+    name: str
+
+    def lines(self, xml: bool) -> List[str]:
+        if xml:
+            return [f"v = obj.get({self.name!r}, MISSING)"]
+        return [f"v = getattr(obj, {self.name!r}, MISSING)"]
+
+
+@dataclasses.dataclass(frozen=True)
+class ChildAttr(Spec):
+    tag: str
+    name: str
+
+    uses_children = True
+
+    def lines(self, xml: bool) -> List[str]:
+        if xml:
+            return [
+                f"c = kids.get({self.tag!r})",
+                f"v = MISSING if c is None else c.get({self.name!r}, MISSING)",
+            ]
+        return [
+            f"c = getattr(obj, {self.tag!r}, None)",
+            f"v = MISSING if c is None else getattr(c, {self.name!r}, MISSING)",
+        ]
+
+
+@dataclasses.dataclass(frozen=True)
+class ChildText(Spec):
+    tag: str
+
+    xml_only = uses_children = True
+
+    def lines(self, xml: bool) -> List[str]:
+        return [
+            f"c = kids.get({self.tag!r})",
+            "v = MISSING if c is None or c.text is None else c.text",
+        ]
+
+
+@dataclasses.dataclass(frozen=True)
+class Text(Spec):
+    xml_only = True
+
+    def lines(self, xml: bool) -> List[str]:
+        return ["v = MISSING if obj.text is None else obj.text"]
+
+
+@dataclasses.dataclass(frozen=True)
+class Child(Spec):
+    tag: str
+
+    xml_only = uses_children = True
+
+    def lines(self, xml: bool) -> List[str]:
+        return [f"v = kids.get({self.tag!r}, MISSING)"]
+
+
+@dataclasses.dataclass(frozen=True)
+class Children(Spec):
+    tag: str
+
+    xml_only = True
+
+    def lines(self, xml: bool) -> List[str]:
+        return [f"v = obj.findall({self.tag!r})"]
+
+
+def attr(name: str) -> Spec:
+    """Attribute ``name`` of the element, or of the object."""
+    return Attr(name)
+
+
+def child_attr(tag: str, name: str) -> Spec:
+    """Attribute ``name`` of the first child ``tag`` (or of the object's
+    attribute ``tag``)."""
+    return ChildAttr(tag, name)
+
+
+def child_text(tag: str) -> Spec:
+    """The text of the first child ``tag``."""
+    return ChildText(tag)
+
+
+def text() -> Spec:
+    """The text of the element."""
+    return Text()
+
+
+def child(tag: str) -> Spec:
+    """The first child ``tag`` itself, for a nested ``orm_mode`` model."""
+    return Child(tag)
+
+
+def children(tag: str) -> Spec:
+    """A list of the children ``tag``, for a list of nested models."""
+    return Children(tag)
+
+
+def _compile(
+    entries: List[Tuple[str, Spec, Tuple[str, ...]]], xml: bool, name: str
+) -> Extract:
+    """A function returning the dict of ``key: value`` read by ``spec`` for
+    each ``(key, spec, unless)`` entry, skipping entries for which any key in
+    ``unless`` has a value already."""
+    lines = ["def extract(obj):", "    data = {}"]
+    if xml and any(spec.uses_children for _, spec, _ in entries):
+        # the first child with each tag, in one pass
+        lines.append("    kids = {c.tag: c for c in reversed(obj)}")
+    for key, spec, unless in entries:
+        indent = "    "
+        if unless:
+            keys = " and ".join(f"{k!r} not in data" for k in unless)
+            lines.append(f"    if {keys}:")
+            indent += "    "
+        for line in spec.lines(xml):
+            lines.append(indent + line)
+        lines.append(f"{indent}if v is not MISSING:")
+        lines.append(f"{indent}    data[{key!r}] = v")
+    lines.append("    return data")
+    source = "\n".join(lines)
+    namespace: Dict[str, Any] = {"MISSING": _MISSING}
+    exec(compile(source, f"<getter {name}>", "exec"), namespace)
+    extract = namespace["extract"]
+    extract.__name__ = extract.__qualname__ = f"extract_{name}"
+    extract.__source__ = source
+    return extract
+
+
+class CompiledGetter(GetterDict):
+    """A ``GetterDict`` that reads the keys in ``specs`` with one generated
+    function when it is created; made by :func:`xml_getter` and
+    :func:`object_getter`."""
+
+    __slots__ = ("_data",)
+
+    specs: Dict[str, Spec] = {}
+    xml = False
+    extract: Extract = staticmethod(lambda obj: {})
+
+    def __init__(self, obj: Any):
+        self._obj = obj
+        self._data = self.extract(obj)
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        try:
+            return self._data[key]
+        except KeyError:
+            pass
+        if key in self.specs:
+            return default
+        if self.xml:
+            return self._obj.get(key, default)
+        return getattr(self._obj, key, default)
+
+    def __iter__(self) -> Iterator[str]:
+        if not self.xml:
+            yield from super().__iter__()
+            return
+        yield from self._data
+        for key in self._obj.keys():
+            if key not in self.specs:
+                yield key
+
+
+def _getter(xml: bool, specs: Dict[str, Spec]) -> Type[GetterDict]:
+    for key, spec in specs.items():
+        if not isinstance(spec, Spec):
+            raise TypeError(
+                f"{key}: expected a spec such as attr(), got {spec!r}"
+            )
+        if spec.xml_only and not xml:
+            raise TypeError(f"{key}: {spec!r} only reads XML elements")
+    name = "XmlGetter" if xml else "ObjectGetter"
+    entries = [(key, spec, ()) for key, spec in specs.items()]
+    return type(
+        name,
+        (CompiledGetter,),
+        {
+            "__slots__": (),
+            "specs": dict(specs),
+            "xml": xml,
+            "extract": staticmethod(_compile(entries, xml, name)),
+        },
+    )
+
+
+def xml_getter(**specs: Spec) -> Type[GetterDict]:
+    """A ``getter_dict`` for ``ElementTree`` elements, reading each key as
+    given in ``specs`` and other keys as XML attributes."""
+    return _getter(True, specs)
+
+
+def object_getter(**specs: Spec) -> Type[GetterDict]:
+    """A ``getter_dict`` for objects, reading each key as given in ``specs``
+    and other keys as attributes."""
+    return _getter(False, specs)
+
+
+_extractors: Dict[Type[BaseModel], Extract] = {}
+
+
+def model_extractor(model: Type[BaseModel]) -> Extract:
+    """The function reading everything ``validate_model`` asks ``model``'s
+    compiled ``getter_dict`` for into a dict."""
+    try:
+        return _extractors[model]
+    except KeyError:
+        pass
+    config = model.__config__
+    getter = config.getter_dict
+    if not (isinstance(getter, type) and issubclass(getter, CompiledGetter)):
+        raise TypeError(f"{model.__name__} has no compiled getter_dict")
+    entries = []
+    for field in model.__fields__.values():
+        keys = [field.alias]
+        if config.allow_population_by_field_name and field.alt_alias:
+            keys.append(field.name)
+        for i, key in enumerate(keys):
+            spec = getter.specs.get(key, Attr(key))
+            entries.append((key, spec, tuple(keys[:i])))
+    extract = _extractors[model] = _compile(
+        entries, getter.xml, model.__name__
+    )
+    return extract
+
+
+def iter_elements(source: Any, tag: str) -> Iterator[Element]:
+    """The elements ``tag`` in ``source``: an ``Element``, an ``ElementTree``,
+    or the ``(event, element)`` pairs of ``iterparse`` (where each is produced
+    when it ends)."""
+    if isinstance(source, (Element, ElementTree)):
+        yield from source.iter(tag)
+        return
+    for event, element in source:
+        if event == "end" and element.tag == tag:
+            yield element
@@ -0,0 +1,224 @@
+"""Models that validate their nested models on first access.
+
+``ComplexUser(**payload)`` validates the address, the card details and
+every hobby before the handler gets to read ``first_name``. With
+``lazy_nested = True`` in the ``Config`` of a :class:`LazyModel`, fields
+holding models (``Foo``, ``List[Bar]``, ``Optional[Address]``,
+``Dict[str, Hobby]``, ...) keep the raw input when the model is created,
+and validate it the first time the attribute is read::
+
+    >>> class Spam(LazyModel):
+    ...     foo: Foo
+    ...     bars: List[Bar]
+    >>> spam = Spam(foo={"count": 4}, bars=[{"apple": 1}])  # no error yet
+    >>> spam.bars
+    ValidationError: 1 validation error for Spam
+    bars -> 0 -> apple
+      str type expected (type=type_error.str)
+
+The validated value replaces the raw one, so later reads are plain
+attribute reads. :meth:`LazyModel.validate_all` validates whatever is left
+and raises one error with every failure, as eager validation would; it is
+called implicitly by ``.dict()``, ``.json()``, ``==``, iteration and
+pickling. With ``validate_assignment``, assignments are still validated
+straight away.
+
+Since validators and post root validators can see the values of other
+fields, a model that has any is validated eagerly. :func:`lazy_model`
+makes a lazy subclass of an existing model.
+"""
+
+import inspect
+from typing import Any, Dict, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from pydantic.error_wrappers import ErrorWrapper
+from pydantic.fields import ModelField
+
+_MISSING = object()
+_lazy: Dict[Type[BaseModel], Type[BaseModel]] = {}
+
+
+class _Pending:
+    """The raw value of a field, waiting to be validated."""
+
+    __slots__ = ("field", "value", "loc", "cls")
+
+    def __init__(self, field: ModelField, value: Any, loc: Any, cls: Any):
+        self.field = field
+        self.value = value
+        self.loc = loc
+        self.cls = cls
+
+    def validate(
+        self, values: Dict[str, Any]
+    ) -> Tuple[Any, Optional[ErrorWrapper]]:
+        return ModelField.validate(
+            self.field, self.value, values, loc=self.loc, cls=self.cls
+        )
+
+    def __repr__(self) -> str:
+        return f"<not validated: {self.value!r}>"
+
+
+class LazyField(ModelField):
+    """A field that defers its validation to :class:`_Pending`."""
+
+    __slots__ = ()
+
+    def validate(
+        self,
+        v: Any,
+        values: Dict[str, Any],
+        *,
+        loc: Any,
+        cls: Optional[Type[BaseModel]] = None,
+    ) -> Tuple[Any, Optional[ErrorWrapper]]:
+        if v is None:
+            return super().validate(v, values, loc=loc, cls=cls)
+        return _Pending(self, v, loc, cls), None
+
+
+class _LazyAttribute:
+    """Validates a pending field value when it is read."""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __get__(self, instance: Any, owner: Any) -> Any:
+        if instance is None:
+            # like a regular model, the class has no attribute for a field
+            raise AttributeError(self.name)
+        d = instance.__dict__
+        try:
+            value = d[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+        if type(value) is _Pending:
+            others = {k: v for k, v in d.items() if k != self.name}
+            value, error = value.validate(others)
+            if error:
+                raise ValidationError([error], type(instance))
+            d[self.name] = value
+        return value
+
+    def __set__(self, instance: Any, value: Any) -> None:
+        instance.__dict__[self.name] = value
+
+
+def _contains_model(field: ModelField) -> bool:
+    tp = field.type_
+    if isinstance(tp, type) and issubclass(tp, BaseModel):
+        return True
+    return any(_contains_model(sub) for sub in field.sub_fields or ())
+
+
+class LazyModel(BaseModel):
+    """Base class for models with ``lazy_nested`` in their ``Config``."""
+
+    class Config:
+        lazy_nested = True
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        lazy = (
+            getattr(cls.__config__, "lazy_nested", False)
+            and not cls.__post_root_validators__
+            and not any(f.class_validators for f in cls.__fields__.values())
+        )
+        for name, field in cls.__fields__.items():
+            if lazy and _contains_model(field):
+                field.__class__ = LazyField
+                setattr(cls, name, _LazyAttribute(name))
+            elif type(field) is LazyField:
+                field.__class__ = ModelField
+
+    def validate_all(self) -> "LazyModel":
+        """Validate every field that has not been yet; returns the instance."""
+        d = self.__dict__
+        errors = []
+        for name, value in d.items():
+            if type(value) is _Pending:
+                value, error = value.validate(
+                    {k: v for k, v in d.items() if k != name}
+                )
+                if error:
+                    errors.append(error)
+                else:
+                    d[name] = value
+        if errors:
+            raise ValidationError(errors, type(self))
+        return self
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        old = self.__dict__.get(name, _MISSING)
+        super().__setattr__(name, value)
+        # validate_assignment puts a new __dict__ in place
+        d = self.__dict__
+        if type(d.get(name)) is _Pending:
+            try:
+                getattr(self, name)
+            except ValidationError:
+                if old is _MISSING:
+                    del d[name]
+                else:
+                    d[name] = old
+                raise
+
+    def _iter(self, *args: Any, **kwargs: Any) -> Any:
+        # dict(), json(), == and copy() with include/exclude
+        self.validate_all()
+        return super()._iter(*args, **kwargs)
+
+    def __iter__(self) -> Any:
+        self.validate_all()
+        return super().__iter__()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        self.validate_all()
+        return super().__getstate__()
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # classes made by lazy_model() share their name with the model they
+        # wrap, so they are pickled as a reference to that model
+        cls = type(self)
+        return (
+            _reconstruct,
+            (cls.__dict__.get("__lazy_of__", cls),),
+            self.__getstate__(),
+        )
+
+
+def _reconstruct(model: Type[BaseModel]) -> BaseModel:
+    cls = lazy_model(model)
+    return cls.__new__(cls)
+
+
+def lazy_model(model: Type[BaseModel]) -> Type[BaseModel]:
+    """A subclass of ``model`` with ``lazy_nested = True`` (``model``
+    itself if it already is lazy)."""
+    if issubclass(model, LazyModel) and model.__config__.lazy_nested:
+        return model
+    try:
+        return _lazy[model]
+    except KeyError:
+        pass
+
+    class Config:
+        lazy_nested = True
+
+    lazy = _lazy[model] = type(model)(
+        model.__name__,
+        (model, LazyModel),
+        {
+            "__module__": model.__module__,
+            "__qualname__": model.__qualname__,
+            "Config": Config,
+            "__lazy_of__": model,
+            # or the schema would describe the model with our docstring
+            "__doc__": inspect.getdoc(model) or "",
+        },
+    )
+    return lazy
@@ -0,0 +1,125 @@
+"""Parse JSON files without reading them into a string first.
+
+``User.parse_file(path)`` (``models/helper-functions.py``) reads the file
+into ``bytes``, decodes those into a ``str`` and only then parses the
+JSON, so a 100MB document briefly costs several times that in memory.
+:func:`parse_file` maps the file into memory instead, and with
+``loads=buffer_loads`` hands the mapped bytes straight to orjson::
+
+    >>> user = parse_file(User, "user.json")
+    >>> users = parse_file_as(List[User], "users.json", loads=buffer_loads)
+
+Both also take a buffer (``bytes``, ``memoryview``, ``mmap``, ...) in
+place of a path, and ``use_mmap=False`` reads the file into ``bytes`` (no
+``str``) instead of mapping it. To validate the elements of a large array
+one at a time, see :func:`~practical_pydantic.streaming.iter_parse`, which
+maps files the same way.
+
+Documents are decoded with the model's ``json_loads`` (``json.loads``
+unless configured otherwise), which gives exactly what ``parse_raw``
+gives; decoders that only take ``bytes`` or ``str``, as ``json.loads``
+does, get one ``bytes`` copy of the mapping. ``loads=buffer_loads``
+hands the mapping to orjson when it is installed, which parses UTF-8
+straight from a buffer but reads integers beyond 64 bits as floats, so
+it is for documents known not to hold such numbers.
+"""
+
+import contextlib
+import json
+import mmap
+import os
+from typing import Any, Callable, Iterator, Optional, Type, Union
+
+from pydantic import BaseModel, parse_obj_as
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+Loads = Callable[[Any], Any]
+
+_BUFFERS = (bytes, bytearray, memoryview, mmap.mmap)
+
+
+def buffer_loads(data: Buffer) -> Any:
+    """``json.loads`` for any buffer, without a ``str`` copy when orjson is
+    installed (but with integers beyond 64 bits read as floats)."""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # NaN and Infinity, which json.loads accepts, or an error
+            # worded as json.loads words it
+            pass
+    return json.loads(data if isinstance(data, bytes) else bytes(data))
+
+
+def default_loads(model: Optional[Type[BaseModel]] = None) -> Loads:
+    """The model's ``json_loads``, as ``parse_raw`` uses it."""
+    return model.__config__.json_loads if model is not None else json.loads
+
+
+@contextlib.contextmanager
+def open_buffer(
+    source: Union[str, os.PathLike, Buffer], use_mmap: bool = True
+) -> Iterator[Buffer]:
+    """The contents of ``source``: a buffer as it is, or the file at a path,
+    memory-mapped (read-only) if ``use_mmap``."""
+    if isinstance(source, _BUFFERS):
+        yield source
+        return
+    with open(source, "rb") as f:
+        # empty files cannot be mapped
+        if not use_mmap or os.fstat(f.fileno()).st_size == 0:
+            yield f.read()
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            # orjson only reads objects that export a buffer, and the
+            # mapping cannot be closed until the view is released
+            with memoryview(mapped) as view:
+                yield view
+
+
+def _load(
+    source: Union[str, os.PathLike, Buffer],
+    use_mmap: bool,
+    loads: Loads,
+) -> Any:
+    with open_buffer(source, use_mmap) as data:
+        try:
+            return loads(data)
+        except TypeError:
+            if isinstance(data, bytes):
+                raise
+            # decoders such as json.loads only take bytes or str
+            return loads(bytes(data))
+
+
+def parse_file(
+    model: Type[BaseModel],
+    source: Union[str, os.PathLike, Buffer],
+    *,
+    use_mmap: bool = True,
+    loads: Optional[Loads] = None,
+) -> BaseModel:
+    """``model.parse_file(source)`` for JSON, decoding the file (or buffer)
+    without reading it into a ``str`` first."""
+    return model.parse_obj(
+        _load(source, use_mmap, loads or default_loads(model))
+    )
+
+
+def parse_file_as(
+    type_: Any,
+    source: Union[str, os.PathLike, Buffer],
+    *,
+    use_mmap: bool = True,
+    loads: Optional[Loads] = None,
+) -> Any:
+    """``parse_file_as(type_, source)`` for JSON, decoding the file (or buffer)
+    without reading it into a ``str`` first."""
+    return parse_obj_as(
+        type_, _load(source, use_mmap, loads or default_loads())
+    )
@@ -0,0 +1,177 @@
+"""Precompiled include/exclude masks.
+
+Passing ``include``/``exclude`` to ``.dict()`` makes pydantic merge the
+spec with the class-level ``Field(include=..., exclude=...)`` settings and
+re-normalise it with ``ValueItems`` at every level of the tree, on every
+call. A :class:`Mask` does that work once::
+
+    >>> mask = compile_mask(
+    ...     ComplexUser, exclude={"hobbies": {"__all__": {"info"}}}
+    ... )
+    >>> mask.dict(user) == user.dict(exclude={"hobbies": {"__all__": {"info"}}})
+    True
+
+Masks are immutable and hashable, so they can be module-level constants
+or dictionary keys. They are checked against the model tree when they are
+compiled: unknown field names, index keys on non-sequence fields and
+nested specs on scalar fields raise :class:`MaskError` up front instead of
+being silently ignored at dump time. Negative indexes and ``__all__`` on
+lists of sub-models are resolved once per list length.
+"""
+
+import dataclasses
+import inspect
+from typing import Any, Dict, Optional, Type
+
+from pydantic import BaseModel
+from pydantic.fields import (
+    SHAPE_DEQUE,
+    SHAPE_DICT,
+    SHAPE_FROZENSET,
+    SHAPE_GENERIC,
+    SHAPE_ITERABLE,
+    SHAPE_LIST,
+    SHAPE_MAPPING,
+    SHAPE_SEQUENCE,
+    SHAPE_SET,
+    SHAPE_SINGLETON,
+    SHAPE_TUPLE,
+    SHAPE_TUPLE_ELLIPSIS,
+    ModelField,
+)
+
+from practical_pydantic.serializer import (
+    DictSerializer,
+    FrozenSpec,
+    JsonSerializer,
+    compile_dict,
+    compile_json,
+    freeze_spec,
+    thaw_spec,
+)
+
+_SEQUENCE_SHAPES = {
+    SHAPE_LIST,
+    SHAPE_SET,
+    SHAPE_FROZENSET,
+    SHAPE_TUPLE_ELLIPSIS,
+    SHAPE_SEQUENCE,
+    SHAPE_ITERABLE,
+    SHAPE_DEQUE,
+}
+_MAPPING_SHAPES = {SHAPE_DICT, SHAPE_MAPPING}
+
+
+class MaskError(ValueError):
+    pass
+
+
+def _check_model(model: Type[BaseModel], spec: FrozenSpec, path: str):
+    if spec is True:
+        return
+    for key, sub in spec:
+        if key not in model.__fields__:
+            raise MaskError(
+                f"{path}{key}: {model.__name__} has no field " f"{key!r}"
+            )
+        _check_field(model.__fields__[key], sub, f"{path}{key}")
+
+
+def _check_field(field: ModelField, spec: FrozenSpec, path: str) -> None:
+    if spec is True:
+        return
+    tp = field.type_
+    if field.shape == SHAPE_SINGLETON and not field.sub_fields:
+        if inspect.isclass(tp) and issubclass(tp, BaseModel):
+            _check_model(tp, spec, f"{path}.")
+            return
+        raise MaskError(f"{path}: cannot apply a nested spec to {tp!r}")
+    if field.shape in _SEQUENCE_SHAPES or field.shape == SHAPE_TUPLE:
+        for key, sub in spec:
+            if key != "__all__" and not isinstance(key, int):
+                raise MaskError(
+                    f"{path}: sequence items are selected by integer index "
+                    f"or '__all__', not {key!r}"
+                )
+            if field.shape == SHAPE_TUPLE and isinstance(key, int):
+                if not -len(field.sub_fields) <= key < len(field.sub_fields):
+                    raise MaskError(f"{path}: index {key} is out of range")
+                item = field.sub_fields[key]
+            else:
+                item = field.sub_fields[0]
+            _check_field(item, sub, f"{path}[{key}]")
+        return
+    if field.shape in _MAPPING_SHAPES:
+        for key, sub in spec:
+            _check_field(field.sub_fields[0], sub, f"{path}[{key!r}]")
+        return
+    if field.shape == SHAPE_GENERIC or field.sub_fields:
+        # unions and generic containers can only be checked at dump time
+        return
+    raise MaskError(f"{path}: cannot apply a nested spec to {tp!r}")
+
+
+@dataclasses.dataclass(frozen=True)
+class Mask:
+    model: Type[BaseModel]
+    include: Optional[FrozenSpec] = None
+    exclude: Optional[FrozenSpec] = None
+    _dumpers: Dict[Any, Any] = dataclasses.field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    def as_kwargs(self) -> Dict[str, Any]:
+        """The mask as ``include``/``exclude`` keyword arguments for pydantic's
+        own ``dict()``, ``json()`` and ``copy()``."""
+        return {
+            "include": thaw_spec(self.include),
+            "exclude": thaw_spec(self.exclude),
+        }
+
+    def dict_serializer(self, by_alias: bool = False) -> DictSerializer:
+        key = ("dict", by_alias)
+        try:
+            return self._dumpers[key]
+        except KeyError:
+            pass
+        dump = self._dumpers[key] = compile_dict(
+            self.model, by_alias=by_alias, **self.as_kwargs()
+        )
+        return dump
+
+    def json_serializer(self, by_alias: bool = False) -> JsonSerializer:
+        key = ("json", by_alias)
+        try:
+            return self._dumpers[key]
+        except KeyError:
+            pass
+        dump = self._dumpers[key] = compile_json(
+            self.model, by_alias=by_alias, **self.as_kwargs()
+        )
+        return dump
+
+    def dict(self, m: BaseModel, *, by_alias: bool = False) -> Dict[str, Any]:
+        if type(m) is not self.model:
+            return m.dict(by_alias=by_alias, **self.as_kwargs())
+        return self.dict_serializer(by_alias)(m)
+
+    def json(self, m: BaseModel, *, by_alias: bool = False) -> str:
+        if type(m) is not self.model:
+            return m.json(by_alias=by_alias, **self.as_kwargs())
+        return self.json_serializer(by_alias)(m)
+
+
+def compile_mask(
+    model: Type[BaseModel], *, include: Any = None, exclude: Any = None
+) -> Mask:
+    """Validate ``include``/``exclude`` against ``model`` and return a reusable
+    :class:`Mask`.
+
+    Specs take the same sets and dicts as ``.dict()``, including integer
+    indexes (negative ones too) and ``__all__`` for sequences.
+    """
+    include, exclude = freeze_spec(include), freeze_spec(exclude)
+    for spec in (include, exclude):
+        if spec is not None:
+            _check_model(model, spec, "")
+    return Mask(model, include, exclude)
@@ -0,0 +1,472 @@
+"""Immutable models that compute their hash, ``dict()`` and ``json()`` once.
+
+A model with ``allow_mutation = False`` cannot have its fields reassigned,
+yet pydantic rebuilds ``.dict()`` and ``.json()`` on every call and, with
+``frozen = True``, rehashes every value on every ``hash()``. A
+:class:`MemoModel` keeps the result of each of those per instance, keyed
+by the arguments of the call (``include``, ``exclude``, ``by_alias``, ...),
+so only the first call does the work::
+
+    >>> class Country(MemoModel):
+    ...     name: str
+    ...     phone_code: int
+    >>> usa = Country(name="USA", phone_code=1)
+    >>> usa.json() is usa.json()
+    True
+    >>> memo_model(User)  # the same for an existing model
+
+``dict()`` hands out a copy of the cached dicts and lists, so callers may
+modify it. Equality compares the cached dicts, and copies start with an
+empty cache.
+
+The cache is never invalidated, which is only right if nothing reachable
+from the instance can change. ``allow_mutation = False`` protects the
+attributes, not the values they hold (see ``models/faux-immutability.py``),
+so the first instance of a class whose fields can hold a list, a dict, a
+set or a mutable model raises ``TypeError``. There are two ways out:
+
+* ``deep_freeze = True`` in the ``Config`` replaces dicts and lists with
+  the read-only :class:`FrozenDict` and :class:`FrozenList` (sets with
+  frozensets) when the instance is created, recursively; they compare
+  equal to, and serialize like, the originals. Values of ``Any`` fields
+  that are not one of those containers must be immutable.
+* ``memoize = False`` in the ``Config`` turns the caching off, leaving a
+  plain immutable model.
+"""
+
+import inspect
+import re
+from datetime import date, time, timedelta
+from decimal import Decimal
+from enum import Enum
+from ipaddress import (
+    IPv4Address,
+    IPv4Interface,
+    IPv4Network,
+    IPv6Address,
+    IPv6Interface,
+    IPv6Network,
+)
+from pathlib import PurePath
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple, Type
+from uuid import UUID
+
+from pydantic import BaseModel, SecretBytes, SecretStr
+from pydantic.fields import (
+    SHAPE_DICT,
+    SHAPE_FROZENSET,
+    SHAPE_LIST,
+    SHAPE_SET,
+    SHAPE_SINGLETON,
+    SHAPE_TUPLE,
+    SHAPE_TUPLE_ELLIPSIS,
+    ModelField,
+)
+from typing_extensions import Literal, get_origin
+
+from practical_pydantic.serializer import freeze_spec
+
+object_setattr = object.__setattr__
+_MISSING = object()
+
+_IMMUTABLE_SHAPES = {
+    SHAPE_SINGLETON,
+    SHAPE_TUPLE,
+    SHAPE_TUPLE_ELLIPSIS,
+    SHAPE_FROZENSET,
+}
+_FREEZABLE_SHAPES = _IMMUTABLE_SHAPES | {SHAPE_LIST, SHAPE_SET, SHAPE_DICT}
+_IMMUTABLE_TYPES = (
+    str,
+    bytes,
+    int,
+    float,
+    complex,
+    Decimal,
+    Enum,
+    date,
+    time,
+    timedelta,
+    UUID,
+    PurePath,
+    IPv4Address,
+    IPv4Interface,
+    IPv4Network,
+    IPv6Address,
+    IPv6Interface,
+    IPv6Network,
+    re.Pattern,
+    SecretStr,
+    SecretBytes,
+    frozenset,
+    type(None),
+)
+_FREEZABLE_TYPES = (dict, list, set, tuple)
+
+# names of the fields to deep-freeze, per model class
+_plans: Dict[Type[BaseModel], Tuple[str, ...]] = {}
+_memo: Dict[Tuple[Type[BaseModel], bool], Type[BaseModel]] = {}
+
+
+def _read_only(self: Any, *args: Any, **kwargs: Any) -> Any:
+    raise TypeError(f"{type(self).__name__} is read-only")
+
+
+class FrozenList(list):
+    """A list that cannot be modified."""
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = _read_only
+    sort = reverse = _read_only
+
+    def __hash__(self) -> int:  # type: ignore[override]
+        return hash(tuple(self))
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # the default rebuilds the list with append()
+        return (FrozenList, (list(self),))
+
+
+class FrozenDict(dict):
+    """A dict that cannot be modified."""
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    pop = popitem = clear = update = setdefault = _read_only
+
+    def __hash__(self) -> int:  # type: ignore[override]
+        return hash(frozenset(self.items()))
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # the default rebuilds the dict with __setitem__()
+        return (FrozenDict, (dict(self),))
+
+
+def _freeze(value: Any) -> Any:
+    t = type(value)
+    if t is dict:
+        return FrozenDict((k, _freeze(v)) for k, v in value.items())
+    if t is list:
+        return FrozenList(_freeze(v) for v in value)
+    if t is set:
+        return frozenset(value)
+    if t is tuple:
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _copy(value: Any) -> Any:
+    """Copy the containers of a cached ``dict()`` that callers could modify,
+    turning deep-frozen ones back into a plain ``dict``/``list`` as
+    ``BaseModel.dict()`` returns them."""
+    t = type(value)
+    if t is dict or isinstance(value, FrozenDict):
+        return {k: _copy(v) for k, v in value.items()}
+    if t is list or isinstance(value, FrozenList):
+        return [_copy(v) for v in value]
+    if t is tuple:
+        return tuple(_copy(v) for v in value)
+    if t is set:
+        return set(value)
+    return value
+
+
+def _immutable_config(model: Type[BaseModel]) -> bool:
+    config = model.__config__
+    return not config.allow_mutation or config.frozen
+
+
+def _safe_type(tp: Any, deep: bool, seen: Set[Type[BaseModel]]) -> bool:
+    if tp is Any or tp is object:
+        return deep
+    if get_origin(tp) is Literal:
+        return True
+    if not inspect.isclass(tp):
+        return False
+    if issubclass(tp, BaseModel):
+        return _safe_model(tp, seen)
+    if issubclass(tp, _IMMUTABLE_TYPES):
+        return True
+    # subclasses would come out of _freeze() as the base type
+    return deep and tp in _FREEZABLE_TYPES
+
+
+def _safe_field(
+    field: ModelField, deep: bool, seen: Set[Type[BaseModel]]
+) -> bool:
+    """Whether the values of ``field`` cannot change, once deep-frozen if
+    ``deep``."""
+    if field.shape not in (_FREEZABLE_SHAPES if deep else _IMMUTABLE_SHAPES):
+        return False
+    if field.sub_fields:
+        return all(_safe_field(sub, deep, seen) for sub in field.sub_fields)
+    return _safe_type(field.type_, deep, seen)
+
+
+def _safe_model(model: Type[BaseModel], seen: Set[Type[BaseModel]]) -> bool:
+    if model in seen:
+        return True
+    seen.add(model)
+    if not _immutable_config(model):
+        return False
+    # a memo model deep-freezes its own values, if configured to
+    deep = issubclass(model, MemoModel) and _deep_freeze(model)
+    return all(
+        _safe_field(field, deep, seen) for field in model.__fields__.values()
+    )
+
+
+def _deep_freeze(model: Type[BaseModel]) -> bool:
+    return getattr(model.__config__, "deep_freeze", False)
+
+
+def _plan(model: Type[BaseModel]) -> Tuple[str, ...]:
+    """Check that ``model`` can be memoized; returns the fields whose values
+    have to be deep-frozen."""
+    try:
+        return _plans[model]
+    except KeyError:
+        pass
+    if not _immutable_config(model):
+        raise TypeError(
+            f"{model.__name__} allows mutation, so it cannot be memoized; "
+            f"set allow_mutation = False in its Config"
+        )
+    deep = _deep_freeze(model)
+    names = []
+    for name, field in model.__fields__.items():
+        if _safe_field(field, False, {model}):
+            continue
+        if deep and _safe_field(field, True, {model}):
+            names.append(name)
+            continue
+        raise TypeError(
+            f"{model.__name__}.{name} can hold mutable values, so the "
+            f"model cannot be memoized; set deep_freeze = True (or "
+            f"memoize = False) in its Config"
+        )
+    plan = _plans[model] = tuple(names)
+    return plan
+
+
+class MemoModel(BaseModel):
+    """Base class for immutable models that cache their hash and serialized
+    forms."""
+
+    __slots__ = ("_memo",)
+
+    class Config:
+        allow_mutation = False
+        memoize = True
+        deep_freeze = False
+
+    def _init_private_attributes(self) -> None:
+        # the last step of __init__, construct() and from_orm(), and of the
+        # other ways of building an instance without __init__
+        super()._init_private_attributes()
+        self._freeze()
+
+    def _freeze(self) -> None:
+        if not self.__config__.memoize:
+            return
+        d = self.__dict__
+        for name in _plan(type(self)):
+            if name in d:
+                d[name] = _freeze(d[name])
+
+    def _copy_and_set_values(self, *args: Any, **kwargs: Any) -> Any:
+        # copy(update=...) values are not validated, but they are frozen
+        m = super()._copy_and_set_values(*args, **kwargs)
+        m._freeze()
+        return m
+
+    def _cached(
+        self, key: Optional[Hashable], build: Callable[[], Any]
+    ) -> Any:
+        if key is None:
+            return build()
+        try:
+            return self._memo[key]
+        except AttributeError:
+            if not self.__config__.memoize:
+                return build()
+            memo: Dict[Hashable, Any] = {}
+            object_setattr(self, "_memo", memo)
+        except KeyError:
+            memo = self._memo
+        except TypeError:
+            # unhashable arguments
+            return build()
+        value = memo[key] = build()
+        return value
+
+    def dict(
+        self,
+        *,
+        include: Any = None,
+        exclude: Any = None,
+        by_alias: bool = False,
+        skip_defaults: Optional[bool] = None,
+        exclude_unset: bool = False,
+        exclude_defaults: bool = False,
+        exclude_none: bool = False,
+    ) -> Dict[str, Any]:
+        """``dict()``, built once per set of arguments."""
+        kwargs = dict(
+            include=include,
+            exclude=exclude,
+            by_alias=by_alias,
+            skip_defaults=skip_defaults,
+            exclude_unset=exclude_unset,
+            exclude_defaults=exclude_defaults,
+            exclude_none=exclude_none,
+        )
+        return _copy(
+            self._cached(
+                _key("dict", kwargs),
+                lambda: super(MemoModel, self).dict(**kwargs),
+            )
+        )
+
+    def json(
+        self,
+        *,
+        include: Any = None,
+        exclude: Any = None,
+        by_alias: bool = False,
+        skip_defaults: Optional[bool] = None,
+        exclude_unset: bool = False,
+        exclude_defaults: bool = False,
+        exclude_none: bool = False,
+        encoder: Optional[Callable[[Any], Any]] = None,
+        models_as_dict: bool = True,
+        **dumps_kwargs: Any,
+    ) -> str:
+        """``json()``, built once per set of arguments."""
+        kwargs = dict(
+            include=include,
+            exclude=exclude,
+            by_alias=by_alias,
+            skip_defaults=skip_defaults,
+            exclude_unset=exclude_unset,
+            exclude_defaults=exclude_defaults,
+            exclude_none=exclude_none,
+            encoder=encoder,
+            models_as_dict=models_as_dict,
+            **dumps_kwargs,
+        )
+        return self._cached(
+            _key("json", kwargs), lambda: super(MemoModel, self).json(**kwargs)
+        )
+
+    def __eq__(self, other: Any) -> bool:
+        mine = self._cached("dict", super().dict)
+        if isinstance(other, MemoModel):
+            return mine == other._cached("dict", super(MemoModel, other).dict)
+        if isinstance(other, BaseModel):
+            return mine == other.dict()
+        return mine == other
+
+    def __hash__(self) -> int:
+        try:
+            return self._memo["hash"]
+        except (AttributeError, KeyError):
+            # the hash of a pydantic model with ``frozen = True``
+            return self._cached(
+                "hash",
+                lambda: hash(type(self)) + hash(tuple(self.__dict__.values())),
+            )
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # classes made by memo_model() share their name with the model they
+        # wrap, so they are pickled as a reference to that model
+        cls = type(self)
+        return (
+            _reconstruct,
+            (cls.__dict__.get("__memo_of__", cls), _deep_freeze(cls)),
+            self.__getstate__(),
+        )
+
+
+_DEFAULTS = {
+    "include": None,
+    "exclude": None,
+    "by_alias": False,
+    "skip_defaults": None,
+    "exclude_unset": False,
+    "exclude_defaults": False,
+    "exclude_none": False,
+    "encoder": None,
+    "models_as_dict": True,
+}
+
+
+def _key(kind: str, kwargs: Dict[str, Any]) -> Optional[Hashable]:
+    """The cache key of a ``dict()`` or ``json()`` call; just ``kind`` for the
+    default arguments."""
+    if all(
+        _DEFAULTS.get(name, _MISSING) is value
+        for name, value in kwargs.items()
+    ):
+        return kind
+    if kwargs["skip_defaults"] is not None:
+        # deprecated, and warned about on every call
+        return None
+    try:
+        include = freeze_spec(kwargs["include"])
+        exclude = freeze_spec(kwargs["exclude"])
+    except TypeError:
+        return None
+    rest = tuple(
+        (name, value)
+        for name, value in kwargs.items()
+        if name not in ("include", "exclude")
+    )
+    return (kind, include, exclude, rest)
+
+
+def _reconstruct(model: Type[BaseModel], deep_freeze: bool) -> BaseModel:
+    cls = memo_model(model, deep_freeze=deep_freeze)
+    return cls.__new__(cls)
+
+
+def memo_model(
+    model: Type[BaseModel], *, deep_freeze: bool = False
+) -> Type[BaseModel]:
+    """An immutable subclass of ``model`` that caches its hash and serialized
+    forms (``model`` itself if it already does)."""
+    if (
+        issubclass(model, MemoModel)
+        and model.__config__.memoize
+        and _deep_freeze(model) == deep_freeze
+    ):
+        return model
+    model = model.__dict__.get("__memo_of__", model)
+    try:
+        return _memo[model, deep_freeze]
+    except KeyError:
+        pass
+
+    config = type(
+        "Config",
+        (),
+        {"allow_mutation": False, "memoize": True, "deep_freeze": deep_freeze},
+    )
+    memo = _memo[model, deep_freeze] = type(model)(
+        model.__name__,
+        (model, MemoModel),
+        {
+            "__module__": model.__module__,
+            "__qualname__": model.__qualname__,
+            "Config": config,
+            "__memo_of__": model,
+            # or the schema would describe the model with our docstring
+            "__doc__": inspect.getdoc(model) or "",
+            # pydantic takes __hash__ from the first base
+            "__hash__": MemoModel.__hash__,
+        },
+    )
+    return memo
@@ -0,0 +1,434 @@
+"""Convert whole result sets with ``from_orm``.
+
+``CompanyModel.from_orm(co_orm)`` (``models/orm-mode.py``) wraps every row
+in a ``GetterDict``, reads each field through its ``get()`` and runs every
+value through the field's validators, and ``Person.from_orm`` does the
+same again for every one of the ``pets``. :func:`from_orm_many` works out
+once per model which attribute feeds which field (the alias, such as
+``metadata_``, or with ``allow_population_by_field_name`` the name) and
+which fields hold nested ``orm_mode`` models, then reads each row with
+plain lookups::
+
+    >>> people = from_orm_many(Person, session.scalars(select(PersonOrm)))
+    >>> companies = from_orm_many(
+    ...     CompanyModel, session.execute(select(CompanyOrm.id, ...))
+    ... )
+
+Most values a database driver returns are already what the field's
+validators would return: an ``int`` for an ``int`` field, a ``str`` within
+a ``constr``'s length limits, a ``datetime``. Those are taken as they are,
+lists of them are copied, and nested models are built the same way; only
+the remaining values go through ``field.validate``. A row with a missing
+attribute or an invalid value is validated again by pydantic as a whole,
+so it gets the same defaults, and raises the same ``ValidationError``, as
+``from_orm``. Models with root validators are always validated that way.
+
+Rows may be ORM objects (or any objects ``from_orm`` takes), SQLAlchemy
+``Row`` tuples and named tuples, or mappings such as ``result.mappings()``,
+which are read by key. A ``Row`` holding a single entity
+(``session.execute(select(PersonOrm))``) is read as that entity. Nested
+models in a field (``Pet``, ``List[Pet]``, ``Optional[Pet]``) are read
+from the related objects, so relationships are best loaded eagerly
+(``selectinload``) rather than with a query per row.
+
+Models whose ``getter_dict`` is compiled by
+:mod:`practical_pydantic.getters` (XML elements, for one) are read with
+the function compiled for the model. Models with any other custom
+``getter_dict``, or a custom root type, are converted by ``from_orm``
+itself.
+"""
+
+from collections.abc import Mapping
+from datetime import date, datetime, time
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ConfigError, validate_model
+from pydantic.fields import (
+    SHAPE_LIST,
+    SHAPE_SINGLETON,
+    SHAPE_TUPLE_ELLIPSIS,
+    ModelField,
+)
+from pydantic.types import ConstrainedStr
+from pydantic.utils import GetterDict
+from pydantic.validators import BOOL_FALSE, BOOL_TRUE, max_str_int
+
+from practical_pydantic.getters import CompiledGetter, model_extractor
+
+_MISSING = object()
+
+# validators that return values of exactly these types unchanged
+_EXACT = (datetime, date, time)
+
+# what bool_validator makes of strings
+_BOOLS = {
+    **{v: True for v in BOOL_TRUE if isinstance(v, str)},
+    **{v: False for v in BOOL_FALSE if isinstance(v, str)},
+}
+
+Get = Callable[[str, Any], Any]
+Read = Callable[[Any], Any]
+
+object_setattr = object.__setattr__
+
+
+class _Slow:
+    """A value that has to go through ``field.validate``."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+class _Plan:
+    """How to read ``model`` from a row: ``keys`` are the keys to try for each
+    field, with a function turning nested ORM objects into dicts for
+    ``validate_model``; ``fields`` adds what reads the field's final value
+    (None if every value needs validation), or is None if whole rows always do.
+
+    ``getter`` turns an object into the ``get`` reading it.
+    """
+
+    __slots__ = ("keys", "fields", "getter")
+
+    def __init__(self, getter: Callable[[Any], Get]) -> None:
+        self.getter = getter
+        self.keys: List[Tuple[Tuple[str, ...], Optional[Read]]] = []
+        self.fields: Optional[
+            List[Tuple[str, Tuple[str, ...], ModelField, Optional[Read]]]
+        ] = []
+
+
+_plans: Dict[Type[BaseModel], _Plan] = {}
+_entities: Dict[Tuple[Type[BaseModel], Tuple[str, ...]], bool] = {}
+
+
+def _plannable(model: Type[BaseModel]) -> bool:
+    config = model.__config__
+    return (
+        config.orm_mode
+        and (
+            config.getter_dict is GetterDict
+            or isinstance(config.getter_dict, type)
+            and issubclass(config.getter_dict, CompiledGetter)
+        )
+        and not model.__custom_root_type__
+    )
+
+
+def _getter(model: Type[BaseModel]) -> Callable[[Any], Get]:
+    """What reads the values of ``model`` from an object."""
+    if model.__config__.getter_dict is GetterDict:
+        return lambda obj: partial(getattr, obj)
+    extract = model_extractor(model)
+    return lambda obj: extract(obj).get
+
+
+def _nested_model(field: ModelField) -> Optional[Type[BaseModel]]:
+    tp = field.type_
+    if isinstance(tp, type) and issubclass(tp, BaseModel) and _plannable(tp):
+        return tp
+    return None
+
+
+def _to_dict(field: ModelField) -> Optional[Read]:
+    """Reads nested ORM objects in ``field`` into dicts, which the nested model
+    validates as it would have validated the object."""
+    tp = _nested_model(field)
+    if tp is None:
+        return None
+
+    def one(value: Any) -> Any:
+        if value is None or isinstance(value, (dict, BaseModel)):
+            return value
+        plan = _plan(tp)
+        return _values(plan, plan.getter(value))
+
+    if field.shape == SHAPE_SINGLETON:
+        return one
+    if field.shape in (SHAPE_LIST, SHAPE_TUPLE_ELLIPSIS):
+        return lambda v: (
+            [one(item) for item in v] if isinstance(v, (list, tuple)) else v
+        )
+    return None
+
+
+def _to_int(v: Any) -> Any:
+    if type(v) is int:
+        return v
+    if type(v) is str and len(v) <= max_str_int:
+        try:
+            return int(v)
+        except ValueError:
+            pass
+    return _Slow(v)
+
+
+def _to_float(v: Any) -> Any:
+    if type(v) is float:
+        return v
+    if type(v) is str or type(v) is int:
+        try:
+            return float(v)
+        except (ValueError, OverflowError):
+            pass
+    return _Slow(v)
+
+
+def _to_bool(v: Any) -> Any:
+    if type(v) is bool:
+        return v
+    if type(v) is str:
+        b = _BOOLS.get(v.lower())
+        if b is not None:
+            return b
+    return _Slow(v)
+
+
+def _coerce(field: ModelField) -> Optional[Read]:
+    """Returns what ``field`` (a singleton, or an item of a list) would make of
+    a value, for values whose validation is simple enough to do here, and a
+    ``_Slow`` for the others; None if there are none."""
+    tp = field.type_
+    config = field.model_config
+    if tp is int:
+        return _to_int
+    if tp is bool:
+        return _to_bool
+    if tp is float:
+        return _to_float if config.allow_inf_nan else None
+    if tp in _EXACT:
+        return lambda v: v if type(v) is tp else _Slow(v)
+    if tp is str:
+        strip = upper = lower = False
+        min_length = config.min_anystr_length
+        max_length = config.max_anystr_length
+    elif (
+        isinstance(tp, type)
+        and issubclass(tp, ConstrainedStr)
+        and tp.validate.__func__ is ConstrainedStr.validate.__func__
+        and tp.__get_validators__.__func__
+        is ConstrainedStr.__get_validators__.__func__
+        and tp.curtail_length is None
+        and tp.regex is None
+    ):
+        strip, upper, lower = tp.strip_whitespace, tp.to_upper, tp.to_lower
+        min_length = (
+            tp.min_length
+            if tp.min_length is not None
+            else config.min_anystr_length
+        )
+        max_length = (
+            tp.max_length
+            if tp.max_length is not None
+            else config.max_anystr_length
+        )
+    else:
+        return None
+    if (
+        strip
+        or upper
+        or lower
+        or config.anystr_strip_whitespace
+        or config.anystr_upper
+        or config.anystr_lower
+    ):
+        return None
+    if max_length is None:
+        max_length = float("inf")
+
+    def to_str(v: Any) -> Any:
+        if type(v) is str and min_length <= len(v) <= max_length:
+            return v
+        return _Slow(v)
+
+    return to_str
+
+
+def _reader(field: ModelField) -> Optional[Read]:
+    """Returns a value's validated form without validating it, or a ``_Slow``
+    for ``field.validate``; None if that is always needed."""
+    if (
+        field.class_validators
+        or field.pre_validators
+        or field.post_validators
+        or field.field_info.const
+    ):
+        return None
+    if field.shape == SHAPE_SINGLETON:
+        item, allow_none = field, field.allow_none
+    elif field.shape == SHAPE_LIST and field.sub_fields:
+        item, allow_none = field.sub_fields[0], field.sub_fields[0].allow_none
+    else:
+        return None
+
+    tp = _nested_model(item)
+    if tp is not None:
+        to_dict = _to_dict(item)
+
+        def one(value: Any) -> Any:
+            # a new instance stands for the copy validation would make
+            if value is None or isinstance(value, (dict, BaseModel)):
+                return _Slow(value)
+            plan = _plan(tp)
+            m = _hydrate(tp, plan, plan.getter(value))
+            return _Slow(to_dict(value)) if m is None else m
+
+    else:
+        one = _coerce(item)
+        if one is None:
+            return None
+
+    if field.shape == SHAPE_SINGLETON:
+        if allow_none:
+            return lambda v: None if v is None else one(v)
+        return one
+
+    def many(value: Any) -> Any:
+        if not isinstance(value, (list, tuple)):
+            return _Slow(value)
+        items = []
+        for v in value:
+            if v is None and allow_none:
+                items.append(v)
+                continue
+            v = one(v)
+            if type(v) is _Slow:
+                return _Slow(_to_dict(field)(value) if tp else value)
+            items.append(v)
+        return items
+
+    return many
+
+
+def _plan(model: Type[BaseModel]) -> _Plan:
+    try:
+        return _plans[model]
+    except KeyError:
+        pass
+    allow_name = model.__config__.allow_population_by_field_name
+    # stored before the fields are planned, for self-referencing models
+    plan = _plans[model] = _Plan(_getter(model))
+    for name, field in model.__fields__.items():
+        keys: Tuple[str, ...] = (field.alias,)
+        if allow_name and field.alt_alias:
+            keys += (field.name,)
+        plan.keys.append((keys, _to_dict(field)))
+        plan.fields.append((name, keys, field, _reader(field)))
+    if model.__pre_root_validators__ or model.__post_root_validators__:
+        plan.fields = None
+    return plan
+
+
+def _values(plan: _Plan, get: Get) -> Dict[str, Any]:
+    # what validate_model reads from GetterDict(obj): each field under the
+    # first key that obj has an attribute for
+    data = {}
+    for keys, to_dict in plan.keys:
+        for key in keys:
+            value = get(key, _MISSING)
+            if value is not _MISSING:
+                data[key] = value if to_dict is None else to_dict(value)
+                break
+    return data
+
+
+def _validate(model: Type[BaseModel], data: Dict[str, Any]) -> BaseModel:
+    # the second half of BaseModel.from_orm
+    m = model.__new__(model)
+    values, fields_set, validation_error = validate_model(model, data)
+    if validation_error:
+        raise validation_error
+    object_setattr(m, "__dict__", values)
+    object_setattr(m, "__fields_set__", fields_set)
+    m._init_private_attributes()
+    return m
+
+
+def _hydrate(model: Type[BaseModel], plan: _Plan, get: Get) -> Any:
+    """The instance of ``model`` read with ``get``, or None if pydantic has to
+    validate the row as a whole."""
+    if plan.fields is None:
+        return None
+    values: Dict[str, Any] = {}
+    for name, keys, field, read in plan.fields:
+        for key in keys:
+            value = get(key, _MISSING)
+            if value is not _MISSING:
+                break
+        else:
+            # for the default
+            return None
+        if read is not None:
+            value = read(value)
+            if type(value) is not _Slow:
+                values[name] = value
+                continue
+            value = value.value
+        value, error = field.validate(
+            value, values, loc=field.alias, cls=model
+        )
+        if error:
+            return None
+        values[name] = value
+    m = model.__new__(model)
+    object_setattr(m, "__dict__", values)
+    object_setattr(m, "__fields_set__", set(values))
+    m._init_private_attributes()
+    return m
+
+
+def _is_entity(model: Type[BaseModel], fields: Tuple[str, ...]) -> bool:
+    """Whether rows with columns ``fields`` hold an entity rather than the
+    model's fields."""
+    key = (model, fields)
+    try:
+        return _entities[key]
+    except KeyError:
+        pass
+    names = {name for keys, _ in _plan(model).keys for name in keys}
+    entity = _entities[key] = len(fields) == 1 and not names & set(fields)
+    return entity
+
+
+def _row_get(model: Type[BaseModel], row: Any) -> Get:
+    if isinstance(row, Mapping):
+        return row.get
+    # Row tuples and named tuples
+    fields = getattr(row, "_fields", None)
+    if fields is None:
+        return partial(getattr, row)
+    if _is_entity(model, fields):
+        return partial(getattr, row[0])
+    return dict(zip(fields, row)).get
+
+
+def orm_reader(model: Type[BaseModel]) -> Callable[[Any], Any]:
+    """``model.from_orm`` for one row at a time, reading rows the way
+    :func:`from_orm_many` does."""
+    if not model.__config__.orm_mode:
+        raise ConfigError(
+            "You must have the config attribute orm_mode=True to use from_orm"
+        )
+    if not _plannable(model):
+        return model.from_orm
+    plan = _plan(model)
+    getter = plan.getter
+    if model.__config__.getter_dict is GetterDict:
+        getter = partial(_row_get, model)
+
+    def read(row: Any) -> Any:
+        get = getter(row)
+        m = _hydrate(model, plan, get)
+        return _validate(model, _values(plan, get)) if m is None else m
+
+    return read
+
+
+def from_orm_many(model: Type[BaseModel], rows: Iterable[Any]) -> List[Any]:
+    """``[model.from_orm(row) for row in rows]``, with the lookups planned once
+    and values that need no validation taken as they are."""
+    read = orm_reader(model)
+    return [read(row) for row in rows]
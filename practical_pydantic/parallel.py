@@ -0,0 +1,137 @@
+"""Batch validation of raw payloads across a process pool.
+
+``Model(**data)`` validates on one core. :func:`validate_many` shards the
+records into chunks, validates each chunk in a worker process and sends
+the instances back through pickle, which for pydantic models is the
+``__getstate__``/``__setstate__`` pair shown in
+``export-models/pickle-dumps.py``: the parent only restores ``__dict__``
+and ``__fields_set__``, it never re-validates. A chunk is pickled as one
+list, so the model class is written once per chunk rather than once per
+instance.
+
+The model class travels to the workers by reference, so it has to be
+importable from its module there. That is always the case with the
+``fork`` start method (the default on Linux); with ``spawn`` the model
+must live in an importable module rather than in ``__main__`` or in one
+of the example scripts loaded by :mod:`practical_pydantic.examples`.
+"""
+
+import dataclasses
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import islice
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
+
+from pydantic import BaseModel, ValidationError
+
+MIN_CHUNK_SIZE = 100
+MAX_CHUNK_SIZE = 10_000
+
+
+@dataclasses.dataclass
+class BatchResult:
+    """Validated instances in input order, with ``None`` in place of each
+    record that failed; the failures are in :attr:`errors` by index."""
+
+    models: List[Optional[BaseModel]]
+    errors: Dict[int, ValidationError]
+
+    @property
+    def valid(self) -> List[BaseModel]:
+        return [m for m in self.models if m is not None]
+
+
+_Chunk = Tuple[List[Optional[BaseModel]], Dict[int, ValidationError]]
+
+
+def _validate_chunk(
+    model: Type[BaseModel], start: int, records: Sequence[Any]
+) -> _Chunk:
+    parse_obj = model.parse_obj
+    models: List[Optional[BaseModel]] = []
+    errors = {}
+    for i, record in enumerate(records, start):
+        try:
+            models.append(parse_obj(record))
+        except ValidationError as e:
+            models.append(None)
+            errors[i] = e
+    return models, errors
+
+
+def _chunks(
+    records: Iterable[Any], chunk_size: int
+) -> Iterator[Tuple[int, List[Any]]]:
+    iterator = iter(records)
+    start = 0
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+def default_chunk_size(records: int, workers: int) -> int:
+    """About four chunks per worker, so that uneven chunks balance out, within
+    ``MIN_CHUNK_SIZE`` and ``MAX_CHUNK_SIZE``."""
+    size = -(-records // (workers * 4))
+    return max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, size))
+
+
+def validate_many(
+    model: Type[BaseModel],
+    records: Iterable[Any],
+    *,
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    executor: Optional[Executor] = None,
+) -> BatchResult:
+    """Validate every record with ``model.parse_obj`` using ``workers``
+    processes (default: one per CPU).
+
+    Pass an ``executor`` to reuse a pool across calls instead of
+    starting one per call. Small batches, and ``workers=1``, are
+    validated in this process since the pool would only add overhead.
+    """
+    if not isinstance(records, Sequence):
+        records = list(records)
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = default_chunk_size(len(records), workers)
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    if executor is None and (workers == 1 or len(records) <= chunk_size):
+        return BatchResult(*_validate_chunk(model, 0, records))
+
+    chunks = list(_chunks(records, chunk_size))
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        results = executor.map(
+            _validate_chunk,
+            [model] * len(chunks),
+            [start for start, _ in chunks],
+            [chunk for _, chunk in chunks],
+        )
+        models: List[Optional[BaseModel]] = []
+        errors: Dict[int, ValidationError] = {}
+        for chunk_models, chunk_errors in results:
+            models.extend(chunk_models)
+            errors.update(chunk_errors)
+    finally:
+        if own_executor:
+            executor.shutdown()
+    return BatchResult(models, errors)
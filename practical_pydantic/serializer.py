@@ -0,0 +1,560 @@
+"""Compiled, per-model ``dict()``/``json()`` serializers.
+
+``BaseModel.dict()`` walks ``__dict__`` through the generic ``_iter`` and
+``_get_value`` machinery on every call. For a given model class most of
+that work can be decided once: which fields are emitted, under which key,
+and which values are plain scalars that can be copied as they are. This
+module generates the source of a specialised function per model, with
+nested sub-models (and lists of them) inlined, and ``exec``s it once::
+
+    >>> dump = compile_dict(FooBarModel)
+    >>> dump(m) == m.dict()
+    True
+    >>> compile_json(FooBarModel)(m) == m.json()
+    True
+
+``include``/``exclude`` specs can be compiled in as well, in which case
+they are resolved against the model tree once instead of on every call
+(see :mod:`practical_pydantic.masks`).
+
+Anything the generated code does not have a fast path for (unions, dicts
+of models, subclass instances, ``construct()``-ed instances with missing
+fields, extra fields, ...) is handed to the model's own ``_get_value`` so
+the output stays identical to pydantic's.
+"""
+
+import inspect
+from collections import deque
+from collections.abc import Mapping, Set
+from enum import Enum
+from functools import partial
+from types import GeneratorType
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel
+from pydantic.fields import (
+    SHAPE_DICT,
+    SHAPE_FROZENSET,
+    SHAPE_LIST,
+    SHAPE_MAPPING,
+    SHAPE_SET,
+    SHAPE_SINGLETON,
+    SHAPE_TUPLE_ELLIPSIS,
+    ModelField,
+)
+from pydantic.types import JsonWrapper
+from pydantic.utils import ROOT_KEY, ValueItems
+from typing_extensions import Literal, get_args, get_origin
+
+DictSerializer = Callable[[BaseModel], Any]
+JsonSerializer = Callable[[BaseModel], str]
+
+# a frozen include/exclude spec: True, or a frozenset of (key, spec) pairs
+FrozenSpec = Union[bool, frozenset]
+
+_CONTAINERS = (
+    BaseModel,
+    dict,
+    list,
+    tuple,
+    set,
+    frozenset,
+    deque,
+    GeneratorType,
+    JsonWrapper,
+)
+
+# sets are rebuilt from an iterator, like ``_get_value`` does, so that
+# their iteration order (and therefore the JSON output) matches
+_COPY_SHAPES = {
+    SHAPE_LIST: ("list", "{}"),
+    SHAPE_SET: ("set", "iter({})"),
+    SHAPE_FROZENSET: ("frozenset", "iter({})"),
+    SHAPE_TUPLE_ELLIPSIS: ("tuple", "{}"),
+}
+
+# list plans are cached per list length, up to this many lengths per field
+MAX_PLANS = 64
+
+_CacheKey = Tuple[Type[BaseModel], bool, Optional[FrozenSpec], Any]
+_cache: Dict[_CacheKey, DictSerializer] = {}
+_json_cache: Dict[_CacheKey, JsonSerializer] = {}
+
+
+def freeze_spec(spec: Any) -> Optional[FrozenSpec]:
+    """Convert an include/exclude spec into a hashable, order-independent form;
+    ``...`` and ``True`` both become ``True``."""
+    if spec is None:
+        return None
+    if ValueItems.is_true(spec):
+        return True
+    if isinstance(spec, frozenset) and all(
+        isinstance(item, tuple) for item in spec
+    ):
+        return spec
+    if isinstance(spec, Set):
+        return frozenset((key, True) for key in spec)
+    if isinstance(spec, Mapping):
+        return frozenset(
+            (key, freeze_spec(value))
+            for key, value in spec.items()
+            if value is not None
+        )
+    raise TypeError(f"unexpected include/exclude spec {spec!r}")
+
+
+def thaw_spec(spec: Optional[FrozenSpec]) -> Any:
+    """Convert a frozen spec back into the dicts pydantic accepts."""
+    if spec is None or spec is True:
+        return spec
+    return {
+        key: ... if value is True else thaw_spec(value) for key, value in spec
+    }
+
+
+def _is_leaf_type(model: Type[BaseModel], tp: Any) -> bool:
+    """Whether ``_get_value`` returns values of type ``tp`` unchanged."""
+    if get_origin(tp) is Literal:
+        return all(
+            isinstance(arg, (str, int, bytes)) or arg is None
+            for arg in get_args(tp)
+        )
+    if not inspect.isclass(tp) or tp is object:
+        return False
+    if issubclass(tp, Enum):
+        return not getattr(model.Config, "use_enum_values", False)
+    return not issubclass(tp, _CONTAINERS)
+
+
+def _is_leaf(model: Type[BaseModel], field: ModelField) -> bool:
+    return (
+        field.shape == SHAPE_SINGLETON
+        and not field.sub_fields
+        and _is_leaf_type(model, field.type_)
+    )
+
+
+def _is_model(field: ModelField) -> bool:
+    return (
+        not field.sub_fields
+        and inspect.isclass(field.type_)
+        and issubclass(field.type_, BaseModel)
+    )
+
+
+def field_specs(
+    model: Type[BaseModel], include: Any = None, exclude: Any = None
+) -> Tuple[Optional[Dict[Any, Any]], Optional[Dict[Any, Any]]]:
+    """Merge ``include``/``exclude`` with the class-level specs of ``model``
+    (``Field(include=..., exclude=...)``) the way ``_iter`` does."""
+    if exclude is not None or model.__exclude_fields__ is not None:
+        exclude = ValueItems.merge(model.__exclude_fields__, exclude)
+    if include is not None or model.__include_fields__ is not None:
+        include = ValueItems.merge(
+            model.__include_fields__, include, intersect=True
+        )
+    return include, exclude
+
+
+def _for_element(spec: Optional[Dict[Any, Any]], key: Any) -> Any:
+    if spec is None:
+        return None
+    item = spec.get(key)
+    return None if ValueItems.is_true(item) else item
+
+
+def _generic(
+    model: Type[BaseModel], by_alias: bool, include: Any, exclude: Any
+) -> Callable[[Any], Any]:
+    return partial(
+        model._get_value,
+        to_dict=True,
+        by_alias=by_alias,
+        include=include,
+        exclude=exclude,
+        exclude_unset=False,
+        exclude_defaults=False,
+        exclude_none=False,
+    )
+
+
+class _ListPlan:
+    """Per-length plan for a list of sub-models with index-wise specs.
+
+    Negative indexes and ``__all__`` depend on the length of the list,
+    so they are resolved (with pydantic's own ``ValueItems``) the first
+    time a list of a given length is seen. The plan holds, for every
+    emitted index, the compiled serializer and the generic fallback to
+    use.
+    """
+
+    def __init__(
+        self,
+        parent: Type[BaseModel],
+        item: Type[BaseModel],
+        by_alias: bool,
+        include: Any,
+        exclude: Any,
+    ):
+        self.parent = parent
+        self.item = item
+        self.by_alias = by_alias
+        self.include = include
+        self.exclude = exclude
+        self.plans: Dict[int, List[Tuple[int, Callable, Callable]]] = {}
+
+    def __call__(self, length: int) -> List[Tuple[int, Callable, Callable]]:
+        try:
+            return self.plans[length]
+        except KeyError:
+            pass
+        placeholder = [None] * length
+        include = exclude = None
+        if self.include is not None:
+            include = ValueItems(placeholder, self.include)
+        if self.exclude is not None:
+            exclude = ValueItems(placeholder, self.exclude)
+        plan = []
+        for i in range(length):
+            if exclude is not None and exclude.is_excluded(i):
+                continue
+            if include is not None and not include.is_included(i):
+                continue
+            item_include = include and include.for_element(i)
+            item_exclude = exclude and exclude.for_element(i)
+            dump = compile_dict(
+                self.item,
+                by_alias=self.by_alias,
+                include=item_include,
+                exclude=item_exclude,
+            )
+            if self.item.__custom_root_type__:
+                dump = _unwrap_root(dump)
+            generic = _generic(
+                self.parent, self.by_alias, item_include, item_exclude
+            )
+            plan.append((i, dump, generic))
+        if len(self.plans) >= MAX_PLANS:
+            self.plans.clear()
+        self.plans[length] = plan
+        return plan
+
+
+def _unwrap_root(dump: DictSerializer) -> DictSerializer:
+    def unwrapped(m: BaseModel) -> Any:
+        return dump(m)[ROOT_KEY]
+
+    return unwrapped
+
+
+class _Compiler:
+    def __init__(self, by_alias: bool):
+        self.by_alias = by_alias
+        self.lines: List[str] = []
+        self.namespace: Dict[str, Any] = {}
+        self.counter = 0
+
+    def fresh(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def const(self, value: Any, prefix: str = "c") -> str:
+        name = self.fresh(prefix)
+        self.namespace[name] = value
+        return name
+
+    def emit(self, indent: int, line: str) -> None:
+        self.lines.append("    " * indent + line)
+
+    def generic(
+        self, model: Type[BaseModel], include: Any = None, exclude: Any = None
+    ) -> str:
+        return self.const(
+            _generic(model, self.by_alias, include, exclude), "g"
+        )
+
+    def submodel(
+        self,
+        tp: Type[BaseModel],
+        src: str,
+        target: str,
+        indent: int,
+        stack: Tuple[Type[BaseModel], ...],
+        fallback: str,
+        include: Any = None,
+        exclude: Any = None,
+    ) -> None:
+        """Emit ``target = <nested dict of src>`` for an instance of
+        ``tp``, which is what ``_get_value`` returns for sub-models."""
+        tp_name = self.const(tp, "M")
+        self.emit(
+            indent,
+            f"if type({src}) is {tp_name} "
+            f"and len({src}.__dict__) == {len(tp.__fields__)}:",
+        )
+        if tp in stack:
+            dump = _deferred(tp, self.by_alias, include, exclude)
+            if tp.__custom_root_type__:
+                dump = _unwrap_root(dump)
+            call = self.const(dump, "f")
+            self.emit(indent + 1, f"{target} = {call}({src})")
+        else:
+            body = self.body(
+                tp, src, indent + 1, stack + (tp,), include, exclude
+            )
+            if tp.__custom_root_type__:
+                body = body[ROOT_KEY]
+            else:
+                body = self.literal(body)
+            self.emit(indent + 1, f"{target} = {body}")
+        self.emit(indent, f"elif {src} is None:")
+        self.emit(indent + 1, f"{target} = None")
+        self.emit(indent, "else:")
+        self.emit(indent + 1, f"{target} = {fallback}({src})")
+
+    def masked_list(
+        self,
+        model: Type[BaseModel],
+        field: ModelField,
+        src: str,
+        indent: int,
+        include: Any,
+        exclude: Any,
+    ) -> str:
+        plan = self.const(
+            _ListPlan(model, field.type_, self.by_alias, include, exclude),
+            "plan",
+        )
+        fallback = self.generic(model, include, exclude)
+        tp_name = self.const(field.type_, "M")
+        v, r, i, f, g, x = (self.fresh(p) for p in "vrifgx")
+        self.emit(indent, f"{v} = {src}")
+        self.emit(indent, f"if type({v}) is list:")
+        self.emit(indent + 1, f"{r} = []")
+        self.emit(indent + 1, f"for {i}, {f}, {g} in {plan}(len({v})):")
+        self.emit(indent + 2, f"{x} = {v}[{i}]")
+        self.emit(
+            indent + 2,
+            f"if type({x}) is {tp_name} "
+            f"and len({x}.__dict__) == {len(field.type_.__fields__)}:",
+        )
+        self.emit(indent + 3, f"{r}.append({f}({x}))")
+        self.emit(indent + 2, "else:")
+        self.emit(indent + 3, f"{r}.append({g}({x}))")
+        self.emit(indent, "else:")
+        self.emit(indent + 1, f"{r} = {fallback}({v})")
+        return r
+
+    def value(
+        self,
+        model: Type[BaseModel],
+        field: ModelField,
+        src: str,
+        indent: int,
+        stack: Tuple[Type[BaseModel], ...],
+        include: Any = None,
+        exclude: Any = None,
+    ) -> str:
+        """Emit the statements converting ``src`` and return an expression
+        holding the converted value."""
+        masked = include is not None or exclude is not None
+        if _is_leaf(model, field):
+            return src
+        fallback = self.generic(model, include, exclude)
+        if field.shape == SHAPE_SINGLETON and _is_model(field):
+            v, r = self.fresh("v"), self.fresh("r")
+            self.emit(indent, f"{v} = {src}")
+            self.submodel(
+                field.type_, v, r, indent, stack, fallback, include, exclude
+            )
+            return r
+        if field.shape == SHAPE_LIST and _is_model(field.sub_fields[0]):
+            if masked:
+                return self.masked_list(
+                    model, field, src, indent, include, exclude
+                )
+            v, r, x, y = (self.fresh(p) for p in "vrxy")
+            self.emit(indent, f"{v} = {src}")
+            self.emit(indent, f"if type({v}) is list:")
+            self.emit(indent + 1, f"{r} = []")
+            self.emit(indent + 1, f"for {x} in {v}:")
+            self.submodel(field.type_, x, y, indent + 2, stack, fallback)
+            self.emit(indent + 2, f"{r}.append({y})")
+            self.emit(indent, "else:")
+            self.emit(indent + 1, f"{r} = {fallback}({v})")
+            return r
+        if masked:
+            return f"{fallback}({src})"
+        if field.shape in _COPY_SHAPES and field.sub_fields:
+            if _is_leaf(model, field.sub_fields[0]):
+                ctor, arg = _COPY_SHAPES[field.shape]
+                v = self.fresh("v")
+                self.emit(indent, f"{v} = {src}")
+                return (
+                    f"({ctor}({arg.format(v)}) if type({v}) is {ctor} "
+                    f"else {fallback}({v}))"
+                )
+        if field.shape in (SHAPE_DICT, SHAPE_MAPPING) and field.sub_fields:
+            if _is_leaf(model, field.key_field) and _is_leaf(
+                model, field.sub_fields[0]
+            ):
+                v = self.fresh("v")
+                self.emit(indent, f"{v} = {src}")
+                return f"(dict({v}) if type({v}) is dict else {fallback}({v}))"
+        return f"{fallback}({src})"
+
+    def body(
+        self,
+        model: Type[BaseModel],
+        src: str,
+        indent: int,
+        stack: Tuple[Type[BaseModel], ...],
+        include: Any = None,
+        exclude: Any = None,
+    ) -> Dict[str, str]:
+        """Emit the statements for the fields of ``model`` and return the
+        output keys mapped to their value expressions."""
+        include, exclude = field_specs(model, include, exclude)
+        d = self.fresh("d")
+        self.emit(indent, f"{d} = {src}.__dict__")
+        items = {}
+        for name, field in model.__fields__.items():
+            if include is not None and name not in include:
+                continue
+            if exclude is not None and ValueItems.is_true(exclude.get(name)):
+                continue
+            expr = self.value(
+                model,
+                field,
+                f"{d}[{name!r}]",
+                indent,
+                stack,
+                _for_element(include, name),
+                _for_element(exclude, name),
+            )
+            key = field.alias if self.by_alias else name
+            items[key] = expr
+        return items
+
+    @staticmethod
+    def literal(items: Dict[str, str]) -> str:
+        return "{" + ", ".join(f"{k!r}: {v}" for k, v in items.items()) + "}"
+
+    def compile(
+        self, model: Type[BaseModel], include: Any, exclude: Any
+    ) -> DictSerializer:
+        fallback = self.const(
+            partial(
+                _fallback_dict,
+                by_alias=self.by_alias,
+                include=include,
+                exclude=exclude,
+            ),
+            "fallback",
+        )
+        self.emit(0, "def dump(m):")
+        self.emit(1, f"if len(m.__dict__) != {len(model.__fields__)}:")
+        self.emit(2, f"return {fallback}(m)")
+        items = self.body(model, "m", 1, (model,), include, exclude)
+        self.emit(1, f"return {self.literal(items)}")
+        source = "\n".join(self.lines)
+        code = compile(source, f"<serializer {model.__qualname__}>", "exec")
+        exec(code, self.namespace)
+        dump = self.namespace["dump"]
+        dump.__name__ = dump.__qualname__ = f"dump_{model.__name__}"
+        dump.__source__ = source
+        return dump
+
+
+def _fallback_dict(
+    m: BaseModel, by_alias: bool, include: Any, exclude: Any
+) -> Dict[str, Any]:
+    return m.dict(by_alias=by_alias, include=include, exclude=exclude)
+
+
+def _deferred(
+    model: Type[BaseModel], by_alias: bool, include: Any, exclude: Any
+) -> DictSerializer:
+    # used for self-referencing models, whose serializer is still being
+    # compiled when the recursive call site is generated
+    def dump(m: BaseModel) -> Dict[str, Any]:
+        return compile_dict(
+            model, by_alias=by_alias, include=include, exclude=exclude
+        )(m)
+
+    return dump
+
+
+def compile_dict(
+    model: Type[BaseModel],
+    *,
+    by_alias: bool = False,
+    include: Any = None,
+    exclude: Any = None,
+) -> DictSerializer:
+    """Return a function equivalent to ``lambda m: m.dict(by_alias=...,
+    include=..., exclude=...)`` for instances of exactly ``model``.
+
+    Compiled functions are cached per model, ``by_alias`` and spec.
+    """
+    key = (model, by_alias, freeze_spec(include), freeze_spec(exclude))
+    try:
+        return _cache[key]
+    except KeyError:
+        pass
+    dump = _Compiler(by_alias).compile(
+        model, thaw_spec(key[2]), thaw_spec(key[3])
+    )
+    _cache[key] = dump
+    return dump
+
+
+def compile_json(
+    model: Type[BaseModel],
+    *,
+    by_alias: bool = False,
+    include: Any = None,
+    exclude: Any = None,
+) -> JsonSerializer:
+    """Return a function equivalent to ``lambda m: m.json(by_alias=...,
+    include=..., exclude=...)`` for instances of exactly ``model``.
+
+    Compiled functions are cached per model, ``by_alias`` and spec.
+    """
+    key = (model, by_alias, freeze_spec(include), freeze_spec(exclude))
+    try:
+        return _json_cache[key]
+    except KeyError:
+        pass
+    to_dict = compile_dict(
+        model, by_alias=by_alias, include=include, exclude=exclude
+    )
+    dumps = model.__config__.json_dumps
+    encoder = model.__json_encoder__
+
+    if model.__custom_root_type__:
+
+        def dump(m: BaseModel) -> str:
+            return dumps(to_dict(m)[ROOT_KEY], default=encoder)
+
+    else:
+
+        def dump(m: BaseModel) -> str:
+            return dumps(to_dict(m), default=encoder)
+
+    dump.__name__ = dump.__qualname__ = f"dump_json_{model.__name__}"
+    _json_cache[key] = dump
+    return dump
+
+
+def dump_dict(m: BaseModel, *, by_alias: bool = False) -> Dict[str, Any]:
+    return compile_dict(type(m), by_alias=by_alias)(m)
+
+
+def dump_json(m: BaseModel, *, by_alias: bool = False) -> str:
+    return compile_json(type(m), by_alias=by_alias)(m)
+
+
+def clear_cache() -> None:
+    _cache.clear()
+    _json_cache.clear()
@@ -0,0 +1,176 @@
+"""Updated copies of immutable models that share untouched subtrees.
+
+``m.copy(update=..., deep=True)`` deep-copies the whole tree to change one
+field, and ``m.copy(update=...)`` can only replace top-level fields. For a
+tree of immutable models neither copy is needed: :func:`evolve` rebuilds
+only the models (and lists, tuples and dicts) on the paths to the changed
+values and shares everything else with the original::
+
+    >>> m2 = evolve(m, {"bar.whatever": 124, "banana": 0})
+    >>> m2.bar.whatever, m.bar.whatever
+    (124, 123)
+    >>> m2.address is m.address  # untouched, so shared
+    True
+
+Keys of ``update`` are paths: dotted strings (``"hobbies.0.name"``, where
+digits index lists and tuples) or tuples of keys. As with ``copy()``, the
+new values are not validated, and every model on a path gets the changed
+field added to its ``__fields_set__``.
+
+Sharing is only safe when nothing in the tree can change, so every model
+class reachable from ``type(m)`` through its fields must have
+``allow_mutation = False`` (or ``frozen = True``); :func:`evolve` raises
+``TypeError`` otherwise. As in ``models/faux-immutability.py`` that
+protects the attributes, not the lists and dicts they hold, which callers
+must not modify. :class:`PersistentModel` is an immutable base class
+whose ``copy(update=..., deep=True)`` goes through :func:`evolve`.
+"""
+
+from typing import Any, Dict, Hashable, Mapping, Set, Tuple, Type, Union
+
+from pydantic import BaseModel
+from pydantic.fields import ModelField
+
+Path = Union[str, Tuple[Hashable, ...]]
+
+_immutable: Set[Type[BaseModel]] = set()
+
+
+def _field_models(field: ModelField) -> Set[Type[BaseModel]]:
+    tp = field.type_
+    found = set()
+    if isinstance(tp, type) and issubclass(tp, BaseModel):
+        found.add(tp)
+    for sub in field.sub_fields or ():
+        found |= _field_models(sub)
+    return found
+
+
+def check_immutable(model: Type[BaseModel]) -> None:
+    """Raise ``TypeError`` unless ``model`` and every model class it refers to
+    are immutable."""
+    if model in _immutable:
+        return
+    seen: Set[Type[BaseModel]] = set()
+    todo = [model]
+    while todo:
+        current = todo.pop()
+        if current in seen or current in _immutable:
+            continue
+        seen.add(current)
+        config = current.__config__
+        if config.allow_mutation and not config.frozen:
+            raise TypeError(
+                f"{current.__name__} allows mutation, so a copy cannot "
+                f"share it; set allow_mutation = False in its Config"
+            )
+        for field in current.__fields__.values():
+            todo.extend(_field_models(field))
+    _immutable.update(seen)
+
+
+def _split(path: Path) -> Tuple[Hashable, ...]:
+    parts = tuple(path.split(".")) if isinstance(path, str) else path
+    if not parts or any(p == "" for p in parts):
+        raise ValueError(f"invalid path {path!r}")
+    return parts
+
+
+class _Replace:
+    """A leaf of the change tree: the new value."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+def _changes(update: Mapping[Path, Any]) -> Dict[Hashable, Any]:
+    """Turn ``{"a.b": 1, "a.c": 2}`` into ``{"a": {"b": _Replace(1), "c":
+
+    _Replace(2)}}``.
+    """
+    tree: Dict[Hashable, Any] = {}
+    for path, value in update.items():
+        parts = _split(path)
+        node = tree
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+            if isinstance(node, _Replace):
+                raise ValueError(f"{path!r} changes a value that is replaced")
+        if parts[-1] in node:
+            raise ValueError(f"{path!r} conflicts with another path")
+        node[parts[-1]] = _Replace(value)
+    return tree
+
+
+def _index(node: Any, key: Hashable) -> Any:
+    if type(node) in (list, tuple) and isinstance(key, str):
+        try:
+            return int(key)
+        except ValueError:
+            raise KeyError(key) from None
+    return key
+
+
+def _apply(node: Any, changes: Dict[Hashable, Any], path: str) -> Any:
+    if isinstance(node, BaseModel):
+        values = dict(node.__dict__)
+        fields_set = set(node.__fields_set__)
+        for key, change in changes.items():
+            if key not in values:
+                raise KeyError(f"{path}{key}: no such field")
+            if isinstance(change, _Replace):
+                values[key] = change.value
+            else:
+                values[key] = _apply(values[key], change, f"{path}{key}.")
+            fields_set.add(key)
+        return node._copy_and_set_values(values, fields_set, deep=False)
+    if type(node) in (list, tuple, dict):
+        copied = list(node) if type(node) is tuple else node.copy()
+        for key, change in changes.items():
+            index = _index(node, key)
+            try:
+                current = copied[index]
+            except (IndexError, KeyError, TypeError):
+                raise KeyError(f"{path}{key}: no such item") from None
+            if isinstance(change, _Replace):
+                copied[index] = change.value
+            else:
+                copied[index] = _apply(current, change, f"{path}{key}.")
+        return tuple(copied) if type(node) is tuple else copied
+    raise TypeError(f"{path[:-1]}: cannot change items of {type(node)}")
+
+
+def evolve(m: BaseModel, update: Mapping[Path, Any]) -> BaseModel:
+    """A copy of ``m`` with the values at the paths in ``update`` replaced,
+    sharing every untouched subtree with ``m``."""
+    check_immutable(type(m))
+    if not update:
+        return m._copy_and_set_values(
+            dict(m.__dict__), set(m.__fields_set__), deep=False
+        )
+    return _apply(m, _changes(update), "")
+
+
+class PersistentModel(BaseModel):
+    """An immutable model whose deep copies share untouched subtrees."""
+
+    class Config:
+        allow_mutation = False
+
+    def copy(
+        self,
+        *,
+        include: Any = None,
+        exclude: Any = None,
+        update: Any = None,
+        deep: bool = False,
+    ) -> Any:
+        """``copy()``; with ``deep=True`` and no ``include``/``exclude`` the
+        copy is made by :func:`evolve`, so ``update`` may use paths."""
+        if deep and include is None and exclude is None:
+            return evolve(self, update or {})
+        return super().copy(
+            include=include, exclude=exclude, update=update, deep=deep
+        )
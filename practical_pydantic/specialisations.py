@@ -0,0 +1,238 @@
+"""A bounded, measured cache of parametrised generic models.
+
+Every ``Response[int]`` of ``models/generic-models.py`` is a new class,
+built by pydantic the first time it is asked for and kept in
+``pydantic.generics._generic_types_cache``. That cache only drops the
+oldest classes once it holds a thousand, and classes parametrised at
+module level are also referenced from the module's globals (so they can
+be pickled), where they stay for good. Services that parametrise models
+per tenant or per request keep accumulating classes, and the first
+request for each pays for building it.
+
+:func:`install_cache` puts a :class:`SpecialisationCache` in place of
+pydantic's cache. It holds at most ``maxsize`` classes, dropping the
+least recently used one (from pydantic's caches and from the module
+globals) once there are more, and counts hits, misses, classes created
+and evicted. :func:`prewarm` pins the classes a service needs, built at
+startup rather than on the first request, so they are never evicted::
+
+    >>> cache = install_cache(maxsize=256)
+    >>> prewarm([Response[int], Response[DataModel]])
+    2
+    >>> Response[int] is Response[int]
+    True
+    >>> cache.cache_info()
+    SpecialisationInfo(hits=1, misses=2, creations=2, evictions=0, ...)
+
+Generic models need no changes, and classes built before the cache was
+installed are carried over. An evicted class lives on as long as
+something refers to it (instances, a subclass, a model with a field of
+that type), but asking for the same parameters again builds a new class,
+which is neither the evicted one nor a base of its subclasses, and
+instances of the evicted class can no longer be pickled. The bound
+should hold the classes in use at the same time; classes other models
+are built from, such as ``InnerT[int]`` for ``OuterT[int]``, are best
+prewarmed as well.
+"""
+
+import dataclasses
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+from pydantic import BaseModel
+from pydantic import generics as pydantic_generics
+from pydantic.generics import GenericModel
+
+DEFAULT_MAXSIZE = 256
+
+
+@dataclasses.dataclass(frozen=True)
+class SpecialisationInfo:
+    hits: int
+    misses: int
+    creations: int
+    evictions: int
+    currsize: int
+    maxsize: int
+    pinned: int
+
+
+class SpecialisationCache(dict):
+    """Drop-in replacement for ``pydantic.generics._generic_types_cache``,
+    holding at most ``maxsize`` classes besides the pinned ones and evicting
+    the least recently used.
+
+    pydantic stores each class under several keys (``Response[int]`` is
+    looked up as ``int`` and as ``(int,)``), so the bound and the
+    counters are per class, not per key.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        super().__init__()
+        self.maxsize = maxsize
+        # class -> its keys, least recently used first
+        self._classes: "OrderedDict[Type[BaseModel], List[Any]]" = (
+            OrderedDict()
+        )
+        self._pinned: Dict[Type[BaseModel], List[Any]] = {}
+        self._lock = threading.Lock()
+        self._hits = self._misses = 0
+        self._creations = self._evictions = 0
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        with self._lock:
+            model = dict.get(self, key)
+            if model is None:
+                self._misses += 1
+                return default
+            self._hits += 1
+            if model in self._classes:
+                self._classes.move_to_end(model)
+            return model
+
+    def __setitem__(self, key: Any, model: Type[BaseModel]) -> None:
+        with self._lock:
+            dict.__setitem__(self, key, model)
+            keys = self._pinned.get(model)
+            if keys is None:
+                keys = self._classes.get(model)
+            if keys is not None:
+                keys.append(key)
+                return
+            self._creations += 1
+            self._classes[model] = [key]
+            while len(self._classes) > self.maxsize:
+                self._evict(*self._classes.popitem(last=False))
+
+    def _evict(self, model: Type[BaseModel], keys: List[Any]) -> None:
+        self._evictions += 1
+        for key in keys:
+            if dict.get(self, key) is model:
+                dict.__delitem__(self, key)
+        pydantic_generics._assigned_parameters.pop(model, None)
+        # the global references pydantic makes for pickling: the class
+        # name, followed by as many "_" as it took to find a free one
+        module = sys.modules.get(model.__module__)
+        namespace = vars(module) if module is not None else {}
+        name = model.__name__
+        while name in namespace:
+            if namespace[name] is model:
+                del namespace[name]
+                break
+            name += "_"
+
+    def pin(self, model: Type[BaseModel]) -> bool:
+        """Keep ``model`` (and the cached classes it derives from) out of
+        eviction; False if it is not in the cache."""
+        with self._lock:
+            if model not in self._classes and model not in self._pinned:
+                return False
+            for cls in model.__mro__:
+                keys = self._classes.pop(cls, None)
+                if keys is not None:
+                    self._pinned[cls] = keys
+            return True
+
+    def unpin(self, model: Type[BaseModel]) -> None:
+        """Let ``model`` be evicted again, as the most recently used."""
+        with self._lock:
+            keys = self._pinned.pop(model, None)
+            if keys is not None:
+                self._classes[model] = keys
+                while len(self._classes) > self.maxsize:
+                    self._evict(*self._classes.popitem(last=False))
+
+    def prewarm(
+        self, models: Iterable[Type[BaseModel]], *, pin: bool = True
+    ) -> int:
+        """Mark the parametrised ``models`` (built by evaluating e.g.
+        ``Response[int]``) as just used, and pin them unless ``pin`` is False;
+        returns the number of them found in the cache."""
+        found = 0
+        for model in models:
+            if pin:
+                found += self.pin(model)
+                continue
+            with self._lock:
+                if model in self._classes:
+                    self._classes.move_to_end(model)
+                    found += 1
+                elif model in self._pinned:
+                    found += 1
+        return found
+
+    def cache_info(self) -> SpecialisationInfo:
+        with self._lock:
+            return SpecialisationInfo(
+                hits=self._hits,
+                misses=self._misses,
+                creations=self._creations,
+                evictions=self._evictions,
+                currsize=len(self._classes) + len(self._pinned),
+                maxsize=self.maxsize,
+                pinned=len(self._pinned),
+            )
+
+    def clear(self) -> None:
+        """Evict every class, pinned or not, and reset the counters."""
+        with self._lock:
+            for entries in (self._classes, self._pinned):
+                for model, keys in list(entries.items()):
+                    self._evict(model, keys)
+                entries.clear()
+            dict.clear(self)
+            self._hits = self._misses = 0
+            self._creations = self._evictions = 0
+
+    def _adopt(self, entries: Dict[Any, Type[BaseModel]]) -> None:
+        # pydantic's own cache, oldest first
+        for key, model in entries.items():
+            self[key] = model
+        self._creations = self._evictions = 0
+
+
+_installed: Optional[SpecialisationCache] = None
+
+
+def install_cache(maxsize: int = DEFAULT_MAXSIZE) -> SpecialisationCache:
+    """Replace pydantic's cache of parametrised generic models with a
+    :class:`SpecialisationCache` of ``maxsize`` classes, holding the
+    classes built so far (the most recent ``maxsize`` of them)."""
+    global _installed
+    cache = SpecialisationCache(maxsize)
+    current = pydantic_generics._generic_types_cache
+    cache._adopt(current)
+    if maxsize >= pydantic_generics._assigned_parameters.size_limit:
+        # or pydantic would forget the parameters of cached classes
+        pydantic_generics._assigned_parameters.size_limit = maxsize * 2
+    pydantic_generics._generic_types_cache = cache
+    _installed = cache
+    return cache
+
+
+def uninstall_cache() -> None:
+    """Go back to pydantic's own cache, keeping the cached classes."""
+    global _installed
+    if _installed is None:
+        return
+    restored = pydantic_generics.LimitedDict()
+    restored.update(_installed)
+    pydantic_generics._generic_types_cache = restored
+    _installed = None
+
+
+def installed_cache() -> Optional[SpecialisationCache]:
+    """The cache put in place by :func:`install_cache`, if any."""
+    return _installed
+
+
+def prewarm(models: Iterable[Type[GenericModel]], *, pin: bool = True) -> int:
+    """Pin the parametrised ``models``, as built at startup, in the installed
+    cache (installing one first if needed); returns the number of them that are
+    cached."""
+    cache = _installed or install_cache()
+    return cache.prewarm(models, pin=pin)
@@ -0,0 +1,367 @@
+"""Incremental JSON encoding and decoding of large collections of models.
+
+``parse_obj_as(List[Item], ...)`` results and list fields such as
+``User.friends`` are normally dumped by building one list and one string
+for the whole collection. :func:`iter_json` instead encodes the models a
+chunk at a time with each model's own configured ``json_dumps`` (so
+``OrjsonUser`` goes through orjson) and yields the pieces of a single JSON
+array, and :func:`write_json` writes those pieces to a file as they are
+produced. Memory use depends on ``chunk_size``, not on the number of
+models, as long as ``models`` is itself lazy (a generator, a cursor, ...).
+
+In the other direction, :func:`iter_parse` reads a JSON array or
+newline-delimited JSON from a file, path or buffer and validates each
+element as soon as it is complete, so the whole document is never decoded
+at once. Paths are memory-mapped (unless ``use_mmap=False``) and buffers
+such as a ``memoryview`` or an ``mmap`` are split where they are, so only
+the bytes of one element at a time are copied out. Items that fail
+validation are reported on the returned :class:`ParseStream` (or to an
+``on_error`` callback) and parsing carries on with the next item.
+"""
+
+import dataclasses
+import io
+import mmap
+import os
+import re
+from itertools import islice
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Type,
+    Union,
+)
+
+from pydantic import BaseModel, ValidationError
+
+from practical_pydantic.mapped import default_loads
+from practical_pydantic.masks import Mask
+from practical_pydantic.serializer import JsonSerializer, compile_json
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_READ_SIZE = 1 << 16
+
+
+class _Encoders(dict):
+    """``.json()``-equivalent encoders looked up by model class."""
+
+    def __init__(self, by_alias: bool, mask: Optional[Mask]):
+        super().__init__()
+        self.by_alias = by_alias
+        self.mask = mask
+
+    def __missing__(self, model: Type[BaseModel]) -> JsonSerializer:
+        if self.mask is not None and model is self.mask.model:
+            encode = self.mask.json_serializer(self.by_alias)
+        else:
+            encode = compile_json(model, by_alias=self.by_alias)
+        self[model] = encode
+        return encode
+
+
+def _text(encoded: Any) -> str:
+    # json_dumps is free to return bytes, e.g. a bare orjson.dumps
+    return encoded.decode() if isinstance(encoded, bytes) else encoded
+
+
+def iter_json(
+    models: Iterable[BaseModel],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    *,
+    by_alias: bool = False,
+    mask: Optional[Mask] = None,
+) -> Iterator[str]:
+    """Yield the text of a JSON array holding ``models``, one chunk of
+    ``chunk_size`` models per yielded string.
+
+    Each element is exactly what the model's ``.json()`` would produce
+    (or ``mask.json()`` for instances of ``mask.model``).
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    encoders = _Encoders(by_alias, mask)
+    iterator = iter(models)
+    prefix = "["
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            break
+        yield prefix + ",".join(_text(encoders[type(m)](m)) for m in chunk)
+        prefix = ","
+    yield "]" if prefix == "," else "[]"
+
+
+def write_json(
+    models: Iterable[BaseModel],
+    fileobj: IO,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    *,
+    by_alias: bool = False,
+    mask: Optional[Mask] = None,
+    encoding: str = "utf-8",
+) -> int:
+    """Write ``models`` to ``fileobj`` as a JSON array, chunk by chunk, and
+    return the number of characters (or bytes) written.
+
+    Text files receive ``str``; anything that is not an
+    :class:`io.TextIOBase` is treated as a binary file and receives
+    ``encoding``-encoded bytes.
+    """
+    binary = not isinstance(fileobj, io.TextIOBase)
+    written = 0
+    for piece in iter_json(models, chunk_size, by_alias=by_alias, mask=mask):
+        data = piece.encode(encoding) if binary else piece
+        fileobj.write(data)
+        written += len(data)
+    return written
+
+
+Source = Union[bytes, bytearray, memoryview, mmap.mmap, str, os.PathLike, IO]
+
+_ARRAY_TOKEN = re.compile(rb'[\[\]{},"]')
+_STRING_TAIL = re.compile(rb'(?:[^"\\]|\\.)*"', re.DOTALL)
+_NON_SPACE = re.compile(rb"\S")
+_LINE = re.compile(rb"([^\n]*)\n")
+_BUFFERS = (bytes, bytearray, memoryview, mmap.mmap)
+
+
+class StreamFormatError(ValueError):
+    """The document is not a JSON array or newline-delimited JSON."""
+
+
+@dataclasses.dataclass
+class ItemError:
+    index: int
+    error: Exception
+    raw: Any
+
+
+class _ArraySplitter:
+    """Split a JSON array, fed in arbitrary chunks, into the raw bytes of its
+    top-level elements without decoding them."""
+
+    def __init__(self) -> None:
+        self.buf = b""
+        self.pos = 0
+        self.depth = 0
+        self.start: Optional[int] = None
+        self.items = 0
+        self.done = False
+
+    def feed(self, chunk: bytes) -> Iterator[bytes]:
+        if self.done:
+            if _NON_SPACE.search(chunk):
+                raise StreamFormatError("data after the JSON array")
+            return
+        keep = self.start or 0
+        buf = self.buf[keep:]
+        # a whole buffer, such as a mapped file, is used where it is
+        buf = self.buf = buf + chunk if buf else chunk
+        self.pos -= keep
+        if self.start is not None:
+            self.start = 0
+        pos = self.pos
+        while not self.done:
+            match = _ARRAY_TOKEN.search(buf, pos)
+            if match is None:
+                pos = len(buf)
+                break
+            if self.depth == 0:
+                first = _NON_SPACE.search(buf, pos)
+                if first.start() != match.start() or buf[first.start()] != 91:
+                    raise StreamFormatError("expected a JSON array")
+            at, pos = match.span()
+            char = buf[at]
+            if char == 34:  # '"'
+                tail = _STRING_TAIL.match(buf, pos)
+                if tail is None:
+                    pos = at
+                    break
+                pos = tail.end()
+            elif char in b"[{":
+                self.depth += 1
+                if self.depth == 1:
+                    self.start = pos
+            elif char in b"]}":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.done = True
+                    start, self.start = self.start, None
+                    element = bytes(buf[start:at])
+                    if _NON_SPACE.search(element):
+                        yield element
+                    elif self.items:
+                        raise StreamFormatError("comma before ']'")
+            elif self.depth == 1:  # ','
+                start, self.start = self.start, pos
+                element = bytes(buf[start:at])
+                if not _NON_SPACE.search(element):
+                    raise StreamFormatError("missing array element")
+                self.items += 1
+                yield element
+        self.pos = pos
+        if self.done and _NON_SPACE.search(buf, pos):
+            raise StreamFormatError("data after the JSON array")
+
+    def close(self) -> None:
+        if not self.done:
+            raise StreamFormatError("unterminated JSON array")
+
+
+class _LineSplitter:
+    def __init__(self) -> None:
+        self.buf = b""
+
+    def feed(self, chunk: bytes) -> Iterator[bytes]:
+        buf = self.buf + chunk if self.buf else chunk
+        if type(buf) is bytes:
+            lines = buf.split(b"\n")
+            self.buf = lines.pop()
+            for line in lines:
+                if line.strip():
+                    yield line
+            return
+        # memoryviews and mapped files cannot be split() without a copy
+        end = 0
+        for match in _LINE.finditer(buf):
+            end = match.end()
+            line = bytes(match.group(1))
+            if line.strip():
+                yield line
+        self.buf = bytes(buf[end:])
+
+    def close(self) -> Iterator[bytes]:
+        if self.buf.strip():
+            yield self.buf
+        self.buf = b""
+
+
+def _chunks(source: Source, read_size: int, use_mmap: bool) -> Iterator[Any]:
+    if isinstance(source, _BUFFERS):
+        yield source
+        return
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            # empty files cannot be mapped
+            if use_mmap and os.fstat(f.fileno()).st_size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                    yield m
+            else:
+                yield from _chunks(f, read_size, use_mmap)
+        return
+    while True:
+        chunk = source.read(read_size)
+        if not chunk:
+            return
+        yield chunk.encode() if isinstance(chunk, str) else chunk
+
+
+class ParseStream:
+    """Iterator over the validated models of a streamed document.
+
+    Items that fail to decode or validate are passed to ``on_error`` if
+    given, and otherwise appended to :attr:`errors`; either way
+    iteration continues with the next item. Only a malformed document
+    (not a JSON array, a missing element or a comma before the closing
+    ``]``, an unterminated array, data after the array) raises
+    :class:`StreamFormatError`.
+    """
+
+    def __init__(
+        self,
+        model: Type[BaseModel],
+        source: Source,
+        format: str = "auto",
+        read_size: int = DEFAULT_READ_SIZE,
+        on_error: Optional[Callable[[ItemError], None]] = None,
+        loads: Optional[Callable[[bytes], Any]] = None,
+        use_mmap: bool = True,
+    ):
+        if format not in ("auto", "array", "ndjson"):
+            raise ValueError(f"unknown format {format!r}")
+        self.model = model
+        self.source = source
+        self.format = format
+        self.read_size = read_size
+        self.on_error = on_error
+        self.loads = loads or default_loads(model)
+        self.use_mmap = use_mmap
+        self.errors: List[ItemError] = []
+        self.parsed = 0
+        self.failed = 0
+
+    def _raw_items(self) -> Iterator[bytes]:
+        chunks = _chunks(self.source, self.read_size, self.use_mmap)
+        splitter = None
+        for chunk in chunks:
+            if splitter is None:
+                first = _NON_SPACE.search(chunk)
+                if first is None:
+                    continue
+                fmt = self.format
+                if fmt == "auto":
+                    fmt = "array" if chunk[first.start()] == 91 else "ndjson"
+                splitter = (
+                    _ArraySplitter() if fmt == "array" else _LineSplitter()
+                )
+            yield from splitter.feed(chunk)
+        if isinstance(splitter, _LineSplitter):
+            yield from splitter.close()
+        elif splitter is not None:
+            splitter.close()
+        elif self.format == "array":
+            raise StreamFormatError("expected a JSON array")
+
+    def _report(self, index: int, error: Exception, raw: Any) -> None:
+        self.failed += 1
+        item_error = ItemError(index, error, raw)
+        if self.on_error is not None:
+            self.on_error(item_error)
+        else:
+            self.errors.append(item_error)
+
+    def __iter__(self) -> Iterator[BaseModel]:
+        parse_obj, loads = self.model.parse_obj, self.loads
+        for index, raw in enumerate(self._raw_items()):
+            try:
+                obj = loads(raw)
+            except ValueError as e:
+                self._report(index, e, raw)
+                continue
+            try:
+                instance = parse_obj(obj)
+            except ValidationError as e:
+                self._report(index, e, obj)
+                continue
+            self.parsed += 1
+            yield instance
+
+
+def iter_parse(
+    model: Type[BaseModel],
+    source: Source,
+    *,
+    format: str = "auto",
+    read_size: int = DEFAULT_READ_SIZE,
+    on_error: Optional[Callable[[ItemError], None]] = None,
+    loads: Optional[Callable[[bytes], Any]] = None,
+    use_mmap: bool = True,
+) -> ParseStream:
+    """Validate the elements of a JSON array, or the lines of an NDJSON
+    document, into ``model`` instances one at a time.
+
+    ``source`` is a path, an open (binary or text) file or a buffer;
+    paths are memory-mapped if ``use_mmap``, and files are otherwise
+    read ``read_size`` bytes at a time. ``format`` is ``"array"``,
+    ``"ndjson"`` or ``"auto"``, which picks ``"array"`` when the first
+    non-whitespace byte is ``[``. Elements are decoded with ``loads`` if
+    given, else as :func:`~practical_pydantic.mapped.parse_file` does.
+    """
+    return ParseStream(
+        model, source, format, read_size, on_error, loads, use_mmap
+    )
@@ -0,0 +1,413 @@
+"""Skip union members that cannot possibly accept a value.
+
+``Union[int, str, UUID]`` is validated by trying each member in order
+until one succeeds, and with ``smart_union = True`` (see
+``model-config/smart-union.py``) by an exact-type and an ``isinstance``
+pass before that. Every failed attempt builds an error that is thrown
+away, which adds up on wide unions, and on unions of models in particular.
+
+:func:`prefilter_unions` works out once, per member, which kinds of input
+it could accept: a ``UUID`` member only ever accepts ``str``, ``bytes``
+or ``UUID``, a ``List[...]`` member only sequences, a ``Literal`` member
+only its values, and a model member only mappings that carry its required
+keys (and no unknown keys when ``extra = "forbid"``) with acceptable values
+for its ``Literal`` fields. Validation then only attempts the members
+that pass that check, in their declared order, so the result is the same
+as pydantic's::
+
+    prefilter_unions(Model)
+    Model(pet={"kind": "lizard", "scales": True})  # only tries Lizard
+
+When no plausible member validates, every member is tried again the
+normal way so that the error reported is exactly pydantic's.
+
+Members the filter knows nothing about (custom types, ``Any``, members
+with ``pre`` validators, enums with a ``_missing_`` hook, models with a
+custom ``__init__``, a custom root or pre root validators) are always
+attempted.
+"""
+
+import dataclasses
+import datetime
+import enum
+import inspect
+from collections import Counter, deque
+from decimal import Decimal
+from types import GeneratorType
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+from uuid import UUID
+
+from pydantic import BaseModel, ConstrainedStr, Extra
+from pydantic.fields import (
+    SHAPE_COUNTER,
+    SHAPE_DEFAULTDICT,
+    SHAPE_DEQUE,
+    SHAPE_DICT,
+    SHAPE_FROZENSET,
+    SHAPE_LIST,
+    SHAPE_MAPPING,
+    SHAPE_SEQUENCE,
+    SHAPE_SET,
+    SHAPE_SINGLETON,
+    SHAPE_TUPLE,
+    SHAPE_TUPLE_ELLIPSIS,
+    ModelField,
+)
+from pydantic.typing import (
+    NoneType,
+    all_literal_values,
+    display_as_type,
+    get_origin,
+    is_literal_type,
+    is_union,
+)
+from pydantic.utils import lenient_isinstance
+from pydantic.validators import BOOL_FALSE, BOOL_TRUE
+
+_SEQUENCE_SHAPES = {
+    SHAPE_LIST,
+    SHAPE_SET,
+    SHAPE_FROZENSET,
+    SHAPE_TUPLE,
+    SHAPE_TUPLE_ELLIPSIS,
+    SHAPE_SEQUENCE,
+    SHAPE_DEQUE,
+}
+_MAPPING_SHAPES = {SHAPE_DICT, SHAPE_DEFAULTDICT, SHAPE_MAPPING, SHAPE_COUNTER}
+_SEQUENCE_TYPES = (list, tuple, set, frozenset, GeneratorType, deque)
+_TEXT_TYPES = (str, bytes, bytearray)
+
+# parse_datetime, parse_date and parse_time take their own type and
+# anything float() takes; parse_duration only these
+_TEMPORAL_TYPES = (datetime.datetime, datetime.date, datetime.time)
+_DURATION_TYPES = (datetime.timedelta, int, float, str, bytes)
+
+TypeCheck = Callable[[type], bool]
+ValueCheck = Callable[[Any], bool]
+
+
+@dataclasses.dataclass
+class UnionStats:
+    """Counters for one union field, by member as ``display_as_type`` shows
+    it."""
+
+    calls: int = 0
+    attempts: Counter = dataclasses.field(default_factory=Counter)
+    matches: Counter = dataclasses.field(default_factory=Counter)
+    skipped: Counter = dataclasses.field(default_factory=Counter)
+    fallbacks: int = 0
+
+
+def _always(_: Any) -> bool:
+    return True
+
+
+def _subclass_of(types: Tuple[type, ...]) -> TypeCheck:
+    return lambda t: issubclass(t, types)
+
+
+def _numeric(*dunders: str) -> TypeCheck:
+    def check(t: type) -> bool:
+        return issubclass(t, _TEXT_TYPES) or any(
+            hasattr(t, d) for d in dunders
+        )
+
+    return check
+
+
+def _dict_like(t: type) -> bool:
+    # dict(v) is attempted on anything that is not a dict already
+    return hasattr(t, "__iter__") or hasattr(t, "keys")
+
+
+def _empty_if_text(v: Any) -> bool:
+    # dict("") == {} is the only way text gets through dict()
+    return not isinstance(v, _TEXT_TYPES) or not v
+
+
+def _int_text(v: Any) -> bool:
+    # int() takes surrounding whitespace, a sign and underscores
+    if not isinstance(v, str):
+        return True
+    digits = v.strip()
+    if digits[:1] in ("+", "-"):
+        digits = digits[1:]
+    return digits.replace("_", "").isdigit()
+
+
+def _uuid_text(v: Any) -> bool:
+    # UUID() drops "urn:", "uuid:", braces and hyphens, then wants 32 digits
+    if not isinstance(v, str):
+        return True
+    digits = v.replace("urn:", "").replace("uuid:", "")
+    return len(digits.strip("{}").replace("-", "")) == 32
+
+
+def _bool_value(v: Any) -> bool:
+    # whatever bool_validator accepts: anything equal to one of its values,
+    # such as NumPy integers, after bytes are decoded and text lowered
+    if v is True or v is False:
+        return True
+    try:
+        if isinstance(v, bytes):
+            v = v.decode()
+        if isinstance(v, str):
+            v = v.lower()
+        return v in BOOL_TRUE or v in BOOL_FALSE
+    except (ValueError, TypeError, AssertionError):
+        return False
+
+
+def _in_values(values: Tuple[Any, ...], allow_none: bool) -> ValueCheck:
+    allowed = set(values)
+
+    def check(v: Any) -> bool:
+        if v is None and allow_none:
+            return True
+        try:
+            return v in allowed
+        except TypeError:
+            return False
+
+    return check
+
+
+def _model_keys(model: Type[BaseModel]) -> Optional[ValueCheck]:
+    """A check that a dict holds the keys ``model`` needs, or ``None`` if the
+    model may rewrite its input before looking at the keys."""
+    if (
+        model.__pre_root_validators__
+        or model.__init__ is not BaseModel.__init__
+        or model.validate.__func__ is not BaseModel.validate.__func__
+    ):
+        return None
+    config = model.__config__
+    by_name = config.allow_population_by_field_name
+    required = []
+    literals = []
+    known = set()
+    for field in model.__fields__.values():
+        keys = (field.alias, field.name) if by_name else (field.alias,)
+        known.update(keys)
+        if field.required:
+            required.append(keys)
+        if is_literal_type(field.outer_type_) and not field.pre_validators:
+            literals.append(
+                (
+                    keys,
+                    _in_values(
+                        all_literal_values(field.type_), field.allow_none
+                    ),
+                )
+            )
+    forbid = config.extra == Extra.forbid
+
+    def check(v: Any) -> bool:
+        if not isinstance(v, dict):
+            return _empty_if_text(v)
+        for keys in required:
+            if not any(k in v for k in keys):
+                return False
+        for keys, accepts in literals:
+            for k in keys:
+                if k in v:
+                    if not accepts(v[k]):
+                        return False
+                    break
+        return not forbid or v.keys() <= known
+
+    return check
+
+
+def _member_filter(sub: ModelField) -> Tuple[TypeCheck, Optional[ValueCheck]]:
+    """Which input types ``sub`` could accept and, optionally, a further check
+    on the value itself."""
+    if sub.pre_validators:
+        return _always, None
+    if sub.shape in _SEQUENCE_SHAPES:
+        return _subclass_of(_SEQUENCE_TYPES), None
+    if sub.shape in _MAPPING_SHAPES:
+        return _dict_like, _empty_if_text
+    if sub.shape != SHAPE_SINGLETON or sub.sub_fields:
+        return _always, None
+    tp = sub.type_
+    if is_literal_type(tp):
+        return _always, _in_values(all_literal_values(tp), sub.allow_none)
+    if not inspect.isclass(tp):
+        return _always, None
+    if issubclass(tp, BaseModel):
+        if tp.__config__.orm_mode or tp.__custom_root_type__:
+            # custom root models take any value as their root
+            return _always, None
+        return (
+            lambda t: issubclass(t, tp) or _dict_like(t),
+            _model_keys(tp),
+        )
+    if issubclass(tp, enum.Enum):
+        if tp._missing_.__func__ is not enum.Enum._missing_.__func__:
+            # _missing_ may turn any value into a member
+            return _always, None
+        is_value = _in_values(tuple(m.value for m in tp), False)
+        return _always, lambda v: isinstance(v, tp) or is_value(v)
+    if tp is NoneType:
+        return _subclass_of((NoneType,)), None
+    if tp is str or issubclass(tp, ConstrainedStr):
+        return _subclass_of((str, int, float, Decimal, bytes, bytearray)), None
+    if hasattr(tp, "__get_validators__"):
+        return _always, None
+    if tp is bool:
+        return _always, _bool_value
+    if tp is UUID:
+        return _subclass_of((UUID, str, bytes, bytearray)), _uuid_text
+    if tp in _TEMPORAL_TYPES:
+        as_float = _numeric("__float__", "__index__")
+        return (lambda t: issubclass(t, tp) or as_float(t)), None
+    if tp is datetime.timedelta:
+        return _subclass_of(_DURATION_TYPES), None
+    if tp is int:
+        return _numeric("__int__", "__index__", "__trunc__"), _int_text
+    if tp is float:
+        return _numeric("__float__", "__index__"), None
+    return _always, None
+
+
+class _Plan:
+    def __init__(self, field: ModelField, instrument: bool):
+        self.members = [
+            (sub, *_member_filter(sub)) for sub in field.sub_fields
+        ]
+        self.names = [
+            display_as_type(sub.outer_type_) for sub in field.sub_fields
+        ]
+        self.by_type: Dict[type, List[Tuple[int, Optional[ValueCheck]]]] = {}
+        self.stats = UnionStats() if instrument else None
+
+    def candidates(self, t: type) -> List[Tuple[int, Optional[ValueCheck]]]:
+        try:
+            return self.by_type[t]
+        except KeyError:
+            pass
+        found = self.by_type[t] = [
+            (i, value_check)
+            for i, (_, type_check, value_check) in enumerate(self.members)
+            if type_check(t)
+        ]
+        return found
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> None:
+        # fields are copied when a model is subclassed; the copy makes its
+        # own plan, uninstrumented
+        return None
+
+
+class PrefilteredUnionField(ModelField):
+    """A union ``ModelField`` that only attempts plausible members."""
+
+    # the plan is kept in sub_fields_mapping, which only discriminated
+    # unions use, and they are left alone
+    __slots__ = ()
+
+    def _validate_singleton(self, v, values, loc, cls):
+        plan = self.sub_fields_mapping
+        if plan is None:
+            plan = self.sub_fields_mapping = _Plan(self, instrument=False)
+        stats = plan.stats
+        if stats is not None:
+            stats.calls += 1
+
+        if self.model_config.smart_union:
+            for i, (sub, _, _) in enumerate(plan.members):
+                if v.__class__ is sub.outer_type_:
+                    if stats is not None:
+                        stats.matches[plan.names[i]] += 1
+                    return v, None
+            for i, (sub, _, _) in enumerate(plan.members):
+                try:
+                    if isinstance(v, sub.outer_type_):
+                        if stats is not None:
+                            stats.matches[plan.names[i]] += 1
+                        return v, None
+                except TypeError:
+                    if lenient_isinstance(v, get_origin(sub.outer_type_)):
+                        if stats is not None:
+                            stats.attempts[plan.names[i]] += 1
+                        value, error = sub.validate(
+                            v, values, loc=loc, cls=cls
+                        )
+                        if not error:
+                            if stats is not None:
+                                stats.matches[plan.names[i]] += 1
+                            return value, None
+
+        attempted = []
+        for i, value_check in plan.candidates(v.__class__):
+            if value_check is not None and not value_check(v):
+                continue
+            value, error = plan.members[i][0].validate(
+                v, values, loc=loc, cls=cls
+            )
+            if stats is not None:
+                attempted.append(i)
+                stats.attempts[plan.names[i]] += 1
+            if not error:
+                if stats is not None:
+                    stats.matches[plan.names[i]] += 1
+                    # the members pydantic would have tried before this one
+                    stats.skipped.update(
+                        plan.names[j] for j in range(i) if j not in attempted
+                    )
+                return value, None
+
+        if stats is not None:
+            stats.fallbacks += 1
+        # nothing plausible validated: let pydantic produce its errors
+        return super()._validate_singleton(v, values, loc, cls)
+
+
+def _install(field: ModelField, instrument: bool) -> None:
+    if (
+        field.sub_fields
+        and field.shape == SHAPE_SINGLETON
+        and field.discriminator_key is None
+        and is_union(get_origin(field.type_))
+    ):
+        field.__class__ = PrefilteredUnionField
+        field.sub_fields_mapping = _Plan(field, instrument)
+    for sub in field.sub_fields or ():
+        _install(sub, instrument)
+
+
+def prefilter_unions(
+    model: Type[BaseModel], *, instrument: bool = False
+) -> Type[BaseModel]:
+    """Switch every non-discriminated union in ``model``'s fields, including
+    those inside lists, dicts and tuples, to the pre-filtered validation
+    described above. Returns ``model``.
+
+    With ``instrument``, each union counts its calls and the attempts,
+    matches and skips per member; see :func:`union_stats`.
+    """
+    for field in model.__fields__.values():
+        _install(field, instrument)
+    return model
+
+
+def union_stats(model: Type[BaseModel]) -> Dict[str, UnionStats]:
+    """The counters of the instrumented unions of ``model``, by field name
+    (``_friends`` style names for unions inside containers)."""
+    found: Dict[str, ModelField] = {}
+
+    def collect(field: ModelField) -> None:
+        if isinstance(field, PrefilteredUnionField):
+            found[field.name] = field
+        for sub in field.sub_fields or ():
+            collect(sub)
+
+    for field in model.__fields__.values():
+        collect(field)
+    stats = {}
+    for name, field in found.items():
+        plan = field.sub_fields_mapping
+        if plan is not None and plan.stats is not None:
+            stats[name] = plan.stats
+    return stats
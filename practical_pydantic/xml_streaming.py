@@ -0,0 +1,225 @@
+"""Validate the elements of a large XML document as it is parsed.
+
+``User.from_orm(fromstring(xmlstring))`` (``models/orm-mode.py``) needs the
+whole document in memory as a tree. :func:`iter_from_xml` runs
+``iterparse`` over a file instead and validates each ``<User>`` as soon
+as its end tag is read, with the model's ``getter_dict`` (a compiled
+:func:`~practical_pydantic.getters.xml_getter` is read as
+:func:`~practical_pydantic.orm.from_orm_many` reads it), then drops the
+element from the tree::
+
+    >>> for user in iter_from_xml(User, "users.xml", tag="User"):
+    ...     save(user)
+
+Everything outside the matching elements is dropped as well once it is
+closed, so memory use stays flat however large the document. Elements
+nested in a matching element belong to it and are not matched on their
+own. Since elements are cleared once validated, models should not keep
+references to them (fields typed ``Any`` read with ``child()``).
+
+With ``workers > 1`` the matching elements are serialised again and
+validated in chunks of ``chunk_size`` by a process pool (or by the
+given ``executor``), with at most two chunks per worker in flight, so
+models still come out in document order and memory stays bounded. The
+parent process only parses; it pays off for feeds of gigabytes whose
+validation outweighs parsing. As with
+:func:`~practical_pydantic.parallel.validate_many`, the model class must
+be importable in the worker processes.
+
+As with :func:`~practical_pydantic.streaming.iter_parse`, elements that
+fail validation are reported on the returned :class:`XmlStream` (or to
+an ``on_error`` callback), with the element's XML as ``raw``, and
+parsing carries on; malformed XML raises ``ParseError``.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Deque,
+    Iterator,
+    List,
+    Optional,
+    Type,
+    Union,
+)
+from xml.etree.ElementTree import Element, fromstring, iterparse, tostring
+
+from pydantic import BaseModel, ValidationError
+
+from practical_pydantic.orm import orm_reader
+from practical_pydantic.parallel import _Chunk, _chunks
+from practical_pydantic.streaming import ItemError
+
+DEFAULT_CHUNK_SIZE = 1000
+
+Source = Union[str, os.PathLike, IO[bytes]]
+
+
+def _validate_chunk(
+    model: Type[BaseModel], start: int, payloads: List[bytes]
+) -> _Chunk:
+    read = orm_reader(model)
+    models: List[Optional[BaseModel]] = []
+    errors = {}
+    for i, payload in enumerate(payloads, start):
+        try:
+            models.append(read(fromstring(payload)))
+        except ValidationError as e:
+            models.append(None)
+            errors[i] = e
+    return models, errors
+
+
+def _serialise(element: Element) -> bytes:
+    # the text after the end tag belongs to the parent
+    element.tail = None
+    return tostring(element)
+
+
+class XmlStream:
+    """Iterator over the validated models of the elements ``tag`` of an XML
+    document.
+
+    Elements that fail validation are passed to ``on_error`` if given,
+    and otherwise appended to :attr:`errors`; either way iteration
+    continues with the next element.
+    """
+
+    def __init__(
+        self,
+        model: Type[BaseModel],
+        source: Source,
+        tag: str = "User",
+        on_error: Optional[Callable[[ItemError], None]] = None,
+        workers: int = 1,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        executor: Optional[Executor] = None,
+    ):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.model = model
+        # raises ConfigError now for models without orm_mode
+        self.read = orm_reader(model)
+        self.source = source
+        self.tag = tag
+        self.on_error = on_error
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.executor = executor
+        self.errors: List[ItemError] = []
+        self.parsed = 0
+        self.failed = 0
+
+    def _elements(self) -> Iterator[Element]:
+        """The outermost elements ``tag``, each cleared and detached from the
+        tree once the caller is done with it, as is everything else once it is
+        closed."""
+        tag = self.tag
+        open_elements: List[Element] = []
+        matching = 0
+        for event, element in iterparse(self.source, ("start", "end")):
+            if event == "start":
+                open_elements.append(element)
+                if element.tag == tag:
+                    matching += 1
+                continue
+            open_elements.pop()
+            if element.tag == tag:
+                matching -= 1
+            if matching:
+                # part of an enclosing match
+                continue
+            if element.tag == tag:
+                yield element
+            element.clear()
+            if open_elements:
+                parent = open_elements[-1]
+                if parent[-1] is element:
+                    del parent[-1]
+                else:
+                    parent.remove(element)
+
+    def _report(self, index: int, error: Exception, raw: Any) -> None:
+        self.failed += 1
+        item_error = ItemError(index, error, raw)
+        if self.on_error is not None:
+            self.on_error(item_error)
+        else:
+            self.errors.append(item_error)
+
+    def _serial(self) -> Iterator[BaseModel]:
+        read = self.read
+        for index, element in enumerate(self._elements()):
+            try:
+                instance = read(element)
+            except ValidationError as e:
+                self._report(index, e, _serialise(element))
+                continue
+            self.parsed += 1
+            yield instance
+
+    def _collect(
+        self, future: "Future[_Chunk]", start: int, chunk: List[bytes]
+    ) -> Iterator[BaseModel]:
+        models, errors = future.result()
+        for i, instance in enumerate(models):
+            if instance is None:
+                self._report(start + i, errors[start + i], chunk[i])
+            else:
+                self.parsed += 1
+                yield instance
+
+    def _parallel(self) -> Iterator[BaseModel]:
+        executor = self.executor
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(max_workers=self.workers)
+        pending: Deque[Any] = deque()
+        payloads = (_serialise(e) for e in self._elements())
+        try:
+            for start, chunk in _chunks(payloads, self.chunk_size):
+                future = executor.submit(
+                    _validate_chunk, self.model, start, chunk
+                )
+                pending.append((future, start, chunk))
+                if len(pending) >= 2 * self.workers:
+                    yield from self._collect(*pending.popleft())
+            while pending:
+                yield from self._collect(*pending.popleft())
+        finally:
+            for future, _, _ in pending:
+                future.cancel()
+            if own_executor:
+                executor.shutdown()
+
+    def __iter__(self) -> Iterator[BaseModel]:
+        if self.workers > 1 or self.executor is not None:
+            return self._parallel()
+        return self._serial()
+
+
+def iter_from_xml(
+    model: Type[BaseModel],
+    source: Source,
+    tag: str = "User",
+    *,
+    on_error: Optional[Callable[[ItemError], None]] = None,
+    workers: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    executor: Optional[Executor] = None,
+) -> XmlStream:
+    """Validate the elements ``tag`` of the XML document ``source`` (a path or
+    a binary file) into ``model`` instances as they are parsed.
+
+    ``model`` needs ``orm_mode``. With ``workers > 1``, or an
+    ``executor``, elements are validated ``chunk_size`` at a time by
+    ``workers`` processes (or by ``executor``, ``workers`` chunks at a
+    time).
+    """
+    return XmlStream(
+        model, source, tag, on_error, workers, chunk_size, executor
+    )
@@ -0,0 +1,16 @@
+import pytest
+from pydantic import BaseModel, PrivateAttr
+
+from practical_pydantic.binary import from_bytes, to_bytes
+
+
+class Priv(BaseModel):
+    x: int
+    _p: int = PrivateAttr(default=7)
+
+
+@pytest.mark.parametrize("validate", [True, False])
+def test_private_attributes_get_their_defaults(validate):
+    m = from_bytes(Priv, to_bytes(Priv(x=1)), validate=validate)
+    assert m == Priv(x=1)
+    assert m._p == 7
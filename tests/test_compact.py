@@ -0,0 +1,24 @@
+import pytest
+from pydantic import BaseModel, PrivateAttr
+
+from practical_pydantic.compact import CompactModel, compact_model
+
+
+class WithPrivate(BaseModel):
+    x: int
+    _p: int = PrivateAttr(default=3)
+
+
+def test_compact_model_rejects_private_attributes():
+    with pytest.raises(TypeError, match="private attributes"):
+        compact_model(WithPrivate)
+
+
+def test_compact_subclass_with_private_attributes():
+    class Compact(CompactModel):
+        x: int
+        _p: int = PrivateAttr(default=3)
+
+    m = Compact(x=1)
+    assert m._p == 3
+    assert m.dict() == {"x": 1}
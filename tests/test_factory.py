@@ -0,0 +1,39 @@
+import gc
+import weakref
+
+from pydantic import validator
+
+from practical_pydantic.factory import ModelFactory, _generic_validators
+
+
+def _tenant_validator(i):
+    def check(cls, v):
+        return v + i - i
+
+    return {"check": validator("x", allow_reuse=True)(check)}
+
+
+def test_validator_wrappers_go_with_their_models():
+    factory = ModelFactory()
+    models = [
+        weakref.ref(
+            factory.create_model(
+                f"Tenant{i}", x=(int, ...), __validators__=_tenant_validator(i)
+            )
+        )
+        for i in range(50)
+    ]
+    factory.clear()
+    gc.collect()
+    assert not any(ref() for ref in models)
+    assert not any(f.__name__ == "check" for f in _generic_validators)
+
+
+def test_validator_wrapped_once_while_in_use():
+    factory = ModelFactory()
+    validators = _tenant_validator(0)
+    a = factory.create_model("A", x=(int, ...), __validators__=validators)
+    b = factory.create_model(
+        "B", x=(int, ...), y=(int, 0), __validators__=validators
+    )
+    assert a.__fields__["x"].validators[-1] is b.__fields__["x"].validators[-1]
@@ -0,0 +1,50 @@
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from practical_pydantic.lazy import LazyModel
+
+
+class Foo(BaseModel):
+    count: int
+
+
+class Plain(BaseModel):
+    foo: Foo
+
+    class Config:
+        validate_assignment = True
+
+
+class Lazy(LazyModel):
+    foo: Foo
+
+    class Config:
+        validate_assignment = True
+
+
+def _assign_bad(model):
+    with pytest.raises(ValidationError) as plain_error:
+        Plain(foo={"count": 1}).foo = {"count": "bad"}
+    with pytest.raises(ValidationError) as lazy_error:
+        model.foo = {"count": "bad"}
+    assert lazy_error.value.errors() == plain_error.value.errors()
+
+
+def test_failed_assignment_keeps_validated_value():
+    m = Lazy(foo={"count": 1})
+    assert m.foo.count == 1
+    _assign_bad(m)
+    assert m.foo.count == 1
+
+
+def test_failed_assignment_keeps_pending_value():
+    m = Lazy(foo={"count": 1})
+    _assign_bad(m)
+    assert m.foo.count == 1
+    assert m.dict() == {"foo": {"count": 1}}
+
+
+def test_assignment_is_validated():
+    m = Lazy(foo={"count": 1})
+    m.foo = {"count": "2"}
+    assert m.foo == Foo(count=2)
@@ -0,0 +1,35 @@
+from typing import Dict, List
+
+import pytest
+
+from practical_pydantic.memo import FrozenDict, FrozenList, MemoModel
+
+
+class Row:
+    x = 1
+    tags = {"a": [1]}
+
+
+class Tagged(MemoModel):
+    x: int
+    tags: Dict[str, List[int]]
+
+    class Config:
+        deep_freeze = True
+        orm_mode = True
+
+
+@pytest.mark.parametrize(
+    "build",
+    [
+        lambda: Tagged(x=1, tags={"a": [1]}),
+        lambda: Tagged.construct(x=1, tags={"a": [1]}),
+        lambda: Tagged.from_orm(Row()),
+    ],
+)
+def test_every_constructor_deep_freezes(build):
+    m = build()
+    assert type(m.tags) is FrozenDict
+    assert type(m.tags["a"]) is FrozenList
+    assert hash(m) == hash(Tagged(x=1, tags={"a": [1]}))
+    assert m.dict() == {"x": 1, "tags": {"a": [1]}}
@@ -0,0 +1,45 @@
+import io
+import json
+
+import pytest
+from pydantic import BaseModel
+
+from practical_pydantic.streaming import StreamFormatError, iter_parse
+
+
+class Item(BaseModel):
+    x: int
+
+
+@pytest.mark.parametrize(
+    "document",
+    [b"[1,]", b"[,1]", b"[1,,2]", b"[1] garbage", b'[{"x": 1}]x', b"[1"],
+)
+@pytest.mark.parametrize("read_size", [1, 3, 1024])
+def test_rejects_what_json_rejects(document, read_size):
+    with pytest.raises(ValueError):
+        json.loads(document)
+    stream = iter_parse(
+        Item, io.BytesIO(document), format="array", read_size=read_size
+    )
+    with pytest.raises(StreamFormatError):
+        list(stream)
+
+
+@pytest.mark.parametrize(
+    "document",
+    [b"[]", b"[ ]", b'[{"x": 1}, {"x": "2"}]  \n', b'[{"x": 1, "y": "a,]"}]'],
+)
+@pytest.mark.parametrize("read_size", [1, 3, 1024])
+def test_accepts_what_json_accepts(document, read_size):
+    stream = iter_parse(
+        Item, io.BytesIO(document), format="array", read_size=read_size
+    )
+    assert list(stream) == [Item.parse_obj(o) for o in json.loads(document)]
+
+
+def test_trailing_data_in_a_mapped_file(tmp_path):
+    path = tmp_path / "items.json"
+    path.write_bytes(b'[{"x": 1}] {"x": 2}')
+    with pytest.raises(StreamFormatError):
+        list(iter_parse(Item, path))
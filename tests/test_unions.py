@@ -0,0 +1,114 @@
+import datetime
+import enum
+import gc
+import weakref
+from fractions import Fraction
+from typing import Any, List, Literal, Optional, Union
+
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from practical_pydantic.unions import prefilter_unions, union_stats
+
+
+class Number:
+    """Like a NumPy integer: not an int, but float() and == work."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def __float__(self):
+        return float(self.value)
+
+    def __index__(self):
+        return self.value
+
+    def __eq__(self, other):
+        return self.value == other
+
+    def __hash__(self):
+        return hash(self.value)
+
+
+class A(BaseModel):
+    kind: Optional[Literal["a"]]
+    x: int
+
+
+class B(BaseModel):
+    x: int
+
+
+class Color(enum.Enum):
+    RED = "red"
+    GREEN = "green"
+
+    @classmethod
+    def _missing_(cls, value):
+        if isinstance(value, str):
+            return cls.__members__.get(value.upper())
+        return None
+
+
+class Root(BaseModel):
+    __root__: List[int]
+
+
+def _models(annotation: Any):
+    namespace = {"__annotations__": {"value": annotation}}
+    plain = type("Plain", (BaseModel,), dict(namespace))
+    filtered = prefilter_unions(type("Filtered", (BaseModel,), namespace))
+    return plain, filtered
+
+
+def _outcome(model, value):
+    try:
+        return model(value=value).value
+    except ValidationError as e:
+        return e.errors()
+
+
+CASES = [
+    (Union[datetime.datetime, float], [Number(5), Fraction(1, 2), 5]),
+    (Union[datetime.date, float], [Number(5), Fraction(1, 2), "2020-01-02"]),
+    (Union[datetime.time, float], [Number(5), Fraction(1, 2), "10:20"]),
+    (Union[datetime.timedelta, str], [Number(5), 1.5, 3]),
+    (Union[A, B], [{"kind": None, "x": 1}, {"kind": "a", "x": 1}, {"x": 1}]),
+    (Union[Literal["a"], None, int], [None, "a", 1]),
+    (Union[Color, str], ["RED", "red", "Green", "blue"]),
+    (Union[Root, int], [[1, 2], 3, "4"]),
+    (Union[bool, str], [Number(1), "yes", b"off", 2]),
+]
+
+
+@pytest.mark.parametrize(
+    "annotation, value",
+    [(annotation, v) for annotation, values in CASES for v in values],
+)
+def test_same_result_as_pydantic(annotation, value):
+    plain, filtered = _models(annotation)
+    expected = _outcome(plain, value)
+    result = _outcome(filtered, value)
+    assert result == expected
+    assert type(result) is type(expected)
+
+
+def test_subclass_gets_its_own_plan():
+    _, filtered = _models(Union[B, int])
+    prefilter_unions(filtered, instrument=True)
+    filtered(value={"x": 1})
+
+    class Child(filtered):
+        pass
+
+    assert Child(value=2).value == 2
+    assert union_stats(filtered)["value"].calls == 1
+    assert union_stats(Child) == {}
+
+
+def test_plans_are_freed_with_their_models():
+    _, filtered = _models(Union[B, int])
+    plan = weakref.ref(filtered.__fields__["value"].sub_fields_mapping)
+    del filtered
+    gc.collect()
+    assert plan() is None